@@ -3,8 +3,10 @@
 Comprehensive CSS Class Analysis Tool
 
 This script analyzes all CSS files in the src/styles/ directory and src/index.css,
-extracts ALL CSS class definitions, and compares them against the used classes
-list to identify unused CSS classes.
+extracts ALL CSS class definitions, and compares them against the classes used
+by the JSX/JS sources (extracted by jsx_class_extractor.py) to identify unused
+CSS classes. Stylesheets are parsed by the shared single-pass parser in
+css_parser.py.
 
 Handles edge cases including:
 - Comments in CSS
@@ -15,57 +17,39 @@ Handles edge cases including:
 - Nested selectors
 - Combined classes
 - CSS custom properties/variables
-- Keyframe animations
+- Keyframe animations (keyframe selectors are not classes)
 """
 
+import argparse
 import os
 import re
 import json
 from pathlib import Path
 from collections import defaultdict, Counter
-from typing import Set, Dict, List, Tuple
+from typing import Set, Dict, Iterator, List, Optional, Tuple
+
+import profiling
+from class_table import MembershipMatrix
+from css_parser import DEFAULT_TIME_BUDGET, parse_css, stylesheet_classes
+from git_scope import run_since
+from report_writer import FORMATS, output_path_for, write_report
+from session import AnalysisSession, default_base_path
+from watch import DEFAULT_INTERVAL, run_watch
 
 
 class CSSAnalyzer:
-    def __init__(self, base_path: str):
+    def __init__(self, base_path: str, use_cache: bool = True, jobs: Optional[int] = None,
+                 time_budget: Optional[float] = DEFAULT_TIME_BUDGET,
+                 session: Optional[AnalysisSession] = None):
         self.base_path = Path(base_path)
+        self.session = session or AnalysisSession(base_path, use_cache, jobs, time_budget)
         self.css_files = []
         self.all_css_classes = defaultdict(set)  # file -> set of classes
+        self.classes = self.session.classes
+        self.matrix = MembershipMatrix(self.classes)  # file x class bitsets
         self.used_classes = set()
         self.unused_classes = defaultdict(set)
-        
-        # Comprehensive regex patterns for different CSS class scenarios
-        self.class_patterns = [
-            # Standard class selectors: .classname
-            r'\.([a-zA-Z_-][a-zA-Z0-9_-]*)\s*(?=[{,\s>+~:]|$)',
-            
-            # Classes in complex selectors (with descendants, children, etc.)
-            r'\.([a-zA-Z_-][a-zA-Z0-9_-]*)\s*(?=[.#\[\s>+~:])',
-            
-            # Classes with pseudo-classes/elements: .class:hover, .class::before
-            r'\.([a-zA-Z_-][a-zA-Z0-9_-]*)\s*:+[a-zA-Z-]+',
-            
-            # Classes with attribute selectors: .class[attr], .class[attr="value"]
-            r'\.([a-zA-Z_-][a-zA-Z0-9_-]*)\s*\[',
-            
-            # Combined classes: .class1.class2
-            r'\.([a-zA-Z_-][a-zA-Z0-9_-]*)(?=\.)',
-            
-            # Classes in keyframe selectors and other special contexts
-            r'\.([a-zA-Z_-][a-zA-Z0-9_-]*)\s*(?=\s*{)',
-        ]
-        
-        # Pattern to remove CSS comments
-        self.comment_pattern = re.compile(r'/\*.*?\*/', re.DOTALL)
-        
-        # Patterns to ignore (not actual classes)
-        self.ignore_patterns = [
-            r'^[0-9]',  # Classes starting with numbers (invalid CSS)
-            r'^-webkit-',  # Vendor prefixes
-            r'^-moz-',
-            r'^-ms-',
-            r'^-o-',
-        ]
+        self.safelisted = {}  # class -> safelist pattern that keeps it
 
     def find_css_files(self) -> List[Path]:
         """Find all CSS files in src/styles/ and src/index.css"""
@@ -83,91 +67,26 @@ class CSSAnalyzer:
         
         return sorted(css_files)
 
-    def clean_css_content(self, content: str) -> str:
-        """Remove comments and normalize whitespace"""
-        # Remove CSS comments
-        content = self.comment_pattern.sub('', content)
-        
-        # Normalize whitespace
-        content = re.sub(r'\s+', ' ', content)
-        
-        return content.strip()
-
-    def is_valid_class_name(self, class_name: str) -> bool:
-        """Check if the class name is valid and should not be ignored"""
-        if not class_name:
-            return False
-            
-        # Check ignore patterns
-        for pattern in self.ignore_patterns:
-            if re.match(pattern, class_name):
-                return False
-        
-        # Must be valid CSS identifier
-        if not re.match(r'^[a-zA-Z_-][a-zA-Z0-9_-]*$', class_name):
-            return False
-            
-        return True
-
     def extract_classes_from_css(self, content: str) -> Set[str]:
         """Extract all CSS class definitions from content"""
-        classes = set()
-        
-        # Clean the content first
-        content = self.clean_css_content(content)
-        
-        # Apply all regex patterns
-        for pattern in self.class_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                if isinstance(match, tuple):
-                    # Handle cases where regex returns tuples
-                    for m in match:
-                        if self.is_valid_class_name(m):
-                            classes.add(m)
-                else:
-                    if self.is_valid_class_name(match):
-                        classes.add(match)
-        
-        # Additional pattern to catch classes in media queries and other contexts
-        media_pattern = r'@media[^{]*{[^{}]*\.([a-zA-Z_-][a-zA-Z0-9_-]*)'
-        media_matches = re.findall(media_pattern, content, re.DOTALL)
-        for match in media_matches:
-            if self.is_valid_class_name(match):
-                classes.add(match)
-        
-        # Pattern for keyframe animations
-        keyframe_pattern = r'@keyframes\s+([a-zA-Z_-][a-zA-Z0-9_-]*)'
-        keyframe_matches = re.findall(keyframe_pattern, content, re.IGNORECASE)
-        for match in keyframe_matches:
-            if self.is_valid_class_name(match):
-                classes.add(match)
-        
-        return classes
+        return stylesheet_classes(parse_css(content.encode('utf-8')))
+
+    def load_used_classes_from_source(self) -> Set[str]:
+        """Extract the used classes from the JSX/JS source tree"""
+        return self.session.used_classes()
 
     def load_used_classes(self, used_classes_file: str) -> Set[str]:
-        """Load the list of used classes from file"""
+        """Load a hand-maintained list of used classes from file"""
         used_classes = set()
         
         try:
             with open(used_classes_file, 'r', encoding='utf-8') as f:
                 content = f.read()
                 
-            # Extract class names from the used classes file
-            # Look for lines that start with - followed by class name
-            class_lines = re.findall(r'^-\s*([a-zA-Z_-][a-zA-Z0-9_-]*)', content, re.MULTILINE)
+            # Extract class names from lines of the form "- class-name"
+            class_lines = re.findall(r'^-\s*([a-zA-Z_-][a-zA-Z0-9_-]*)\s*$', content, re.MULTILINE)
             used_classes.update(class_lines)
             
-            # Also look for class names in any format (more flexible parsing)
-            all_words = re.findall(r'\b([a-zA-Z_-][a-zA-Z0-9_-]*)\b', content)
-            for word in all_words:
-                # Filter out common English words and keep likely CSS class names
-                if (len(word) > 2 and 
-                    ('-' in word or '_' in word or 
-                     any(c.isupper() for c in word[1:]) or  # camelCase
-                     word.lower() not in ['the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'man', 'new', 'now', 'old', 'see', 'two', 'way', 'who', 'boy', 'did', 'its', 'let', 'put', 'say', 'she', 'too', 'use'])):
-                    used_classes.add(word)
-            
         except FileNotFoundError:
             print(f"Warning: Used classes file '{used_classes_file}' not found")
         except Exception as e:
@@ -177,104 +96,152 @@ class CSSAnalyzer:
 
     def analyze_css_files(self) -> None:
         """Analyze all CSS files and extract class definitions"""
-        self.css_files = self.find_css_files()
+        with profiling.phase('discover'):
+            self.css_files = self.find_css_files()
         
-        for css_file in self.css_files:
-            try:
-                with open(css_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                classes = self.extract_classes_from_css(content)
-                self.all_css_classes[str(css_file.relative_to(self.base_path))] = classes
-                
-            except Exception as e:
-                print(f"Error processing {css_file}: {e}")
+        # Only stylesheets that changed since the last run are re-parsed
+        for summary in self.session.summarize(self.css_files):
+            self.all_css_classes[summary.file_path] = summary.classes
+            self.matrix.add_row(summary.file_path, self.session.class_row(summary))
 
     def find_unused_classes(self) -> None:
         """Compare CSS classes against used classes to find unused ones"""
-        for file_path, css_classes in self.all_css_classes.items():
-            unused_in_file = css_classes - self.used_classes
+        # One AND NOT per file over the class bitsets; names are decoded for unused classes only
+        used_mask = self.classes.mask(self.used_classes, add=False)
+        safelist = self.session.safelist()
+        for file_path, unused_mask in self.matrix.differences(used_mask):
+            unused_in_file = set(self.classes.names_of(unused_mask))
+            # Classes composed at runtime or listed in safelist.txt are kept
+            kept = safelist.filter(unused_in_file)
+            if kept:
+                self.safelisted.update(kept)
+                unused_in_file -= kept.keys()
             if unused_in_file:
                 self.unused_classes[file_path] = unused_in_file
 
-    def generate_report(self) -> str:
-        """Generate comprehensive report of unused CSS classes"""
-        report_lines = []
-        report_lines.append("=" * 80)
-        report_lines.append("COMPREHENSIVE UNUSED CSS CLASSES ANALYSIS REPORT")
-        report_lines.append("=" * 80)
-        report_lines.append("")
+    def iter_report_lines(self) -> Iterator[str]:
+        """Yield the lines of the text report one at a time"""
+        yield "=" * 80
+        yield "COMPREHENSIVE UNUSED CSS CLASSES ANALYSIS REPORT"
+        yield "=" * 80
+        yield ""
         
         # Summary statistics
         total_css_classes = sum(len(classes) for classes in self.all_css_classes.values())
         total_used_classes = len(self.used_classes)
         total_unused_classes = sum(len(classes) for classes in self.unused_classes.values())
         
-        report_lines.append("SUMMARY STATISTICS")
-        report_lines.append("-" * 40)
-        report_lines.append(f"Total CSS files analyzed: {len(self.css_files)}")
-        report_lines.append(f"Total CSS class definitions found: {total_css_classes}")
-        report_lines.append(f"Total used classes in codebase: {total_used_classes}")
-        report_lines.append(f"Total unused classes found: {total_unused_classes}")
-        report_lines.append(f"Usage rate: {((total_css_classes - total_unused_classes) / max(total_css_classes, 1) * 100):.1f}%")
-        report_lines.append("")
+        yield "SUMMARY STATISTICS"
+        yield "-" * 40
+        yield f"Total CSS files analyzed: {len(self.css_files)}"
+        yield f"Total CSS class definitions found: {total_css_classes}"
+        yield f"Total used classes in codebase: {total_used_classes}"
+        yield f"Total unused classes found: {total_unused_classes}"
+        yield f"Safelisted classes (dynamic or listed): {len(self.safelisted)}"
+        yield f"Usage rate: {((total_css_classes - total_unused_classes) / max(total_css_classes, 1) * 100):.1f}%"
+        yield ""
         
         # Files analyzed
-        report_lines.append("CSS FILES ANALYZED")
-        report_lines.append("-" * 40)
+        yield "CSS FILES ANALYZED"
+        yield "-" * 40
         for i, css_file in enumerate(self.css_files, 1):
             rel_path = css_file.relative_to(self.base_path)
             classes_count = len(self.all_css_classes.get(str(rel_path), set()))
             unused_count = len(self.unused_classes.get(str(rel_path), set()))
-            report_lines.append(f"{i:2d}. {rel_path} ({classes_count} classes, {unused_count} unused)")
-        report_lines.append("")
+            yield f"{i:2d}. {rel_path} ({classes_count} classes, {unused_count} unused)"
+        yield ""
         
         # Unused classes by file
         if self.unused_classes:
-            report_lines.append("UNUSED CSS CLASSES BY FILE")
-            report_lines.append("-" * 40)
+            yield "UNUSED CSS CLASSES BY FILE"
+            yield "-" * 40
             
             for file_path, unused_classes in sorted(self.unused_classes.items()):
-                report_lines.append(f"\n📁 {file_path}")
-                report_lines.append(f"   {len(unused_classes)} unused classes:")
+                yield f"\n📁 {file_path}"
+                yield f"   {len(unused_classes)} unused classes:"
                 
                 # Sort classes alphabetically
                 sorted_classes = sorted(unused_classes)
                 for class_name in sorted_classes:
-                    report_lines.append(f"   • .{class_name}")
+                    yield f"   • .{class_name}"
         else:
-            report_lines.append("🎉 NO UNUSED CSS CLASSES FOUND!")
-            report_lines.append("All CSS classes are being used in the codebase.")
+            yield "🎉 NO UNUSED CSS CLASSES FOUND!"
+            yield "All CSS classes are being used in the codebase."
+        
+        yield ""
         
-        report_lines.append("")
+        # Safelisted classes, with the pattern that keeps each
+        if self.safelisted:
+            yield "SAFELISTED CLASSES (no literal usage, kept by a safelist pattern)"
+            yield "-" * 40
+            for class_name, pattern in sorted(self.safelisted.items()):
+                yield f"   • .{class_name}  ← {pattern}"
+            yield ""
         
         # All CSS classes found (for reference)
-        report_lines.append("ALL CSS CLASSES FOUND BY FILE")
-        report_lines.append("-" * 40)
+        yield "ALL CSS CLASSES FOUND BY FILE"
+        yield "-" * 40
         
         for file_path, css_classes in sorted(self.all_css_classes.items()):
-            report_lines.append(f"\n📁 {file_path}")
-            report_lines.append(f"   {len(css_classes)} total classes:")
+            yield f"\n📁 {file_path}"
+            yield f"   {len(css_classes)} total classes:"
             
             sorted_classes = sorted(css_classes)
             for class_name in sorted_classes:
-                status = "✓ USED" if class_name in self.used_classes else "✗ UNUSED"
-                report_lines.append(f"   • .{class_name} ({status})")
-        
-        report_lines.append("")
-        report_lines.append("=" * 80)
-        report_lines.append("ANALYSIS COMPLETE")
-        report_lines.append("=" * 80)
+                if class_name in self.used_classes:
+                    status = "✓ USED"
+                elif class_name in self.safelisted:
+                    status = "✓ SAFELISTED"
+                else:
+                    status = "✗ UNUSED"
+                yield f"   • .{class_name} ({status})"
         
-        return "\n".join(report_lines)
+        yield ""
+        yield "=" * 80
+        yield "ANALYSIS COMPLETE"
+        yield "=" * 80
 
-    def run_analysis(self, used_classes_file: str) -> str:
-        """Run the complete analysis"""
+    def generate_report(self) -> str:
+        """Generate comprehensive report of unused CSS classes"""
+        return "\n".join(self.iter_report_lines())
+
+    def report_summary(self) -> dict:
+        """Summary statistics for the structured report formats"""
+        total_css_classes = sum(len(classes) for classes in self.all_css_classes.values())
+        total_unused_classes = sum(len(classes) for classes in self.unused_classes.values())
+        return {
+            'report': 'unused-css-classes',
+            'css_files_analyzed': len(self.css_files),
+            'total_css_classes': total_css_classes,
+            'total_used_classes': len(self.used_classes),
+            'total_unused_classes': total_unused_classes,
+            'total_safelisted_classes': len(self.safelisted),
+            'usage_rate': round((total_css_classes - total_unused_classes) / max(total_css_classes, 1) * 100, 1),
+        }
+
+    def iter_report_records(self) -> Iterator[dict]:
+        """Yield one record per class per CSS file"""
+        for file_path, css_classes in sorted(self.all_css_classes.items()):
+            for class_name in sorted(css_classes):
+                yield {
+                    'type': 'class',
+                    'file': file_path,
+                    'class': class_name,
+                    'used': class_name in self.used_classes,
+                    'safelisted': self.safelisted.get(class_name),
+                }
+
+    def analyze(self, used_classes_file: Optional[str] = None) -> None:
+        """Run the analysis phases without building a report"""
         print("🔍 Starting comprehensive CSS analysis...")
         
-        # Load used classes
-        print("📖 Loading used classes list...")
-        self.used_classes = self.load_used_classes(used_classes_file)
+        # Load used classes (from the source tree unless a list file is given)
+        if used_classes_file:
+            print("📖 Loading used classes list...")
+            self.used_classes = self.load_used_classes(used_classes_file)
+        else:
+            print("📖 Extracting used classes from source files...")
+            self.used_classes = self.load_used_classes_from_source()
         print(f"   Found {len(self.used_classes)} used classes")
         
         # Analyze CSS files
@@ -284,30 +251,50 @@ class CSSAnalyzer:
         
         # Find unused classes
         print("🔎 Identifying unused classes...")
-        self.find_unused_classes()
+        with profiling.phase('diff'):
+            self.find_unused_classes()
+
+    def run_analysis(self, used_classes_file: Optional[str] = None) -> str:
+        """Run the complete analysis"""
+        self.analyze(used_classes_file)
         
         # Generate report
         print("📊 Generating report...")
-        report = self.generate_report()
+        with profiling.phase('report'):
+            report = self.generate_report()
         
         print("✅ Analysis complete!")
         return report
 
 
-def main():
-    """Main function to run the CSS analysis"""
-    base_path = "/mnt/c/Rare/GitHub/greys-anatomy-report"
-    used_classes_file = os.path.join(base_path, "used-css-classes.txt")
-    output_file = os.path.join(base_path, "unused-css-classes-report.txt")
+def run(args):
+    """Run the analysis for the parsed command-line arguments"""
+    base_path = args.base_path or str(default_base_path())
+    
+    if args.watch:
+        session = AnalysisSession(base_path, use_cache=not args.no_cache, jobs=args.jobs,
+                                  time_budget=args.time_budget or None)
+        run_watch(session, CSSAnalyzer(base_path, session=session).find_css_files, args.interval)
+        return
+    if args.since:
+        session = AnalysisSession(base_path, use_cache=not args.no_cache, jobs=args.jobs,
+                                  time_budget=args.time_budget or None)
+        default_output = os.path.join(base_path, "unused-css-changes-report.txt")
+        run_since(session, args.since, ('unused',), args.output or output_path_for(default_output, args.format),
+                  args.format)
+        return
+    default_output = os.path.join(base_path, "unused-css-classes-report.txt")
+    output_file = args.output or output_path_for(default_output, args.format)
     
     # Create analyzer and run analysis
-    analyzer = CSSAnalyzer(base_path)
-    report = analyzer.run_analysis(used_classes_file)
+    analyzer = CSSAnalyzer(base_path, use_cache=not args.no_cache, jobs=args.jobs,
+                           time_budget=args.time_budget or None)
+    analyzer.analyze()
     
-    # Save report to file
+    # Stream the report to file section by section
+    print("📊 Writing report...")
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(report)
+        write_report(analyzer, output_file, args.format)
         print(f"📄 Report saved to: {output_file}")
     except Exception as e:
         print(f"❌ Error saving report: {e}")
@@ -332,5 +319,35 @@ def main():
             print(f"  • {file_path}: {len(unused)} unused")
 
 
+def main():
+    """Main function to run the CSS analysis"""
+    parser = argparse.ArgumentParser(description="Find CSS classes not used by the JSX/JS sources.")
+    parser.add_argument('--base-path', default=None,
+                        help="Repository to analyze (default: the repository containing css-hygiene/)")
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help="Worker processes for parsing (default: all cores)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignore and do not update .css-hygiene-cache/")
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET,
+                        help="Seconds allowed for parsing any one stylesheet (0 disables)")
+    parser.add_argument('--format', choices=FORMATS, default='text',
+                        help="Report format (default: text)")
+    parser.add_argument('--output', '-o', default=None,
+                        help="Report path (default: unused-css-classes-report.<ext>)")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep the class index in memory and re-report on every change")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help="Watch mode polling interval in seconds")
+    parser.add_argument('--since', metavar='REF', default=None,
+                        help="Only re-analyze stylesheets and sources changed since a git ref")
+    parser.add_argument('--profile', metavar='TRACE', default=None,
+                        help="Write a Chrome trace of per-phase and per-file timings to TRACE")
+    parser.add_argument('--cprofile', metavar='FILE', default=None,
+                        help="Write cProfile statistics of the run to FILE")
+    args = parser.parse_args()
+    
+    with profiling.profile_run(args.profile, args.cprofile):
+        run(args)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+css-hygiene Benchmark Suite
+
+Generates a deterministic synthetic CSS/JSX corpus and times the css-hygiene
+tools against it, so regressions in the extractors show up as numbers rather
+than as a slow CI job. Results are written to a JSON file that can be compared
+between runs.
+
+Features:
+- Seeded corpus generator scaling from 100 to 1,000,000 rules
+- Nested @media/@supports blocks, keyframes and font-face rules
+- Minified single-line bundles
+- Pathological selectors (long chains, huge selector lists, escaped classes,
+  attribute values and strings containing dots and braces)
+- JSX sources using a known fraction of the generated classes
+- Wall time, throughput (rules/s, MB/s) and peak memory per tool, and the
+  wall time of each profiling phase (read, tokenize, extract, scan, diff,
+  report, ...) inside it
+- Fixture resets (remove rewrites the corpus) run outside the timed region
+
+Usage:
+    python css-hygiene/benchmark.py --rules 100 1000 10000 --output bench.json
+    python css-hygiene/benchmark.py --compare old.json new.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import profiling
+
+# Data structures
+CorpusStats = namedtuple('CorpusStats', ['rules', 'css_files', 'css_bytes', 'source_files', 'source_bytes'])
+
+DEFAULT_SIZES = [100, 1000, 10000]
+DEFAULT_SEED = 1234
+RULES_PER_FILE = 1000
+USED_FRACTION = 0.5
+
+WORDS = ['card', 'header', 'nav', 'item', 'title', 'chart', 'axis', 'label', 'panel', 'grid',
+         'button', 'icon', 'tooltip', 'legend', 'modal', 'footer', 'list', 'badge', 'row', 'cell']
+MODIFIERS = ['active', 'hover', 'large', 'small', 'primary', 'muted', 'open', 'hidden', 'dark', 'wide']
+PROPERTIES = [
+    ('color', ['#333', '#fff', 'red', 'rgb(10, 20, 30)', 'var(--primary)']),
+    ('margin', ['0', '4px', '0 auto', '1rem 2rem']),
+    ('padding', ['0', '8px', '0.5em 1em']),
+    ('display', ['flex', 'block', 'grid', 'none']),
+    ('font-size', ['12px', '1rem', '1.25em']),
+    ('background', ['none', 'url("data:image/svg+xml;utf8,<svg>{}</svg>")', 'linear-gradient(#fff, #eee)']),
+    ('transition', ['all 0.2s ease', 'opacity .3s']),
+]
+MEDIA_QUERIES = ['(max-width: 768px)', '(min-width: 1024px)', 'print', '(prefers-color-scheme: dark)']
+
+
+class CorpusGenerator:
+    def __init__(self, rules: int, seed: int = DEFAULT_SEED):
+        self.rules = rules
+        self.random = random.Random(seed)
+        self.class_names = [self._class_name(i) for i in range(max(rules, 10))]
+        self.rules_written = 0
+
+    def _class_name(self, index: int) -> str:
+        """Deterministic, readable class name for a vocabulary index"""
+        word = WORDS[index % len(WORDS)]
+        modifier = MODIFIERS[(index // len(WORDS)) % len(MODIFIERS)]
+        return f"{word}-{modifier}-{index}"
+
+    def _pick(self) -> str:
+        return self.random.choice(self.class_names)
+
+    def _declarations(self) -> List[str]:
+        """A few property declarations for one rule"""
+        return [
+            f"{name}: {self.random.choice(values)};"
+            for name, values in self.random.sample(PROPERTIES, self.random.randint(1, 4))
+        ]
+
+    def _selector(self, class_name: str) -> str:
+        """A selector defining class_name, occasionally pathological"""
+        roll = self.random.random()
+        if roll < 0.55:
+            return f".{class_name}"
+        if roll < 0.75:
+            return f".{class_name}:hover, .{class_name}.{self.random.choice(MODIFIERS)}"
+        if roll < 0.85:
+            return f".{self._pick()} > .{class_name}::before"
+        if roll < 0.90:
+            # Long descendant chain
+            chain = ' '.join(f".{self._pick()}" for _ in range(self.random.randint(10, 40)))
+            return f"{chain} .{class_name}"
+        if roll < 0.94:
+            # Huge selector list
+            return ',\n'.join(f".{class_name} .{self._pick()}" for _ in range(self.random.randint(20, 60)))
+        if roll < 0.97:
+            # Attribute values and strings that look like classes or braces
+            return f'a[href$=".pdf"][data-x="{{.fake}}"].{class_name}'
+        return f".{class_name}, .md\\:{class_name}"
+
+    def _rule(self, indent: str = '') -> str:
+        class_name = self.class_names[self.rules_written % len(self.class_names)]
+        self.rules_written += 1
+        body = ''.join(f"\n{indent}  {declaration}" for declaration in self._declarations())
+        return f"{indent}{self._selector(class_name)} {{{body}\n{indent}}}\n"
+
+    def stylesheet(self, rules: int) -> str:
+        """A formatted stylesheet with nested at-rules and comments"""
+        parts = [f"/* synthetic stylesheet: {rules} rules {{ not a block }} */\n"]
+        remaining = rules
+        while remaining > 0:
+            roll = self.random.random()
+            if roll < 0.15 and remaining >= 3:
+                # Nested media/supports block
+                count = self.random.randint(1, min(remaining, 8))
+                inner = ''.join(self._rule('    ') for _ in range(count))
+                query = self.random.choice(MEDIA_QUERIES)
+                parts.append(f"@media {query} {{\n  @supports (display: grid) {{\n{inner}  }}\n}}\n")
+                remaining -= count
+            elif roll < 0.18:
+                parts.append(f"@keyframes fade-{self.rules_written} {{\n  from {{ opacity: 0; }}\n"
+                             f"  to {{ opacity: 1; }}\n}}\n")
+            elif roll < 0.20:
+                parts.append("@font-face {\n  font-family: 'Synthetic';\n  src: url('font.woff2');\n}\n")
+            else:
+                parts.append(self._rule())
+                remaining -= 1
+        return ''.join(parts)
+
+    def minified(self, rules: int) -> str:
+        """A single-line bundle, as produced by a CSS minifier"""
+        parts = []
+        for _ in range(rules):
+            class_name = self.class_names[self.rules_written % len(self.class_names)]
+            self.rules_written += 1
+            parts.append(f".{class_name}{{{''.join(self._declarations())}}}")
+        return '@media print{.no-print{display:none}}' + ''.join(parts)
+
+    def component(self, index: int, classes: List[str]) -> str:
+        """A JSX component using the given classes through the common sinks"""
+        lines = ["import React from 'react';", "", f"export default function Component{index}({{ active }}) {{",
+                 "  return (", "    <div>"]
+        for i, class_name in enumerate(classes):
+            kind = i % 4
+            if kind == 0:
+                lines.append(f'      <span className="{class_name}">text</span>')
+            elif kind == 1:
+                lines.append(f"      <span className={{`{class_name} ${{active ? 'active' : ''}}`}} />")
+            elif kind == 2:
+                lines.append(f"      <span className={{active ? '{class_name}' : 'hidden'}} />")
+            else:
+                lines.append(f"      <svg ref={{el => d3.select(el).selectAll('.{class_name}')}} />")
+        lines += ["    </div>", "  );", "}", ""]
+        return '\n'.join(lines)
+
+    def write(self, root: Path) -> CorpusStats:
+        """Write the corpus under root/src and return its size"""
+        styles_dir = root / 'src' / 'styles'
+        components_dir = root / 'src' / 'components'
+        styles_dir.mkdir(parents=True, exist_ok=True)
+        components_dir.mkdir(parents=True, exist_ok=True)
+
+        css_files = css_bytes = 0
+        bundle_rules = self.rules // 10
+        remaining = self.rules - bundle_rules
+        file_index = 0
+        while remaining > 0:
+            count = min(remaining, RULES_PER_FILE)
+            path = styles_dir / f"module-{file_index:05d}.css"
+            css_bytes += path.write_bytes(self.stylesheet(count).encode('utf-8'))
+            css_files += 1
+            file_index += 1
+            remaining -= count
+        if bundle_rules:
+            css_bytes += (styles_dir / 'bundle.min.css').write_bytes(self.minified(bundle_rules).encode('utf-8'))
+            css_files += 1
+        css_bytes += (root / 'src' / 'index.css').write_bytes(self.stylesheet(10).encode('utf-8'))
+        css_files += 1
+
+        used = self.class_names[:int(len(self.class_names) * USED_FRACTION)]
+        source_files = source_bytes = 0
+        for index in range(0, len(used), 50):
+            path = components_dir / f"Component{index // 50:05d}.jsx"
+            source_bytes += path.write_bytes(self.component(index // 50, used[index:index + 50]).encode('utf-8'))
+            source_files += 1
+
+        return CorpusStats(self.rules_written, css_files, css_bytes, source_files, source_bytes)
+
+
+def generate_corpus(root: Path, rules: int, seed: int = DEFAULT_SEED) -> CorpusStats:
+    """Generate a deterministic corpus of roughly `rules` style rules under root"""
+    return CorpusGenerator(rules, seed).write(Path(root))
+
+
+def measure(func: Callable[[], object], setup: Optional[Callable[[], object]] = None,
+            trace_memory: bool = True) -> Dict[str, object]:
+    """Time one call and its profiling phases, running setup untimed first; if trace_memory, rerun for the peak"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        if setup:
+            setup()
+        profiler = profiling.enable(trace_memory=False)
+        try:
+            start = time.perf_counter()
+            func()
+            seconds = time.perf_counter() - start
+        finally:
+            profiling.disable()
+
+        peak = None
+        if trace_memory:
+            if setup:
+                setup()
+            tracemalloc.start()
+            try:
+                func()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    phases = {name: total['wall_ms'] / 1000 for name, total in profiler.phase_totals().items()}
+    return {'seconds': seconds, 'peak_memory_bytes': peak, 'phase_seconds': phases}
+
+
+def css_files_of(root: Path) -> List[Path]:
+    return sorted((root / 'src').rglob('*.css'))
+
+
+def benchmark_corpus(root: Path, stats: CorpusStats, jobs: int, trace_memory: bool) -> Dict[str, dict]:
+    """Time each tool against one generated corpus"""
+    from analyze_unused_css import CSSAnalyzer
+    from css_duplicate_analyzer import CSSClassAnalyzer
+    from jsx_class_extractor import collect_used_classes
+    import find_unused_css
+    import remove_unused_css
+
+    css_files = css_files_of(root)
+    used_classes = collect_used_classes(root)
+    unused = {path: find_unused_css.extract_css_classes(path) - used_classes for path in css_files}
+
+    # remove_unused_classes rewrites files in place, so each run gets a fresh copy
+    pristine = root.parent / (root.name + '-pristine')
+    shutil.copytree(root / 'src', pristine)
+
+    def restore():
+        for path in css_files:
+            shutil.copyfile(pristine / path.relative_to(root / 'src'), path)
+
+    def remove_all():
+        for path in css_files:
+            remove_unused_css.remove_unused_classes(str(path), unused[path])
+
+    phases = {
+        'CSSAnalyzer.run_analysis':
+            lambda: CSSAnalyzer(str(root), use_cache=False, jobs=jobs).run_analysis(),
+        'CSSClassAnalyzer.run_analysis':
+            lambda: CSSClassAnalyzer(str(root), use_cache=False, jobs=jobs).run_analysis(),
+        'find_unused_css.extract_css_classes':
+            lambda: [find_unused_css.extract_css_classes(path) for path in css_files],
+        'remove_unused_css.remove_unused_classes': remove_all,
+    }
+    setups = {'remove_unused_css.remove_unused_classes': restore}
+
+    results = {}
+    try:
+        for name, func in phases.items():
+            result = measure(func, setups.get(name), trace_memory)
+            result['rules_per_second'] = stats.rules / result['seconds'] if result['seconds'] else None
+            result['mb_per_second'] = stats.css_bytes / 1e6 / result['seconds'] if result['seconds'] else None
+            results[name] = result
+            print(f"   {name:<42} {result['seconds']:9.3f} s  "
+                  f"{result['rules_per_second'] or 0:12,.0f} rules/s  {format_bytes(result['peak_memory_bytes'])}")
+            for phase, seconds in sorted(result['phase_seconds'].items(), key=lambda item: -item[1]):
+                print(f"     {phase:<40} {seconds:9.3f} s")
+    finally:
+        restore()
+        shutil.rmtree(pristine)
+    return results
+
+
+def format_bytes(size: Optional[int]) -> str:
+    if size is None:
+        return 'peak n/a'
+    return f"peak {size / (1024 * 1024):8.1f} MiB"
+
+
+def run_benchmarks(sizes: List[int], seed: int, jobs: int, trace_memory: bool,
+                   keep_dir: Optional[str] = None) -> dict:
+    """Generate one corpus per size and benchmark every tool against it"""
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+        'jobs': jobs,
+        'runs': [],
+    }
+
+    work_dir = Path(keep_dir) if keep_dir else Path(tempfile.mkdtemp(prefix='css-hygiene-bench-'))
+    try:
+        for size in sizes:
+            root = work_dir / f"corpus-{size}"
+            if root.exists():
+                shutil.rmtree(root)
+            print(f"🧪 Generating corpus with {size:,} rules...")
+            start = time.perf_counter()
+            stats = generate_corpus(root, size, seed)
+            print(f"   {stats.css_files} stylesheets ({stats.css_bytes / 1e6:.1f} MB), "
+                  f"{stats.source_files} components in {time.perf_counter() - start:.1f} s")
+            results['runs'].append({
+                'corpus': stats._asdict(),
+                'phases': benchmark_corpus(root, stats, jobs, trace_memory),
+            })
+    finally:
+        if not keep_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def compare_results(old: dict, new: dict) -> List[str]:
+    """Report the relative change of each phase between two result files"""
+    lines = []
+    old_runs = {run['corpus']['rules']: run for run in old['runs']}
+    for run in new['runs']:
+        rules = run['corpus']['rules']
+        previous = old_runs.get(rules)
+        if not previous:
+            continue
+        lines.append(f"{rules:,} rules:")
+        for name, result in run['phases'].items():
+            before = previous['phases'].get(name)
+            if not before:
+                continue
+            change = (result['seconds'] - before['seconds']) / before['seconds'] * 100 if before['seconds'] else 0
+            lines.append(f"  {name:<42} {before['seconds']:9.3f} s -> {result['seconds']:9.3f} s ({change:+.1f}%)")
+            for phase, seconds in result.get('phase_seconds', {}).items():
+                was = before.get('phase_seconds', {}).get(phase)
+                if was:
+                    lines.append(f"    {phase:<40} {was:9.3f} s -> {seconds:9.3f} s ({(seconds - was) / was * 100:+.1f}%)")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the css-hygiene tools on a synthetic corpus.")
+    parser.add_argument('--rules', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Corpus sizes in rules (default: 100 1000 10000; up to 1000000)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Corpus generator seed")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="Worker processes passed to the analyzers (default: 1)")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Skip the tracemalloc pass that measures peak memory")
+    parser.add_argument('--keep', metavar='DIR', default=None,
+                        help="Generate corpora in DIR and keep them")
+    parser.add_argument('--output', '-o', default='css-hygiene-benchmark.json',
+                        help="Results file (default: css-hygiene-benchmark.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help="Compare two results files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding='utf-8') as f:
+            old = json.load(f)
+        with open(args.compare[1], encoding='utf-8') as f:
+            new = json.load(f)
+        print('\n'.join(compare_results(old, new)))
+        return
+
+    results = run_benchmarks(args.rules, args.seed, args.jobs, not args.no_memory, args.keep)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"📄 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Byte-Weighted Savings Report
+
+Ranks CSS classes by the bytes they cost users instead of by count. Every
+class is mapped to the byte spans of the rules that reference it, both in the
+source stylesheets (src/) and in the built bundle (dist/assets/), and the
+bundle bytes are measured raw, gzip-compressed and brotli-compressed. Unused and
+duplicated classes are flagged so cleanup can start where it shrinks the
+render-blocking CSS the most.
+
+Features:
+- Byte spans (file, offset range, line) of every rule referencing a class
+- Source and dist sizes; when no dist build exists, source sizes are ranked
+- gzip and (if the brotli package is installed) brotli sizes of each class's
+  shipped rules, compressed on their own; the gzip size of its source rules
+  is a separate column, so classes missing from the bundle ship 0 bytes
+- Totals for the whole bundle and for the unused classes in it
+"""
+
+import gzip
+from collections import defaultdict, namedtuple
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import css_parser
+from parallel import parallel_map
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Data structures
+Span = namedtuple('Span', ['file_path', 'start', 'end', 'line_number'])
+ClassWeight = namedtuple('ClassWeight', ['class_name', 'status', 'source_bytes', 'source_spans',
+                                         'dist_bytes', 'dist_spans', 'gzip_bytes', 'brotli_bytes',
+                                         'source_gzip_bytes'])
+
+# Vite emits the stylesheets of the bundle here, relative to the dist directory
+BUNDLE_ASSETS_DIR = 'assets'
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Number of locations listed per class in the text report
+MAX_LOCATIONS = 3
+
+
+def gzip_size(data: bytes) -> int:
+    """Size of data after gzip compression (0 for no data)."""
+    return len(gzip.compress(data, GZIP_LEVEL, mtime=0)) if data else 0
+
+
+def brotli_size(data: bytes) -> Optional[int]:
+    """Size of data after brotli compression, or None without the brotli package."""
+    if brotli is None:
+        return None
+    return len(brotli.compress(data, quality=BROTLI_QUALITY)) if data else 0
+
+
+def class_spans(file_path: Union[str, Path], base_path: Union[str, Path],
+                time_budget: Optional[float] = None) -> Dict[str, List[Span]]:
+    """Map each class of a stylesheet to the spans of the rules referencing it."""
+    file_path = Path(file_path)
+    sheet = css_parser.parse_css_file(file_path, time_budget)
+    lines = css_parser.LineIndex(sheet.data)
+    try:
+        relative_path = str(file_path.relative_to(base_path))
+    except ValueError:
+        relative_path = str(file_path)
+
+    spans = defaultdict(list)
+    for rule in sheet.rules:
+        if not rule.classes:
+            continue
+        span = Span(relative_path, rule.start, rule.end, lines.line(rule.start))
+        for class_name in {token.name for token in rule.classes}:
+            spans[class_name].append(span)
+    return dict(spans)
+
+
+def _spans_task(task: Tuple[str, str, Optional[float]]) -> Tuple[Dict[str, List[Span]], Optional[str]]:
+    """Map the classes of one stylesheet in a worker process, returning (spans, error)."""
+    file_path, base_path, time_budget = task
+    try:
+        return class_spans(file_path, base_path, time_budget), None
+    except Exception as e:
+        return {}, f"Error processing {file_path}: {e}"
+
+
+def find_css_files(directory: Path) -> List[Path]:
+    """Find all CSS files under a directory"""
+    if not directory.exists():
+        return []
+    return sorted(path for path in directory.rglob('*.css') if 'node_modules' not in path.parts)
+
+
+def find_bundle_files(dist_path: Path) -> List[Path]:
+    """Stylesheets of the built bundle; other CSS under dist/ (such as purge output) does not ship"""
+    return sorted((dist_path / BUNDLE_ASSETS_DIR).glob('*.css'))
+
+
+class ByteWeightAnalyzer:
+    def __init__(self, session, dist_path: Optional[Union[str, Path]] = None):
+        self.session = session
+        self.base_path = session.base_path
+        self.dist_path = Path(dist_path) if dist_path else self.base_path / 'dist'
+        self.source_files = []
+        self.dist_files = []
+        self.dist_total = 0
+        self.dist_gzip_total = 0
+        self.dist_brotli_total = None
+        self.weights: List[ClassWeight] = []
+
+    def _collect_spans(self, files: List[Path]) -> Dict[str, List[Span]]:
+        """Class spans of all files, parsed in parallel."""
+        tasks = [(str(file_path), str(self.base_path), self.session.time_budget) for file_path in files]
+        spans = defaultdict(list)
+        for file_spans, error in parallel_map(_spans_task, tasks, self.session.jobs):
+            if error:
+                print(error)
+            for class_name, spans_in_file in file_spans.items():
+                spans[class_name].extend(spans_in_file)
+        return spans
+
+    def _read_spans(self, spans: List[Span], store: Dict[str, bytes]) -> bytes:
+        """Concatenated bytes of the given spans"""
+        chunks = []
+        for span in spans:
+            data = store.get(span.file_path)
+            if data is None:
+                data = store[span.file_path] = (self.base_path / span.file_path).read_bytes()
+            chunks.append(data[span.start:span.end])
+        return b''.join(chunks)
+
+    def analyze(self) -> None:
+        """Measure the bytes of every class in the sources and the dist bundle."""
+        print("⚖️  Measuring class byte weights...")
+        self.source_files = find_css_files(self.base_path / 'src')
+        self.dist_files = find_bundle_files(self.dist_path)
+        if not self.dist_files:
+            print(f"   No CSS in {self.dist_path / BUNDLE_ASSETS_DIR}; ranking by source bytes "
+                  f"(run `npm run build` for bundle sizes)")
+
+        source_spans = self._collect_spans(self.source_files)
+        dist_spans = self._collect_spans(self.dist_files)
+
+        used_classes = self.session.used_classes()
+        safelist = self.session.safelist()
+        definition_files = {
+            class_name: {span.file_path for span in spans} for class_name, spans in source_spans.items()
+        }
+
+        # Compressed sizes are measured on what ships: the bundle if built, else the sources
+        store = {}
+        if self.dist_files:
+            bundle = b''.join(path.read_bytes() for path in self.dist_files)
+            self.dist_total = len(bundle)
+            self.dist_gzip_total = gzip_size(bundle)
+            self.dist_brotli_total = brotli_size(bundle)
+
+        weights = []
+        for class_name in sorted(source_spans.keys() | dist_spans.keys()):
+            sources = source_spans.get(class_name, [])
+            shipped = dist_spans.get(class_name, [])
+            source_data = self._read_spans(sources, store)
+            # Without a dist build the sources stand in for the bundle
+            data = self._read_spans(shipped, store) if self.dist_files else source_data
+            if class_name not in used_classes and safelist.match(class_name) is None:
+                status = 'unused'
+            elif len(definition_files.get(class_name, ())) > 1:
+                status = 'duplicate'
+            else:
+                status = 'used'
+            weights.append(ClassWeight(
+                class_name=class_name,
+                status=status,
+                source_bytes=sum(span.end - span.start for span in sources),
+                source_spans=sources,
+                dist_bytes=sum(span.end - span.start for span in shipped),
+                dist_spans=shipped,
+                gzip_bytes=gzip_size(data),
+                brotli_bytes=brotli_size(data),
+                source_gzip_bytes=gzip_size(source_data)
+            ))
+
+        rank_key = (lambda weight: weight.dist_bytes) if self.dist_files else (lambda weight: weight.source_bytes)
+        self.weights = sorted(weights, key=lambda weight: (-rank_key(weight), weight.class_name))
+        print(f"   Measured {len(self.weights)} classes in {len(self.source_files)} source "
+              f"and {len(self.dist_files)} dist stylesheets")
+
+    def _total(self, status: Optional[str] = None, field: str = 'source_bytes') -> int:
+        return sum(
+            getattr(weight, field) or 0 for weight in self.weights
+            if status is None or weight.status == status
+        )
+
+    def iter_report_lines(self) -> Iterator[str]:
+        """Yield the lines of the byte-weighted savings report one at a time."""
+        ranked_by = 'dist bytes' if self.dist_files else 'source bytes (no dist build found)'
+        yield from [
+            "=" * 80,
+            "CSS BYTE-WEIGHTED SAVINGS REPORT",
+            "=" * 80,
+            "",
+            f"Analysis completed on: {self.base_path}",
+            f"Source stylesheets: {len(self.source_files)}",
+            f"Dist stylesheets: {len(self.dist_files)} ({self.dist_path / BUNDLE_ASSETS_DIR})",
+            f"Classes measured: {len(self.weights)}",
+            f"Ranked by: {ranked_by}",
+            "",
+        ]
+        if self.dist_files:
+            brotli_total = f"{self.dist_brotli_total:,}" if self.dist_brotli_total is not None else 'n/a'
+            yield from [
+                "BUNDLE:",
+                f"- Raw: {self.dist_total:,} bytes",
+                f"- gzip: {self.dist_gzip_total:,} bytes",
+                f"- brotli: {brotli_total} bytes",
+                "",
+            ]
+        yield from [
+            "POTENTIAL SAVINGS:",
+            f"- Unused classes: {sum(1 for w in self.weights if w.status == 'unused')} "
+            f"({self._total('unused'):,} source bytes, {self._total('unused', 'source_gzip_bytes'):,} source gzip bytes)",
+        ]
+        if self.dist_files:
+            unshipped = [w for w in self.weights if w.status == 'unused' and not w.dist_spans]
+            yield from [
+                f"- Shipped by unused classes: {self._total('unused', 'dist_bytes'):,} dist bytes, "
+                f"{self._total('unused', 'gzip_bytes'):,} gzip bytes",
+                f"- Unused classes missing from the bundle: {len(unshipped)} "
+                f"({sum(w.source_bytes for w in unshipped):,} source bytes, none shipped)",
+            ]
+        columns = ("The gzip and brotli columns measure shipped bytes only; Src gzip the source rules."
+                   if self.dist_files else "Without a dist build the gzip and brotli columns measure the source rules.")
+        yield from [
+            f"- Duplicated classes: {sum(1 for w in self.weights if w.status == 'duplicate')} "
+            f"({self._total('duplicate'):,} source bytes)",
+            "",
+            "Compressed sizes compress each class's rules on their own, so they",
+            "over-estimate what removing the class saves from the compressed bundle.",
+            columns,
+            "",
+            "CLASSES BY WEIGHT:",
+            "-" * 80,
+            f"{'Rank':>5}  {'Source':>8}  {'Src gzip':>8}  {'Dist':>8}  {'gzip':>7}  {'brotli':>7}  {'Status':<9}  Class",
+        ]
+        for rank, weight in enumerate(self.weights, 1):
+            brotli_bytes = f"{weight.brotli_bytes:,}" if weight.brotli_bytes is not None else 'n/a'
+            yield (f"{rank:>5}  {weight.source_bytes:>8,}  {weight.source_gzip_bytes:>8,}  {weight.dist_bytes:>8,}  "
+                   f"{weight.gzip_bytes:>7,}  {brotli_bytes:>7}  {weight.status:<9}  .{weight.class_name}")
+            locations = [f"{span.file_path}:{span.line_number}" for span in weight.source_spans[:MAX_LOCATIONS]]
+            more = len(weight.source_spans) - MAX_LOCATIONS
+            if more > 0:
+                locations.append(f"+{more} more")
+            if locations:
+                yield f"{'':>5}  {', '.join(locations)}"
+
+    def generate_report(self) -> str:
+        """Generate the byte-weighted savings report."""
+        return '\n'.join(self.iter_report_lines())
+
+    def report_summary(self) -> dict:
+        """Summary statistics for the structured report formats."""
+        return {
+            'report': 'css-byte-weights',
+            'source_files': len(self.source_files),
+            'dist_files': len(self.dist_files),
+            'classes': len(self.weights),
+            'ranked_by': 'dist_bytes' if self.dist_files else 'source_bytes',
+            'dist_bytes': self.dist_total,
+            'dist_gzip_bytes': self.dist_gzip_total,
+            'dist_brotli_bytes': self.dist_brotli_total,
+            'unused_source_bytes': self._total('unused'),
+            'unused_source_gzip_bytes': self._total('unused', 'source_gzip_bytes'),
+            'unused_dist_bytes': self._total('unused', 'dist_bytes'),
+            'unused_gzip_bytes': self._total('unused', 'gzip_bytes'),
+        }
+
+    def iter_report_records(self) -> Iterator[dict]:
+        """Yield one record per class, heaviest first."""
+        for rank, weight in enumerate(self.weights, 1):
+            yield {
+                'type': 'class',
+                'rank': rank,
+                'class': weight.class_name,
+                'status': weight.status,
+                'source_bytes': weight.source_bytes,
+                'dist_bytes': weight.dist_bytes,
+                'gzip_bytes': weight.gzip_bytes,
+                'brotli_bytes': weight.brotli_bytes,
+                'source_gzip_bytes': weight.source_gzip_bytes,
+                'source_spans': [span._asdict() for span in weight.source_spans],
+                'dist_spans': [span._asdict() for span in weight.dist_spans],
+            }
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Interned Class Table
+
+Compact representation of which stylesheets define which classes. Every class
+name is interned once and given an integer ID; a set of classes is a Python
+int used as a bitset (bit N set = class N present), and the file x class
+membership matrix is one bitset per file. Unused, duplicate and cross-file
+queries become a handful of big-integer AND/OR/NOT operations that run in C
+over machine words, and class names are only materialized for the (usually
+small) results.
+
+Features:
+- ClassTable: name <-> ID interning, with sys.intern'ed name strings
+- Bitset helpers: mask of names, names of a mask, population count
+- MembershipMatrix: per-file rows, union of all rows, classes defined in more
+  than one file, per-file differences against a mask, and column lookups
+"""
+
+import sys
+from collections import deque
+from itertools import compress, count, repeat
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Binary digits of a mask mapped to 0/1 flags for itertools.compress
+_DIGIT_FLAGS = bytes.maketrans(b'01', b'\x00\x01')
+_ONE = ord('1')
+
+
+def popcount(mask: int) -> int:
+    """Number of classes in a mask."""
+    return bin(mask).count('1')
+
+
+def bit_flags(mask: int) -> bytes:
+    """One 0/1 byte per bit of a mask, lowest bit first."""
+    return format(mask, 'b').encode('ascii')[::-1].translate(_DIGIT_FLAGS)
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Yield the set bit positions of a mask in ascending order."""
+    return compress(count(), bit_flags(mask))
+
+
+def from_ids(ids: Iterable[int]) -> int:
+    """Bitset with the given bits set.
+
+    The bits are written as ASCII digits into a buffer and parsed by int(),
+    which keeps the per-ID work in C instead of one big-integer shift per ID.
+    """
+    ids = list(ids)
+    if not ids:
+        return 0
+    digits = bytearray(b'0') * (max(ids) + 1)
+    deque(map(digits.__setitem__, ids, repeat(_ONE)), maxlen=0)
+    return int(digits[::-1], 2)
+
+
+class ClassTable:
+    __slots__ = ('ids', 'names')
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.ids
+
+    def intern(self, name: str) -> int:
+        """Return the ID of a class name, assigning the next ID on first sight."""
+        class_id = self.ids.get(name)
+        if class_id is None:
+            class_id = self.ids[name] = len(self.names)
+            self.names.append(sys.intern(name))
+        return class_id
+
+    def intern_all(self, names: Iterable[str]) -> List[int]:
+        """IDs of several names, interning the new ones in one batch."""
+        names = list(names)
+        ids = self.ids
+        new_names = set(names).difference(ids)
+        if new_names:
+            # First-seen order keeps IDs deterministic
+            new_names = list(dict.fromkeys(filter(new_names.__contains__, names)))
+            ids.update(zip(new_names, range(len(self.names), len(self.names) + len(new_names))))
+            self.names.extend(map(sys.intern, new_names))
+        return list(map(ids.__getitem__, names))
+
+    def mask(self, names: Iterable[str], add: bool = True) -> int:
+        """Bitset of the given names; unknown names are interned, or skipped if add is False."""
+        if add:
+            ids = self.intern_all(names)
+        else:
+            ids = [class_id for class_id in map(self.ids.get, names) if class_id is not None]
+        return from_ids(ids)
+
+    def names_of(self, mask: int) -> List[str]:
+        """Class names of a bitset, in ID order."""
+        return list(compress(self.names, bit_flags(mask)))
+
+
+class MembershipMatrix:
+    __slots__ = ('table', 'files', 'rows', 'defined', 'shared')
+
+    def __init__(self, table: ClassTable):
+        self.table = table
+        self.files: List[str] = []
+        self.rows: List[int] = []
+        self.defined = 0  # classes in at least one row
+        self.shared = 0   # classes in at least two rows
+
+    def add_row(self, file_path: str, row: int) -> None:
+        """Record the class bitset of one file."""
+        self.files.append(file_path)
+        self.rows.append(row)
+        self.shared |= self.defined & row
+        self.defined |= row
+
+    def differences(self, mask: int) -> Iterator[Tuple[str, int]]:
+        """Yield (file, row AND NOT mask) for every file with classes outside mask."""
+        keep = ~mask
+        for file_path, row in zip(self.files, self.rows):
+            rest = row & keep
+            if rest:
+                yield file_path, rest
+
+    def files_with(self, name: str) -> List[str]:
+        """Files whose row contains a class (one column of the matrix)."""
+        class_id = self.table.ids.get(name)
+        if class_id is None:
+            return []
+        bit = 1 << class_id
+        return [file_path for file_path, row in zip(self.files, self.rows) if row & bit]
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Component Import Graph
+
+Module graph of the JSX/JS sources under src/, read from their import
+statements, and the order in which the bundler emits the stylesheets those
+modules import. The class scan (jsx_class_extractor.py) says which classes a
+file uses; this graph says which files make up a component and which
+stylesheets reach the page, so class usage can be attributed to components.
+
+Features:
+- Static (`import X from './X'`), side-effect (`import './x.css'`) and dynamic
+  (`lazy(() => import('./X'))`) imports, resolved the way Vite does
+  (.jsx/.js extensions, index files, `/src/...` paths from the project root)
+- Component names from import bindings, so 1-StudyOverview.jsx is found as
+  StudyOverview
+- Entry points (routes) from the <script type="module"> tags of the root
+  HTML files
+- Modules reachable from an entry point, optionally stopping at a boundary,
+  and the modules that import a module, directly or not
+- Stylesheet order of an entry: CSS imports in module evaluation order, with
+  local @import rules expanded in place
+"""
+
+import os
+import re
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+import css_parser
+from jsx_class_extractor import SOURCE_EXTENSIONS, find_source_files
+
+# Data structures
+ModuleImport = namedtuple('ModuleImport', ['specifier', 'binding', 'target', 'dynamic', 'line_number'])
+
+IMPORT_PATTERN = re.compile(
+    r'^[ \t]*import\s+(?:([\w$]+)\s*,?\s*)?(?:\*\s*as\s+[\w$]+\s*|\{[^}]*\}\s*)?(?:from\s*)?'
+    r'([\'"])([^\'"\n]+)\2',
+    re.MULTILINE
+)
+DYNAMIC_IMPORT_PATTERN = re.compile(
+    r'(?:\b(?:const|let|var)\s+([\w$]+)\s*=[^;\n]*?)?\bimport\(\s*([\'"])([^\'"\n]+)\2\s*\)'
+)
+CSS_IMPORT_PATTERN = re.compile(r'@import\s+(?:url\(\s*)?(?:([\'"])(.*?)\1|([^\'")\s;]+))', re.IGNORECASE)
+NUMBERED_PREFIX_PATTERN = re.compile(r'^[\d.]+-')
+MODULE_SCRIPT_PATTERN = re.compile(
+    r'<script\b(?=[^>]*\btype=["\']module["\'])[^>]*\bsrc=["\']([^"\']+)["\']', re.IGNORECASE
+)
+
+# Extensions tried, in order, for extensionless specifiers
+RESOLVE_EXTENSIONS = SOURCE_EXTENSIONS
+INDEX_FILES = tuple(f'index{extension}' for extension in SOURCE_EXTENSIONS)
+
+
+def parse_imports(source: str) -> List[ModuleImport]:
+    """Import statements and dynamic imports of a module, in source order (targets unresolved)."""
+    imports = []
+    for pattern, dynamic in ((IMPORT_PATTERN, False), (DYNAMIC_IMPORT_PATTERN, True)):
+        for match in pattern.finditer(source):
+            line_number = source.count('\n', 0, match.start(3)) + 1
+            imports.append((match.start(3), ModuleImport(match.group(3), match.group(1), None, dynamic, line_number)))
+    return [module_import for _, module_import in sorted(imports)]
+
+
+def is_external(specifier: str) -> bool:
+    """True for package imports and absolute URLs, which are not files of the project."""
+    return not specifier.startswith(('.', '/')) or specifier.startswith('//')
+
+
+def html_entries(base_path: Union[str, Path]) -> Dict[str, str]:
+    """Entry module of each root HTML page, e.g. {'scrolly.html': 'src/scrolly/main.jsx'}."""
+    base_path = Path(base_path)
+    entries = {}
+    for html_file in sorted(base_path.glob('*.html')):
+        try:
+            html = html_file.read_text(encoding='utf-8', errors='replace')
+        except OSError as e:
+            print(f"Error reading {html_file.name}: {e}")
+            continue
+        for src in MODULE_SCRIPT_PATTERN.findall(html):
+            module = Path(os.path.normpath(base_path / src.split('?', 1)[0].lstrip('/')))
+            if module.is_file() and module.suffix in SOURCE_EXTENSIONS:
+                entries[html_file.name] = str(module.relative_to(base_path))
+                break
+    return entries
+
+
+def component_name(rel_path: str) -> str:
+    """Fallback component name of a module: its file name without the section number."""
+    return NUMBERED_PREFIX_PATTERN.sub('', Path(rel_path).stem)
+
+
+class ComponentGraph:
+    def __init__(self, base_path: Union[str, Path]):
+        self.base_path = Path(base_path)
+        self.imports: Dict[str, List[ModuleImport]] = {}  # module -> imports in source order
+        self.names: Dict[str, str] = {}  # module -> component name
+        self._css_imports: Dict[str, List[str]] = {}
+        self._importers: Optional[Dict[str, List[str]]] = None
+
+    def resolve(self, importer: str, specifier: str) -> Optional[str]:
+        """Relative path of the file an import specifier refers to, or None."""
+        if is_external(specifier):
+            return None
+        specifier = specifier.split('?', 1)[0]
+        if specifier.startswith('/'):
+            candidate = self.base_path / specifier.lstrip('/')
+        else:
+            candidate = self.base_path / Path(importer).parent / specifier
+        candidate = Path(os.path.normpath(candidate))
+        options = [candidate]
+        if candidate.suffix not in SOURCE_EXTENSIONS + ('.css',):
+            options += [candidate.with_name(candidate.name + extension) for extension in RESOLVE_EXTENSIONS]
+            options += [candidate / index for index in INDEX_FILES]
+        for option in options:
+            if option.is_file():
+                try:
+                    return str(option.relative_to(self.base_path))
+                except ValueError:
+                    return None
+        return None
+
+    def build(self, files: Optional[Iterable[Path]] = None) -> 'ComponentGraph':
+        """Read and resolve the imports of every source file."""
+        if files is None:
+            files = find_source_files(self.base_path)
+        self._importers = None
+        for file_path in files:
+            rel_path = str(Path(file_path).relative_to(self.base_path))
+            try:
+                source = Path(file_path).read_text(encoding='utf-8', errors='replace')
+            except OSError as e:
+                print(f"Error reading {rel_path}: {e}")
+                continue
+            self.imports[rel_path] = [
+                module_import._replace(target=self.resolve(rel_path, module_import.specifier))
+                for module_import in parse_imports(source)
+            ]
+
+        for module_imports in self.imports.values():
+            for module_import in module_imports:
+                if module_import.binding and module_import.target in self.imports:
+                    self.names.setdefault(module_import.target, module_import.binding)
+        for rel_path in self.imports:
+            self.names.setdefault(rel_path, component_name(rel_path))
+        return self
+
+    def name(self, module: str) -> str:
+        """Component name of a module."""
+        return self.names.get(module, component_name(module))
+
+    def find(self, name: str) -> Optional[str]:
+        """Module of a component given by import name, file name or relative path."""
+        if name in self.imports:
+            return name
+        for matches in (
+            lambda module: self.names[module] == name,
+            lambda module: Path(module).stem == name,
+            lambda module: component_name(module) == name,
+        ):
+            found = sorted(module for module in self.imports if matches(module))
+            if found:
+                return found[0]
+        return None
+
+    def dependencies(self, module: str) -> List[str]:
+        """JS/JSX modules imported by a module, in import order."""
+        return [
+            module_import.target for module_import in self.imports.get(module, ())
+            if module_import.target in self.imports
+        ]
+
+    def reachable(self, entry: str, boundary: Iterable[str] = ()) -> List[str]:
+        """Modules reachable from entry in depth-first import order, not entering boundary modules."""
+        boundary = set(boundary) - {entry}
+        seen: Set[str] = set()
+        order = []
+        stack = [entry]
+        while stack:
+            module = stack.pop()
+            if module in seen or module in boundary:
+                continue
+            seen.add(module)
+            order.append(module)
+            stack.extend(reversed(self.dependencies(module)))
+        return order
+
+    def importers(self, module: str) -> List[str]:
+        """Every module that imports module, directly or through other modules."""
+        if self._importers is None:
+            self._importers = {}
+            for importer in self.imports:
+                for dependency in self.dependencies(importer):
+                    self._importers.setdefault(dependency, []).append(importer)
+        direct = self._importers
+        seen: Set[str] = set()
+        pending = list(direct.get(module, ()))
+        while pending:
+            importer = pending.pop()
+            if importer not in seen:
+                seen.add(importer)
+                pending.extend(direct.get(importer, ()))
+        seen.discard(module)
+        return sorted(seen)
+
+    def _stylesheet_imports(self, stylesheet: str) -> List[str]:
+        """Local stylesheets pulled in by the @import rules of a stylesheet."""
+        if stylesheet not in self._css_imports:
+            imports = []
+            try:
+                sheet = css_parser.parse_css_file(self.base_path / stylesheet)
+            except OSError as e:
+                print(f"Error reading {stylesheet}: {e}")
+                sheet = None
+            for at_rule in (sheet.at_rules if sheet else ()):
+                match = CSS_IMPORT_PATTERN.match(at_rule.prelude) if at_rule.name == 'import' else None
+                target = self.resolve(stylesheet, match.group(2) or match.group(3)) if match else None
+                if target and target.endswith('.css'):
+                    imports.append(target)
+            self._css_imports[stylesheet] = imports
+        return self._css_imports[stylesheet]
+
+    def stylesheet_order(self, entry: str, importers: Optional[Dict[str, str]] = None) -> List[str]:
+        """Stylesheets of an entry point in the order the bundle emits them.
+
+        Modules are evaluated depth first, so a module's imports come before
+        the CSS it imports after them; an @import is replaced by the imported
+        stylesheet, which therefore precedes the rules of the importing one.
+        If importers is given, it is filled with the module or stylesheet
+        whose import places each stylesheet in the bundle.
+        """
+        order: List[str] = []
+        visited: Set[str] = set()
+
+        def add_stylesheet(stylesheet: str, importer: str) -> None:
+            if stylesheet in visited:
+                return
+            visited.add(stylesheet)
+            if importers is not None:
+                importers[stylesheet] = importer
+            for imported in self._stylesheet_imports(stylesheet):
+                add_stylesheet(imported, stylesheet)
+            order.append(stylesheet)
+
+        def visit(module: str) -> None:
+            visited.add(module)
+            for module_import in self.imports.get(module, ()):
+                target = module_import.target
+                if not target or target in visited:
+                    continue
+                if target.endswith('.css'):
+                    add_stylesheet(target, module)
+                elif target in self.imports:
+                    visit(target)
+
+        visit(entry)
+        return order
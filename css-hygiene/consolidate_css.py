@@ -0,0 +1,577 @@
+#!/usr/bin/env python3
+"""
+Duplicate Rule Consolidation
+
+Auto-fix for the identical duplicates listed by css_duplicate_analyzer.py:
+rules written out identically in several stylesheets of one bundle are
+hoisted into one generated shared stylesheet, the copies are deleted and the
+shared stylesheet is imported next to the last (or the first) stylesheet that
+held a copy, whichever lets more rules move. The stylesheets are read in
+bundle order (component_graph.py), so every move is checked against the
+cascade before it is made.
+
+Features:
+- Identical means the same selector list, at-rule context and declarations
+  once comments and insignificant whitespace are ignored
+- A rule's copies all lose to its last copy, so the rule is effectively at
+  that position; moving it is skipped if any other rule in between sets one
+  of its properties (shorthands and longhands count as the same property)
+  with a selector of the same specificity, since one element can carry the
+  classes of both rules. Only @media print against @media screen counts as
+  context that never applies together
+- Copies in stylesheets also bundled by another page are left alone
+- Reruns append to the existing shared stylesheet, at its place in the bundle
+- Removes @media/@supports blocks left empty by the deletions
+- Bundle size before and after, raw and gzip-compressed
+- --dry-run prints a unified diff and the byte savings without writing
+"""
+
+import math
+import os
+import re
+from collections import defaultdict, namedtuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import css_parser
+import profiling
+from byte_weights import gzip_size
+from component_graph import CSS_IMPORT_PATTERN, ComponentGraph, html_entries
+from css_units import GLOBAL, RULE, declarations, render_units, stylesheet_units
+from near_duplicates import DECLARATION_PATTERN
+from purge_css import DEFAULT_ENTRY, minify_css, minify_selector
+from remove_unused_css import Edit, _line_span, apply_edits, atomic_write, deletion_edits, unified_diff
+
+# Data structures
+RuleGroup = namedtuple('RuleGroup', ['selector', 'context', 'copies', 'position', 'status', 'reason'])
+Copy = namedtuple('Copy', ['file_path', 'line_number'])
+
+DEFAULT_SHARED = 'src/styles/shared/consolidated.css'
+SHARED_HEADER = (
+    "/*\n"
+    " * Consolidated Rules\n"
+    " * Rules that were written identically in several stylesheets, hoisted by\n"
+    " * css-hygiene/consolidate_css.py. Edit them here.\n"
+    " */\n"
+)
+
+HOISTED, SKIPPED = 'hoisted', 'skipped'
+
+# Where hoisted rules land in the bundle
+EXISTING = 'existing'  # appended to the shared stylesheet, already bundled
+AFTER = 'after'        # new shared stylesheet imported after the last stylesheet holding a copy
+BEFORE = 'before'      # new shared stylesheet imported before the first one
+
+# Properties set by a shorthand whose name does not share the longhand's first word
+PROPERTY_FAMILIES = {
+    'line-height': 'font', 'top': 'inset', 'right': 'inset', 'bottom': 'inset', 'left': 'inset',
+    'row-gap': 'gap', 'column-gap': 'gap', 'grid-gap': 'gap',
+    'align-items': 'place', 'align-content': 'place', 'align-self': 'place',
+    'justify-items': 'place', 'justify-content': 'place', 'justify-self': 'place',
+}
+
+# Pseudo-classes whose specificity is that of their most specific argument (:where() adds none)
+SELECTOR_ARGUMENT_PSEUDOS = ('not', 'is', 'has', 'matches', '-webkit-any', '-moz-any')
+# Pseudo-elements that may be written with a single colon
+LEGACY_PSEUDO_ELEMENTS = ('before', 'after', 'first-line', 'first-letter')
+
+IDENT_PATTERN = re.compile(r'(?:\\.|[\w-]|[^\x00-\x7f])+')
+MEDIA_TYPE_PATTERN = re.compile(r'@media\s+(?:only\s+)?(print|screen)\s*(?:$|and\b)', re.IGNORECASE)
+
+
+def property_family(name: str) -> str:
+    """Family of a property for conflict checks: margin-top and margin are both 'margin'."""
+    name = name.strip().lower()
+    if name.startswith('--'):
+        return name
+    if name.startswith('-') and name.count('-') > 1:
+        name = name.split('-', 2)[2]  # vendor prefix
+    return PROPERTY_FAMILIES.get(name, name.split('-', 1)[0])
+
+
+def _closing(text: str, pos: int) -> int:
+    """Offset just past the quote, bracket or parenthesis closing the one at text[pos]."""
+    if text[pos] in '"\'':
+        end = text.find(text[pos], pos + 1)
+        return len(text) if end == -1 else end + 1
+    depth = 0
+    while pos < len(text):
+        char = text[pos]
+        if char in '"\'':
+            pos = _closing(text, pos)
+            continue
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        pos += 1
+    return pos
+
+
+def split_selector_list(text: str) -> List[str]:
+    """Top-level members of a selector list."""
+    parts = []
+    start = pos = 0
+    while pos < len(text):
+        char = text[pos]
+        if char in '(["\'':
+            pos = _closing(text, pos)
+            continue
+        if char == ',':
+            parts.append(text[start:pos])
+            start = pos + 1
+        pos += 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def specificity(selector: str) -> Tuple[int, int, int]:
+    """(ids, classes/attributes/pseudo-classes, types/pseudo-elements) of one complex selector."""
+    a = b = c = 0
+    pos = 0
+    while pos < len(selector):
+        char = selector[pos]
+        if char in '"\'':
+            pos = _closing(selector, pos)
+        elif char == '[':
+            b += 1
+            pos = _closing(selector, pos)
+        elif char in '#.:':
+            pseudo_element = selector.startswith('::', pos)
+            match = IDENT_PATTERN.match(selector, pos + (2 if pseudo_element else 1))
+            name = match.group().lower() if match else ''
+            pos = match.end() if match else pos + 1
+            argument = None
+            if selector.startswith('(', pos):
+                end = _closing(selector, pos)
+                argument = selector[pos + 1:end - 1]
+                pos = end
+            if char == '#':
+                a += 1
+            elif char == '.':
+                b += 1
+            elif pseudo_element or name in LEGACY_PSEUDO_ELEMENTS:
+                c += 1
+            elif name in SELECTOR_ARGUMENT_PSEUDOS and argument is not None:
+                scores = [specificity(part) for part in split_selector_list(argument)]
+                if scores:
+                    top = max(scores)
+                    a, b, c = a + top[0], b + top[1], c + top[2]
+            elif name != 'where':
+                b += 1
+        else:
+            match = IDENT_PATTERN.match(selector, pos)
+            if match:
+                c += 1  # type selector
+                pos = match.end()
+            else:
+                pos += 1
+    return a, b, c
+
+
+def selector_specificities(unit) -> Set[Tuple[int, int, int]]:
+    """Specificities of the members of a style rule's selector list."""
+    selector_list = unit.text.split('{', 1)[0]
+    return {specificity(selector) for selector in split_selector_list(selector_list)}
+
+
+def exclusive_contexts(context: Tuple[str, ...], other: Tuple[str, ...]) -> bool:
+    """True if two at-rule contexts never apply together: @media print against @media screen."""
+    types = [{match.group(1).lower() for match in map(MEDIA_TYPE_PATTERN.match, contexts) if match}
+             for contexts in (context, other)]
+    return all(types) and not types[0] & types[1]
+
+
+def unit_properties(unit) -> Set[str]:
+    """Property families a unit's declarations (nested rules included) set."""
+    families = set()
+    for match in DECLARATION_PATTERN.finditer(declarations(unit)):
+        name, colon, value = match.group().partition(':')
+        if colon and name.strip() and value.strip():
+            families.add(property_family(name))
+    return families
+
+
+def import_statement(importer: str, stylesheet: str) -> str:
+    """Statement importing stylesheet from importer (a stylesheet or a JS module)."""
+    specifier = os.path.relpath(stylesheet, os.path.dirname(importer)).replace(os.sep, '/')
+    if not specifier.startswith('.'):
+        specifier = './' + specifier
+    return f"@import '{specifier}';\n" if importer.endswith('.css') else f"import '{specifier}'\n"
+
+
+class CSSConsolidator:
+    def __init__(self, session, entry: str = DEFAULT_ENTRY, shared: str = DEFAULT_SHARED, dry_run: bool = False):
+        self.session = session
+        self.base_path = session.base_path
+        self.entry = entry
+        self.shared = shared
+        self.dry_run = dry_run
+        self.stylesheets: List[str] = []
+        self.groups: List[RuleGroup] = []
+        self.placement = EXISTING
+        self.changes: Dict[str, Tuple[bytes, bytes]] = {}  # file -> (before, after)
+        self.bundle_size = self.bundle_gzip_size = 0
+        self.new_bundle_size = self.new_bundle_gzip_size = 0
+        self._sheets: Dict[str, css_parser.Stylesheet] = {}
+        self._units = []
+        self._bounds: Dict[str, Tuple[int, int]] = {}  # stylesheet -> (first unit position, end position)
+        self._importers: Dict[str, str] = {}
+        self._properties: Dict[int, Set[str]] = {}
+        self._specificities: Dict[int, Set[Tuple[int, int, int]]] = {}
+
+    def analyze(self) -> None:
+        """Find identical duplicate rules of the entry's bundle and plan the moves that keep the cascade."""
+        print(f"🧬 Consolidating identical rules in the stylesheets of {self.entry}...")
+        with profiling.phase('graph'):
+            graph = ComponentGraph(self.base_path).build()
+        if self.entry not in graph.imports:
+            raise ValueError(f"Entry point {self.entry} is not a JS/JSX file under src/")
+        self.stylesheets = graph.stylesheet_order(self.entry, self._importers)
+        if self.shared not in self.stylesheets and (self.base_path / self.shared).exists():
+            raise ValueError(f"{self.shared} exists but is not bundled by {self.entry}; "
+                             f"import it or consolidate into another file")
+
+        # Stylesheets other pages bundle too cannot lose rules to this bundle's shared sheet
+        other_pages = {}
+        for page, entry in html_entries(self.base_path).items():
+            if entry != self.entry and entry in graph.imports:
+                for stylesheet in graph.stylesheet_order(entry):
+                    other_pages.setdefault(stylesheet, page)
+
+        units = self._units
+        with profiling.phase('parse', files=len(self.stylesheets)):
+            for stylesheet in self.stylesheets:
+                try:
+                    sheet = css_parser.parse_css_file(self.base_path / stylesheet, self.session.time_budget)
+                except Exception as e:
+                    print(f"Error processing {stylesheet}: {e}")
+                    continue
+                self._sheets[stylesheet] = sheet
+                first = len(units)
+                units.extend(stylesheet_units(sheet, stylesheet))
+                self._bounds[stylesheet] = (first, len(units))
+
+        with profiling.phase('group'):
+            by_key = defaultdict(list)
+            for position, unit in enumerate(units):
+                if unit.kind == RULE:
+                    key = (tuple(map(minify_selector, unit.context)), minify_css(unit.text))
+                    by_key[key].append(position)
+            candidates = [positions for positions in by_key.values()
+                          if len({units[position].file_path for position in positions}) > 1]
+            candidates.sort(key=lambda positions: positions[-1])
+
+        with profiling.phase('cascade'):
+            for position, unit in enumerate(units):
+                if unit.kind in (RULE, GLOBAL) and not unit.text.lstrip().startswith('@'):
+                    self._properties[position] = unit_properties(unit)
+                    self._specificities[position] = selector_specificities(unit)
+
+            shared_pages: Dict[int, str] = {}
+            for index, positions in enumerate(candidates):
+                page = next((other_pages[units[position].file_path] for position in positions
+                             if units[position].file_path in other_pages), None)
+                if page:
+                    shared_pages[index] = f"also bundled by {page}"
+
+            # A new shared stylesheet goes before the first or after the last stylesheet
+            # holding a copy, whichever moves more rules
+            placements = (EXISTING,) if self.shared in self._bounds else (AFTER, BEFORE)
+            outcomes = []
+            for placement in placements:
+                skipped = self._settle(candidates, placement, dict(shared_pages))
+                outcomes.append((len(skipped), placements.index(placement), placement, skipped))
+            _, _, self.placement, skipped = min(outcomes)
+
+        for index, positions in enumerate(candidates):
+            unit = units[positions[-1]]
+            copies = tuple(Copy(units[position].file_path, self._line(units[position])) for position in positions)
+            status = SKIPPED if index in skipped else HOISTED
+            self.groups.append(RuleGroup(self._selector(unit), unit.context, copies, positions[-1],
+                                         status, skipped.get(index, '')))
+
+        accepted = [candidates[index] for index in range(len(candidates)) if index not in skipped]
+        with profiling.phase('edit'):
+            self._plan_edits(accepted)
+            if accepted and self.placement != EXISTING:
+                self._add_import(accepted, graph)
+
+        sheets = self._sheets
+        before = b'\n'.join(sheet.data for sheet in sheets.values())
+        after = b'\n'.join(self.changes.get(stylesheet, (None, sheet.data))[1] for stylesheet, sheet in sheets.items())
+        if self.shared not in sheets and self.shared in self.changes:
+            after += b'\n' + self.changes[self.shared][1]
+        self.bundle_size, self.bundle_gzip_size = len(before), gzip_size(before)
+        self.new_bundle_size, self.new_bundle_gzip_size = len(after), gzip_size(after)
+        print(f"   {len(accepted)} of {len(candidates)} identical rules can be hoisted, "
+              f"bundle {self.size_change(self.bundle_size, self.new_bundle_size)}")
+
+    def _settle(self, candidates, placement, skipped: Dict[int, str]) -> Dict[int, str]:
+        """Skip candidates until every remaining move keeps the cascade; returns {candidate: reason}."""
+        units = self._units
+        # Rejecting a candidate leaves its copies in place, where they can block others
+        while True:
+            accepted = [index for index in range(len(candidates)) if index not in skipped]
+            if not accepted:
+                return skipped
+            moving = {position for index in accepted for position in candidates[index]}
+            anchor = self._anchor([candidates[index] for index in accepted], placement)
+            rejected = False
+            for index in accepted:
+                positions = candidates[index]
+                blocker = self._blocker(positions, self._target(positions, anchor), moving)
+                if blocker is not None:
+                    unit = units[blocker]
+                    skipped[index] = f"would change the cascade against {unit.file_path}:{self._line(unit)}"
+                    rejected = True
+            if rejected:
+                continue
+
+            # Moved rules keep their order among themselves unless the shared sheet already holds one
+            order = sorted(accepted, key=lambda index: (self._target(candidates[index], anchor), candidates[index][-1]))
+            for before, index in enumerate(order):
+                last = candidates[index][-1]
+                for other in order[before + 1:]:
+                    if candidates[other][-1] < last and self._conflicts(last, candidates[other][-1]):
+                        skipped[other] = f"would change the cascade against {self._selector(units[last])}"
+                        rejected = True
+            if not rejected:
+                return skipped
+
+    def _holder(self, groups, placement) -> str:
+        """First (BEFORE) or last (AFTER) stylesheet of the bundle holding a copy of a group."""
+        bounds = self._bounds
+        if placement == BEFORE:
+            return min((self._units[positions[0]].file_path for positions in groups), key=lambda path: bounds[path][0])
+        return max((self._units[positions[-1]].file_path for positions in groups), key=lambda path: bounds[path][1])
+
+    def _anchor(self, groups, placement) -> float:
+        """Bundle position of the rules added to the shared stylesheet."""
+        bounds = self._bounds
+        if placement == EXISTING:
+            return bounds[self.shared][1] - 0.5
+        holder = self._holder(groups, placement)
+        if placement == AFTER:
+            return bounds[holder][1] - 0.5
+        # Imported just before the holder, so before the stylesheets the holder itself imports
+        first = bounds[holder][0]
+        for stylesheet, (start, _) in bounds.items():
+            importer = self._importers.get(stylesheet)
+            while importer in self._importers and importer != holder:
+                importer = self._importers[importer]
+            if importer == holder:
+                first = min(first, start)
+        return first - 0.5
+
+    def _target(self, positions, anchor) -> float:
+        """Position a group's rule ends up at: its copy in the shared stylesheet, else the anchor."""
+        for position in positions:
+            if self._units[position].file_path == self.shared:
+                return position
+        return anchor
+
+    def _conflicts(self, position: int, other: int) -> bool:
+        """True if two rules set a common property and their order may decide which one wins.
+
+        Any two rules may match the same element, which can carry both rules'
+        classes; only a difference in specificity between every pair of their
+        selectors settles the cascade without the order.
+        """
+        if not self._properties[position] & self._properties[other]:
+            return False
+        if exclusive_contexts(self._units[position].context, self._units[other].context):
+            return False
+        return bool(self._specificities[position] & self._specificities[other])
+
+    def _blocker(self, positions, target, moving) -> Optional[int]:
+        """First rule between a group's effective and new position that could override it or be overridden."""
+        last = positions[-1]
+        low, high = min(target, last), max(target, last)
+        for position in range(math.floor(low) + 1, math.ceil(high)):
+            if position in self._properties and position not in moving and self._conflicts(last, position):
+                return position
+        return None
+
+    def _line(self, unit) -> int:
+        return self._sheets[unit.file_path].data.count(b'\n', 0, unit.start) + 1
+
+    @staticmethod
+    def _selector(unit) -> str:
+        return ', '.join(selector for selector, _ in unit.parts)
+
+    def _plan_edits(self, groups) -> None:
+        """Compute the new content of every stylesheet that loses copies and of the shared one."""
+        units, sheets = self._units, self._sheets
+        deletions = defaultdict(list)
+        hoisted = []
+        for positions in groups:
+            for position in positions:
+                unit = units[position]
+                if unit.file_path != self.shared:
+                    start, end = _line_span(sheets[unit.file_path].data, unit.start, unit.end)
+                    deletions[unit.file_path].append(Edit(start, end, b''))
+            if not any(units[position].file_path == self.shared for position in positions):
+                hoisted.append(units[positions[-1]])
+
+        for stylesheet, edits in deletions.items():
+            data = sheets[stylesheet].data
+            self.changes[stylesheet] = (data, apply_edits(data, deletion_edits(sheets[stylesheet], edits)))
+
+        if not hoisted:
+            return
+        current = sheets[self.shared].data if self.shared in sheets else b''
+        added = render_units(hoisted).encode('utf-8')
+        if not current:
+            content = SHARED_HEADER.encode('utf-8') + b'\n' + added
+        else:
+            content = current.rstrip(b'\n') + b'\n\n' + added
+        self.changes[self.shared] = (current, content)
+
+    def _add_import(self, groups, graph) -> None:
+        """Import the shared stylesheet next to the statement that imports the holder."""
+        holder = self._holder(groups, self.placement)
+        importer = self._importers[holder]
+        statement = import_statement(importer, self.shared).encode('utf-8')
+        if importer in self.changes:
+            original, data = self.changes[importer]
+        elif importer in self._sheets:
+            original = data = self._sheets[importer].data
+        else:
+            original = data = (self.base_path / importer).read_bytes()
+
+        if importer.endswith('.css'):
+            sheet = css_parser.parse_css(data, self.base_path / importer)
+            spans = []
+            for at_rule in sheet.at_rules:
+                match = CSS_IMPORT_PATTERN.match(at_rule.prelude) if at_rule.name == 'import' else None
+                if match and graph.resolve(importer, match.group(2) or match.group(3)) == holder:
+                    spans.append((at_rule.start, at_rule.end))
+        else:
+            line_starts = [0] + [index + 1 for index, byte in enumerate(data) if byte == 10]
+            spans = [(line_starts[module_import.line_number - 1], line_starts[module_import.line_number - 1])
+                     for module_import in graph.imports[importer] if module_import.target == holder]
+        if not spans:
+            print(f"⚠️  Could not find the import of {holder} in {importer}; import {self.shared} by hand")
+            return
+
+        # On its own line, before or after the line of the import statement
+        start, end = spans[0]
+        if self.placement == BEFORE:
+            offset = data.rfind(b'\n', 0, start) + 1
+        else:
+            offset = data.find(b'\n', end)
+            offset = len(data) if offset == -1 else offset + 1
+            if offset == len(data) and not data.endswith(b'\n'):
+                statement = b'\n' + statement
+        self.changes[importer] = (original, data[:offset] + statement + data[offset:])
+
+    def apply(self) -> None:
+        """Write the planned changes (or print them as a diff with dry_run)."""
+        for rel_path, (before, after) in self.changes.items():
+            if self.dry_run:
+                print(unified_diff(rel_path, before, after), end='')
+                continue
+            file_path = self.base_path / rel_path
+            if file_path.exists():
+                atomic_write(file_path, after)
+            else:
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                file_path.write_bytes(after)
+
+    def hoisted(self) -> List[RuleGroup]:
+        """Groups whose copies were consolidated."""
+        return [group for group in self.groups if group.status == HOISTED]
+
+    def skipped(self) -> List[RuleGroup]:
+        """Groups left in place, with the reason."""
+        return [group for group in self.groups if group.status == SKIPPED]
+
+    @staticmethod
+    def size_change(before: int, after: int) -> str:
+        """Change from before to after as 'N bytes smaller' or 'N bytes larger', with its percentage."""
+        if before == after:
+            return "unchanged"
+        direction = 'smaller' if after < before else 'larger'
+        percent = f" ({abs(after - before) / before * 100:.1f}%)" if before else ""
+        return f"{abs(after - before):,} bytes {direction}{percent}"
+
+    def _group_lines(self, group: RuleGroup) -> Iterator[str]:
+        context = ' > '.join(group.context)
+        yield f"{group.selector}" + (f"  [{context}]" if context else '')
+        for copy in group.copies:
+            yield f"    {copy.file_path}:{copy.line_number}"
+        if group.reason:
+            yield f"    skipped: {group.reason}"
+
+    def iter_report_lines(self) -> Iterator[str]:
+        """Yield the lines of the consolidation report one at a time."""
+        hoisted, skipped = self.hoisted(), self.skipped()
+        yield from [
+            "=" * 80,
+            "DUPLICATE RULE CONSOLIDATION REPORT" + (" (DRY RUN)" if self.dry_run else ""),
+            "=" * 80,
+            "",
+            f"Analysis completed on: {self.base_path}",
+            f"Entry point: {self.entry}",
+            f"Stylesheets: {len(self.stylesheets)}",
+            f"Shared stylesheet: {self.shared}",
+            "",
+            f"Identical rules in several stylesheets: {len(self.groups)}",
+            f"Hoisted: {len(hoisted)} ({sum(len(group.copies) for group in hoisted)} copies)",
+            f"Skipped: {len(skipped)}",
+            "",
+            "BUNDLE SIZE:",
+            f"{'':<10}  {'Raw':>10}  {'gzip':>9}",
+            f"{'Before':<10}  {self.bundle_size:>10,}  {self.bundle_gzip_size:>9,}",
+            f"{'After':<10}  {self.new_bundle_size:>10,}  {self.new_bundle_gzip_size:>9,}",
+            "",
+            f"Bundle size change: {self.size_change(self.bundle_size, self.new_bundle_size)} raw, "
+            f"{self.size_change(self.bundle_gzip_size, self.new_bundle_gzip_size)} gzip",
+            "",
+            "CHANGED FILES:",
+        ]
+        for rel_path, (before, after) in self.changes.items():
+            yield f"  - {rel_path} ({len(after) - len(before):+,} bytes)"
+        yield from ["", "HOISTED RULES:", "-" * 80]
+        for group in hoisted:
+            yield from self._group_lines(group)
+        yield from ["", "SKIPPED RULES:", "-" * 80]
+        for group in skipped:
+            yield from self._group_lines(group)
+
+    def generate_report(self) -> str:
+        """Generate the consolidation report."""
+        return '\n'.join(self.iter_report_lines())
+
+    def report_summary(self) -> dict:
+        """Summary statistics for the structured report formats."""
+        hoisted = self.hoisted()
+        return {
+            'report': 'consolidated-css',
+            'entry': self.entry,
+            'shared': self.shared,
+            'dry_run': self.dry_run,
+            'stylesheets': len(self.stylesheets),
+            'duplicate_rules': len(self.groups),
+            'hoisted_rules': len(hoisted),
+            'removed_copies': sum(len(group.copies) for group in hoisted),
+            'bundle_bytes': self.bundle_size,
+            'bundle_gzip_bytes': self.bundle_gzip_size,
+            'new_bundle_bytes': self.new_bundle_size,
+            'new_bundle_gzip_bytes': self.new_bundle_gzip_size,
+            'changed_files': sorted(self.changes),
+        }
+
+    def iter_report_records(self) -> Iterator[dict]:
+        """Yield one record per group of identical rules."""
+        for group in self.groups:
+            yield {
+                'type': 'rule',
+                'selector': group.selector,
+                'context': list(group.context),
+                'status': group.status,
+                'reason': group.reason,
+                'copies': [{'file': copy.file_path, 'line': copy.line_number} for copy in group.copies],
+            }
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Critical CSS Extraction
+
+Splits the stylesheets of an entry point into a small critical stylesheet for
+the components visible at first paint and deferred chunks for the rest of the
+page. Every JSX/JS module is attributed to a chunk through the component
+import graph (component_graph.py), the classes each module uses come from the
+JSX usage scan, and every rule of the bundle goes to the first chunk whose
+components can match it. The critical CSS is meant to be inlined in a
+<style> tag; the deferred chunks are loaded without blocking rendering.
+
+Chunks, in load order:
+- critical: the entry, the modules on the import path to the critical
+  components (the App shell) and the critical components themselves
+  (default: Banner, Header, StudyOverview); also every rule without classes
+  (element, :root and @font-face rules)
+- shared: rules needed by more than one deferred section
+- one chunk per section: each component imported by a critical module,
+  with everything it imports (e.g. HeatwaveCompositeChart, KeyFindings)
+- remainder: rules no reachable component uses (unused classes or classes
+  only listed in safelist.txt), kept so nothing is lost
+
+Features:
+- A selector list part is matched when every class it requires is used by
+  the chunk's components or by the critical components
+- Dynamic class prefixes and suffixes of a module count for its chunk
+- @keyframes go to the first chunk whose rules name the animation
+- Rules keep their bundle order and @media/@supports blocks are re-opened
+  around them inside each chunk
+- Writes critical.css, critical.html (inline <style> plus non-blocking
+  <link> tags for the deferred chunks) and one .css file per chunk
+- Raw and gzip sizes of every chunk against the full bundle
+
+Splitting changes the order in which rules reach the page, so two rules of
+equal specificity in different chunks can cascade differently than in the
+single bundle; the report lists the chunk of every rule to review such cases.
+"""
+
+import re
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Set, Union
+
+import css_parser
+import profiling
+from byte_weights import gzip_size
+from component_graph import ComponentGraph
+from css_units import GLOBAL, IMPORT, KEYFRAMES, RULE, declarations, render_units, stylesheet_units
+from safelist import Safelist, inferred_patterns
+
+# Data structures
+Chunk = namedtuple('Chunk', ['name', 'kind', 'root', 'modules', 'units', 'text', 'size', 'gzip_size'])
+
+DEFAULT_ENTRY = 'src/main.jsx'
+DEFAULT_CRITICAL = ('Banner', 'Header', 'StudyOverview')
+
+# Chunk kinds, in load order
+CRITICAL, SHARED, SECTION, REMAINDER = 'critical', 'shared', 'section', 'remainder'
+
+CRITICAL_HTML = 'critical.html'
+CAMEL_BOUNDARY_PATTERN = re.compile(r'(?<=[a-z0-9])(?=[A-Z])')
+
+
+def chunk_file_name(name: str) -> str:
+    """File name of a chunk: the component name in kebab case."""
+    return re.sub(r'[^\w-]+', '-', CAMEL_BOUNDARY_PATTERN.sub('-', name)).strip('-').lower() + '.css'
+
+
+class CriticalCSSAnalyzer:
+    def __init__(self, session, entry: str = DEFAULT_ENTRY, critical: Sequence[str] = DEFAULT_CRITICAL):
+        self.session = session
+        self.base_path = session.base_path
+        self.entry = entry
+        self.critical = tuple(critical)
+        self.graph = None
+        self.stylesheets: List[str] = []
+        self.bundle_size = 0
+        self.bundle_gzip_size = 0
+        self.chunks: List[Chunk] = []
+        self.missing: List[str] = []
+
+    def _critical_modules(self) -> List[str]:
+        """The entry, the critical components and every module on an import path between them."""
+        reachable = self.graph.reachable(self.entry)
+        components = []
+        for name in self.critical:
+            module = self.graph.find(name)
+            if module is None or module not in reachable:
+                self.missing.append(name)
+            else:
+                components.append(module)
+
+        importers: Dict[str, List[str]] = {}
+        for module in reachable:
+            for dependency in self.graph.dependencies(module):
+                importers.setdefault(dependency, []).append(module)
+        critical = {self.entry}
+        pending = list(components)
+        while pending:
+            module = pending.pop()
+            if module not in critical:
+                critical.add(module)
+                pending.extend(importers.get(module, ()))
+        return [module for module in reachable if module in critical]
+
+    def _sections(self, critical: List[str]) -> List[Chunk]:
+        """One chunk per non-critical component imported by a critical module."""
+        critical_set = set(critical)
+        roots = []
+        for module in critical:
+            for dependency in self.graph.dependencies(module):
+                if dependency not in critical_set and dependency not in roots:
+                    roots.append(dependency)
+        return [
+            Chunk(self.graph.name(root), SECTION, root, self.graph.reachable(root, critical_set), [], '', 0, 0)
+            for root in roots
+        ]
+
+    def _bundle_units(self) -> list:
+        """Units of every stylesheet of the entry, in bundle order."""
+        units = []
+        for stylesheet in self.stylesheets:
+            try:
+                sheet = css_parser.parse_css_file(self.base_path / stylesheet, self.session.time_budget)
+            except Exception as e:
+                print(f"Error processing {stylesheet}: {e}")
+                continue
+            units.extend(stylesheet_units(sheet, stylesheet))
+        return units
+
+    def analyze(self) -> None:
+        """Attribute every rule of the entry's stylesheets to a chunk."""
+        print(f"✂️  Extracting critical CSS for {', '.join(self.critical)} ({self.entry})...")
+        with profiling.phase('graph'):
+            self.graph = ComponentGraph(self.base_path).build()
+        if self.entry not in self.graph.imports:
+            raise ValueError(f"Entry point {self.entry} is not a JS/JSX file under src/")
+        self.stylesheets = self.graph.stylesheet_order(self.entry)
+
+        source_classes = self.session.source_classes()
+        dynamic_classes = self.session.dynamic_classes()
+        critical = self._critical_modules()
+        chunks = [Chunk(CRITICAL, CRITICAL, self.entry, critical, [], '', 0, 0)]
+        chunks += [Chunk(SHARED, SHARED, None, [], [], '', 0, 0)]
+        chunks += self._sections(critical)
+        chunks += [Chunk(REMAINDER, REMAINDER, None, [], [], '', 0, 0)]
+        shared_index, remainder_index = 1, len(chunks) - 1
+
+        # Classes and dynamic-class patterns available to each chunk
+        chunk_classes = [set().union(*(source_classes.get(module, ()) for module in chunk.modules))
+                         for chunk in chunks]
+        chunk_patterns = [Safelist(inferred_patterns({module: dynamic_classes[module] for module in chunk.modules
+                                                      if module in dynamic_classes}))
+                          for chunk in chunks]
+        providers: Dict[str, Set[int]] = {}
+
+        def providers_of(class_name: str) -> Set[int]:
+            found = providers.get(class_name)
+            if found is None:
+                found = providers[class_name] = {
+                    index for index, classes in enumerate(chunk_classes)
+                    if class_name in classes or chunk_patterns[index].match(class_name) is not None
+                }
+            return found
+
+        def needed_by(unit) -> Set[int]:
+            """Chunks (0 = critical) in which some selector part of a rule can match."""
+            needed = set()
+            for _, classes in unit.parts:
+                # Classes of the critical components are on the page for every chunk
+                deferred = [providers_of(name) for name in classes if 0 not in providers_of(name)]
+                if not deferred:
+                    return {0}
+                needed |= set.intersection(*deferred)
+            return needed
+
+        with profiling.phase('split'):
+            units = self._bundle_units()
+            assigned: List[List] = [[] for _ in chunks]
+            keyframes = []
+            for unit in units:
+                if unit.kind in (GLOBAL, IMPORT):
+                    index = 0
+                elif unit.kind == KEYFRAMES:
+                    keyframes.append(unit)
+                    continue
+                else:
+                    needed = needed_by(unit) - {shared_index, remainder_index}
+                    if 0 in needed:
+                        index = 0
+                    elif len(needed) == 1:
+                        index = needed.pop()
+                    else:
+                        index = shared_index if needed else remainder_index
+                assigned[index].append(unit)
+
+            # An animation is defined in the first chunk, in load order, whose rules use it
+            names = {unit.name for unit in keyframes if unit.name}
+            first_use: Dict[str, int] = {}
+            if names:
+                name_pattern = re.compile(r'(?<![\w-])(' + '|'.join(map(re.escape, sorted(names))) + r')(?![\w-])')
+                for index, chunk_units in enumerate(assigned):
+                    for unit in chunk_units:
+                        if unit.kind == RULE or unit.kind == GLOBAL:
+                            for name in name_pattern.findall(declarations(unit)):
+                                first_use.setdefault(name, index)
+            for unit in keyframes:
+                assigned[first_use.get(unit.name, remainder_index)].append(unit)
+
+        order = {(unit.file_path, unit.start): position for position, unit in enumerate(units)}
+        self.chunks = []
+        for chunk, chunk_units in zip(chunks, assigned):
+            # External @import rules must come first; everything else keeps bundle order
+            chunk_units.sort(key=lambda unit: (unit.kind != IMPORT, order[(unit.file_path, unit.start)]))
+            text = render_units(chunk_units)
+            data = text.encode('utf-8')
+            self.chunks.append(chunk._replace(units=chunk_units, text=text, size=len(data),
+                                              gzip_size=gzip_size(data) if data else 0))
+
+        bundle = render_units(units).encode('utf-8')
+        self.bundle_size = len(bundle)
+        self.bundle_gzip_size = gzip_size(bundle)
+        for name in self.missing:
+            print(f"   Warning: component {name} is not reachable from {self.entry}")
+        print(f"   {len(units)} rules from {len(self.stylesheets)} stylesheets in "
+              f"{sum(1 for chunk in self.chunks if chunk.units)} chunks; critical CSS "
+              f"{self.chunks[0].size:,} of {self.bundle_size:,} bytes")
+
+    def deferred_chunks(self) -> List[Chunk]:
+        """Chunks loaded after first paint, in load order."""
+        return [chunk for chunk in self.chunks[1:] if chunk.units]
+
+    def write_chunks(self, output_dir: Union[str, Path]) -> Path:
+        """Write critical.css, critical.html and the deferred chunks; return the directory."""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for chunk in self.chunks:
+            if chunk.units or chunk.kind == CRITICAL:
+                (output_dir / chunk_file_name(chunk.name)).write_text(chunk.text, encoding='utf-8')
+
+        # Deferred chunks are fetched as preloads and applied once loaded, without blocking rendering
+        lines = ['<style>', self.chunks[0].text.rstrip('\n'), '</style>']
+        for chunk in self.deferred_chunks():
+            href = chunk_file_name(chunk.name)
+            lines.append(f'<link rel="preload" href="{href}" as="style" '
+                         f'onload="this.onload=null;this.rel=\'stylesheet\'">')
+        lines.append('<noscript>')
+        lines.extend(f'<link rel="stylesheet" href="{chunk_file_name(chunk.name)}">'
+                     for chunk in self.deferred_chunks())
+        lines.append('</noscript>')
+        (output_dir / CRITICAL_HTML).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        return output_dir
+
+    def _percent(self, size: int, total: int) -> str:
+        return f"{size / total * 100:.1f}%" if total else "n/a"
+
+    def iter_report_lines(self) -> Iterator[str]:
+        """Yield the lines of the critical CSS report one at a time."""
+        critical = self.chunks[0] if self.chunks else None
+        yield from [
+            "=" * 80,
+            "CRITICAL CSS REPORT",
+            "=" * 80,
+            "",
+            f"Analysis completed on: {self.base_path}",
+            f"Entry point: {self.entry}",
+            f"Critical components: {', '.join(self.critical)}",
+            f"Stylesheets in the bundle: {len(self.stylesheets)}",
+            "",
+            "RENDER-BLOCKING CSS:",
+            f"- Before (whole bundle): {self.bundle_size:,} bytes ({self.bundle_gzip_size:,} gzip)",
+        ]
+        if critical:
+            yield (f"- After (critical.css inlined): {critical.size:,} bytes ({critical.gzip_size:,} gzip), "
+                   f"{self._percent(critical.size, self.bundle_size)} of the bundle")
+        if self.missing:
+            yield f"- Critical components not found from the entry: {', '.join(self.missing)}"
+        yield ""
+        yield "CHUNKS (in load order):"
+        yield "-" * 80
+        yield f"{'Chunk':<36}  {'Rules':>6}  {'Bytes':>9}  {'gzip':>8}"
+        for chunk in self.chunks:
+            if chunk.units or chunk.kind == CRITICAL:
+                yield (f"{chunk_file_name(chunk.name):<36}  {len(chunk.units):>6}  "
+                       f"{chunk.size:>9,}  {chunk.gzip_size:>8,}")
+        yield ""
+
+        for chunk in self.chunks:
+            if not chunk.units:
+                continue
+            yield f"{chunk_file_name(chunk.name).upper()} ({chunk.kind}): {len(chunk.units)} rules"
+            yield "-" * 80
+            if chunk.modules:
+                yield f"  Components: {', '.join(self.graph.name(module) for module in chunk.modules)}"
+            for unit in chunk.units:
+                label = unit.name if unit.kind in (KEYFRAMES, IMPORT) else ', '.join(
+                    selector for selector, _ in unit.parts) or unit.text.split('{', 1)[0].strip()
+                yield f"  {unit.file_path}  {'@keyframes ' if unit.kind == KEYFRAMES else ''}{label}"
+            yield ""
+
+    def generate_report(self) -> str:
+        """Generate the critical CSS report."""
+        return '\n'.join(self.iter_report_lines())
+
+    def report_summary(self) -> dict:
+        """Summary statistics for the structured report formats."""
+        critical = self.chunks[0] if self.chunks else None
+        return {
+            'report': 'critical-css',
+            'entry': self.entry,
+            'critical_components': list(self.critical),
+            'missing_components': self.missing,
+            'stylesheets': len(self.stylesheets),
+            'bundle_bytes': self.bundle_size,
+            'bundle_gzip_bytes': self.bundle_gzip_size,
+            'critical_bytes': critical.size if critical else 0,
+            'critical_gzip_bytes': critical.gzip_size if critical else 0,
+            'chunks': [
+                {'file': chunk_file_name(chunk.name), 'kind': chunk.kind, 'rules': len(chunk.units),
+                 'bytes': chunk.size, 'gzip_bytes': chunk.gzip_size}
+                for chunk in self.chunks if chunk.units or chunk.kind == CRITICAL
+            ],
+        }
+
+    def iter_report_records(self) -> Iterator[dict]:
+        """Yield one record per rule with the chunk it was assigned to."""
+        for chunk in self.chunks:
+            for unit in chunk.units:
+                yield {
+                    'type': unit.kind,
+                    'chunk': chunk_file_name(chunk.name),
+                    'file': unit.file_path,
+                    'selectors': [selector for selector, _ in unit.parts],
+                    'name': unit.name,
+                    'context': list(unit.context),
+                    'bytes': len(unit.text.encode('utf-8')),
+                }
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+CSS Dependency Graph
+
+Links every JSX component to the rules and stylesheets it actually uses and
+suggests how to split the CSS into per-route and per-lazy-chart bundles. The
+other tools only glob src/ for stylesheets; this graph combines the component
+import graph (component_graph.py), the classes each module uses (the JSX
+usage scan) and the rules of every stylesheet (css_units.py).
+
+A selector list part belongs to a component when the component uses one of
+its classes and every other class the part requires is used within the
+component's scope: its own subtree or the components that import it. So
+`.container .chart-title` belongs to the chart that uses chart-title inside
+App's .container.
+
+Features:
+- Per component: the rules, stylesheets and bytes it uses, including shared
+  pattern files such as styles/patterns/card-patterns.css
+- Routes from the root HTML pages (index.html -> src/main.jsx,
+  scrolly.html -> src/scrolly/main.jsx)
+- Suggested split per route: a route bundle with the global rules and the
+  rules of the eagerly loaded components, one bundle per lazy chart
+  (dynamically imported modules and, by default, every component under
+  src/components/charts/), a bundle of the rules several lazy charts share
+  (loaded with the first of them) and the bytes no component of the route uses
+- Raw and gzip sizes of every suggested bundle against what the route
+  downloads today
+- Stylesheets that no route imports
+- JSON export of the whole graph (css-dependency-graph.json)
+"""
+
+import json
+import re
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterator, List, Optional, Sequence, Set, Union
+
+import css_parser
+import profiling
+from byte_weights import find_css_files, gzip_size
+from component_graph import ComponentGraph, html_entries
+from critical_css import chunk_file_name
+from css_units import GLOBAL, IMPORT, KEYFRAMES, declarations, render_units, stylesheet_units
+from safelist import Safelist, inferred_patterns
+
+# Data structures
+ComponentStyles = namedtuple('ComponentStyles', ['module', 'name', 'units', 'stylesheets'])
+Bundle = namedtuple('Bundle', ['name', 'kind', 'root', 'modules', 'units', 'size', 'gzip_size'])
+RouteSplit = namedtuple('RouteSplit', ['page', 'entry', 'stylesheets', 'current_size', 'current_gzip_size',
+                                       'bundles', 'unused_units', 'unused_size'])
+
+DEFAULT_ENTRY = 'src/main.jsx'
+GRAPH_FILE = 'css-dependency-graph.json'
+
+# Every component here is listed, even without rules
+COMPONENTS_DIR = 'src/components/'
+# Components split into their own bundle unless --lazy names others
+LAZY_CHART_DIR = 'src/components/charts/'
+
+# Bundle kinds
+ROUTE, LAZY_SHARED, LAZY = 'route', 'lazy-shared', 'lazy'
+
+
+def _size(units) -> tuple:
+    """Raw and gzip size of units written out as one stylesheet."""
+    data = render_units(units).encode('utf-8')
+    return len(data), gzip_size(data) if data else 0
+
+
+def _label(unit) -> str:
+    """Selector list, animation name or statement of a unit, for reports."""
+    if unit.kind == KEYFRAMES:
+        return f"@keyframes {unit.name}"
+    if unit.kind == IMPORT:
+        return f"@import {unit.name}"
+    if unit.parts:
+        return ', '.join(selector for selector, _ in unit.parts)
+    return ' '.join(unit.text.split('{', 1)[0].split())
+
+
+class CSSDependencyAnalyzer:
+    def __init__(self, session, lazy: Optional[Sequence[str]] = None):
+        self.session = session
+        self.base_path = session.base_path
+        self.lazy = tuple(lazy) if lazy is not None else None
+        self.graph = None
+        self.routes: Dict[str, str] = {}  # HTML page -> entry module
+        self.units: Dict[str, list] = {}  # stylesheet -> units in source order
+        self.lines: Dict[tuple, int] = {}  # (stylesheet, offset) -> line number
+        self.users: Dict[tuple, FrozenSet[str]] = {}  # (stylesheet, offset) -> modules using the unit
+        self.global_units: Set[tuple] = set()
+        self.components: List[ComponentStyles] = []
+        self.splits: List[RouteSplit] = []
+        self.orphans: List[str] = []
+        self.missing: List[str] = []
+
+    def _parse_stylesheets(self) -> None:
+        """Units of every stylesheet under src/."""
+        for file_path in find_css_files(self.base_path / 'src'):
+            stylesheet = str(file_path.relative_to(self.base_path))
+            try:
+                sheet = css_parser.parse_css_file(file_path, self.session.time_budget)
+            except Exception as e:
+                print(f"Error processing {stylesheet}: {e}")
+                continue
+            lines = css_parser.LineIndex(sheet.data)
+            self.units[stylesheet] = stylesheet_units(sheet, stylesheet)
+            for unit in self.units[stylesheet]:
+                self.lines[(stylesheet, unit.start)] = lines.line(unit.start)
+
+    def _attribute(self) -> None:
+        """Find the modules that use each unit."""
+        source_classes = self.session.source_classes()
+        patterns = {module: Safelist(inferred_patterns({module: dynamic}))
+                    for module, dynamic in self.session.dynamic_classes().items()}
+        providers: Dict[str, FrozenSet[str]] = {}
+        scopes: Dict[str, Set[str]] = {}
+
+        def providers_of(class_name: str) -> FrozenSet[str]:
+            found = providers.get(class_name)
+            if found is None:
+                found = providers[class_name] = frozenset(
+                    module for module in self.graph.imports
+                    if class_name in source_classes.get(module, ())
+                    or (module in patterns and patterns[module].match(class_name) is not None)
+                )
+            return found
+
+        def scope(module: str) -> Set[str]:
+            if module not in scopes:
+                scopes[module] = set(self.graph.reachable(module)) | set(self.graph.importers(module))
+            return scopes[module]
+
+        keyframes = []
+        for stylesheet, units in self.units.items():
+            for unit in units:
+                key = (stylesheet, unit.start)
+                if unit.kind in (GLOBAL, IMPORT):
+                    self.global_units.add(key)
+                    continue
+                if unit.kind == KEYFRAMES:
+                    keyframes.append((key, unit))
+                    continue
+                users = set()
+                for _, classes in unit.parts:
+                    if not classes:
+                        self.global_units.add(key)
+                        continue
+                    class_providers = [providers_of(name) for name in classes]
+                    for module in frozenset().union(*class_providers):
+                        module_scope = scope(module)
+                        if all(not module_scope.isdisjoint(found) for found in class_providers):
+                            users.add(module)
+                self.users[key] = frozenset(users)
+
+        # An animation is used by whoever uses a rule naming it
+        names = {unit.name for _, unit in keyframes if unit.name}
+        if names:
+            name_pattern = re.compile(r'(?<![\w-])(' + '|'.join(map(re.escape, sorted(names))) + r')(?![\w-])')
+            animation_users: Dict[str, Set[str]] = {}
+            global_animations = set()
+            for stylesheet, units in self.units.items():
+                for unit in units:
+                    if unit.kind == KEYFRAMES:
+                        continue
+                    key = (stylesheet, unit.start)
+                    for name in name_pattern.findall(declarations(unit)):
+                        animation_users.setdefault(name, set()).update(self.users.get(key, ()))
+                        if key in self.global_units:
+                            global_animations.add(name)
+            for key, unit in keyframes:
+                self.users[key] = frozenset(animation_users.get(unit.name, ()))
+                if unit.name in global_animations:
+                    self.global_units.add(key)
+
+    def _components(self) -> List[ComponentStyles]:
+        """Rules and stylesheets used by every component, in module path order."""
+        by_module: Dict[str, list] = {}
+        for stylesheet, units in self.units.items():
+            for unit in units:
+                for module in self.users.get((stylesheet, unit.start), ()):
+                    by_module.setdefault(module, []).append(unit)
+
+        components = []
+        for module in sorted(self.graph.imports):
+            units = by_module.get(module, [])
+            if not units and not module.startswith(COMPONENTS_DIR):
+                continue
+            stylesheets: Dict[str, List[int]] = {}
+            for unit in units:
+                totals = stylesheets.setdefault(unit.file_path, [0, 0])
+                totals[0] += 1
+                totals[1] += len(unit.text.encode('utf-8'))
+            components.append(ComponentStyles(
+                module, self.graph.name(module), units,
+                {stylesheet: tuple(totals) for stylesheet, totals in stylesheets.items()}
+            ))
+        return components
+
+    def _lazy_roots(self, modules: List[str]) -> List[str]:
+        """Modules of a route that get their own bundle."""
+        module_set = set(modules)
+        roots = [
+            module_import.target for module in modules for module_import in self.graph.imports[module]
+            if module_import.dynamic and module_import.target in module_set
+        ]
+        if self.lazy is None:
+            roots += [module for module in modules if module.startswith(LAZY_CHART_DIR)]
+        else:
+            for name in self.lazy:
+                module = self.graph.find(name)
+                if module is None:
+                    if name not in self.missing:
+                        self.missing.append(name)
+                elif module in module_set:
+                    roots.append(module)
+        return list(dict.fromkeys(roots))
+
+    def _split(self, page: str, entry: str) -> RouteSplit:
+        """Suggest the route and lazy-chart bundles of one route."""
+        stylesheets = self.graph.stylesheet_order(entry)
+        route_units = [unit for stylesheet in stylesheets for unit in self.units.get(stylesheet, ())]
+        modules = self.graph.reachable(entry)
+        lazy_roots = [root for root in self._lazy_roots(modules) if root != entry]
+        eager = set(self.graph.reachable(entry, lazy_roots))
+        lazy_modules = {root: set(self.graph.reachable(root, eager)) for root in lazy_roots}
+
+        eager_units = []
+        shared_units = []
+        lazy_units: Dict[str, list] = {root: [] for root in lazy_roots}
+        unused = []
+        for unit in route_units:
+            key = (unit.file_path, unit.start)
+            users = self.users.get(key, frozenset())
+            if key in self.global_units or not users.isdisjoint(eager):
+                eager_units.append(unit)
+                continue
+            roots = [root for root in lazy_roots if not users.isdisjoint(lazy_modules[root])]
+            if len(roots) == 1:
+                lazy_units[roots[0]].append(unit)
+            elif roots:
+                shared_units.append(unit)
+            else:
+                unused.append(unit)
+
+        bundles = [Bundle(f"{Path(page).stem}.css", ROUTE, entry, sorted(eager), eager_units, *_size(eager_units))]
+        if shared_units:
+            shared_modules = sorted(set().union(*lazy_modules.values()))
+            bundles.append(Bundle(f"{Path(page).stem}-lazy-shared.css", LAZY_SHARED, None, shared_modules,
+                                  shared_units, *_size(shared_units)))
+        for root in lazy_roots:
+            if lazy_units[root]:
+                bundles.append(Bundle(chunk_file_name(self.graph.name(root)), LAZY, root,
+                                      sorted(lazy_modules[root]), lazy_units[root], *_size(lazy_units[root])))
+        current_size, current_gzip_size = _size(route_units)
+        return RouteSplit(page, entry, stylesheets, current_size, current_gzip_size,
+                          bundles, unused, _size(unused)[0])
+
+    def analyze(self) -> None:
+        """Build the component/stylesheet graph and the suggested split of every route."""
+        print("🕸️  Building the component/stylesheet dependency graph...")
+        with profiling.phase('graph'):
+            self.graph = ComponentGraph(self.base_path).build()
+        self.routes = html_entries(self.base_path)
+        if not self.routes and DEFAULT_ENTRY in self.graph.imports:
+            self.routes = {'index.html': DEFAULT_ENTRY}
+        with profiling.phase('stylesheets'):
+            self._parse_stylesheets()
+        with profiling.phase('attribute'):
+            self._attribute()
+            self.components = self._components()
+        with profiling.phase('split'):
+            self.splits = [self._split(page, entry) for page, entry in self.routes.items()
+                           if entry in self.graph.imports]
+
+        routed = {stylesheet for split in self.splits for stylesheet in split.stylesheets}
+        self.orphans = sorted(stylesheet for stylesheet in self.units if stylesheet not in routed)
+        for name in self.missing:
+            print(f"   Warning: lazy component {name} not found")
+        print(f"   {len(self.components)} components, {len(self.units)} stylesheets, {len(self.splits)} routes")
+
+    def to_dict(self) -> dict:
+        """The whole graph as JSON-serializable data."""
+        stylesheet_users: Dict[str, Set[str]] = {}
+        for component in self.components:
+            for stylesheet in component.stylesheets:
+                stylesheet_users.setdefault(stylesheet, set()).add(component.module)
+        return {
+            'routes': {
+                split.page: {
+                    'entry': split.entry,
+                    'stylesheets': split.stylesheets,
+                    'current_bytes': split.current_size,
+                    'current_gzip_bytes': split.current_gzip_size,
+                    'unused_rules': len(split.unused_units),
+                    'unused_bytes': split.unused_size,
+                    'bundles': [
+                        {'file': bundle.name, 'kind': bundle.kind, 'root': bundle.root, 'modules': bundle.modules,
+                         'rules': len(bundle.units), 'bytes': bundle.size, 'gzip_bytes': bundle.gzip_size}
+                        for bundle in split.bundles
+                    ],
+                } for split in self.splits
+            },
+            'components': {
+                component.module: {
+                    'name': component.name,
+                    'imports': self.graph.dependencies(component.module),
+                    'stylesheets': {
+                        stylesheet: {'rules': rules, 'bytes': size}
+                        for stylesheet, (rules, size) in sorted(component.stylesheets.items())
+                    },
+                    'rules': [
+                        {'file': unit.file_path, 'line': self.lines[(unit.file_path, unit.start)],
+                         'selector': _label(unit)}
+                        for unit in component.units
+                    ],
+                } for component in self.components
+            },
+            'stylesheets': {
+                stylesheet: {
+                    'rules': len(units),
+                    'bytes': sum(len(unit.text.encode('utf-8')) for unit in units),
+                    'used_by': sorted(stylesheet_users.get(stylesheet, ())),
+                    'routes': [split.page for split in self.splits if stylesheet in split.stylesheets],
+                } for stylesheet, units in self.units.items()
+            },
+        }
+
+    def write_graph(self, output_file: Union[str, Path]) -> Path:
+        """Export the graph as JSON."""
+        output_file = Path(output_file)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write('\n')
+        return output_file
+
+    def iter_report_lines(self) -> Iterator[str]:
+        """Yield the lines of the dependency report one at a time."""
+        yield from [
+            "=" * 80,
+            "CSS DEPENDENCY GRAPH REPORT",
+            "=" * 80,
+            "",
+            f"Analysis completed on: {self.base_path}",
+            f"Components: {len(self.components)}",
+            f"Stylesheets: {len(self.units)}",
+            f"Routes: {', '.join(f'{split.page} ({split.entry})' for split in self.splits)}",
+            "",
+        ]
+        for split in self.splits:
+            route_bundle = split.bundles[0]
+            yield f"ROUTE {split.page} ({split.entry}):"
+            yield "-" * 80
+            yield (f"  Downloaded today: {len(split.stylesheets)} stylesheets, {split.current_size:,} bytes "
+                   f"({split.current_gzip_size:,} gzip)")
+            yield (f"  Suggested route bundle: {route_bundle.size:,} bytes ({route_bundle.gzip_size:,} gzip), "
+                   f"saving {split.current_size - route_bundle.size:,} bytes on first load")
+            yield f"  Not used by any component of the route: {len(split.unused_units)} rules, {split.unused_size:,} bytes"
+            yield ""
+            yield f"  {'Bundle':<40}  {'Kind':<11}  {'Rules':>6}  {'Bytes':>9}  {'gzip':>8}"
+            for bundle in split.bundles:
+                yield (f"  {bundle.name:<40}  {bundle.kind:<11}  {len(bundle.units):>6}  "
+                       f"{bundle.size:>9,}  {bundle.gzip_size:>8,}")
+            yield ""
+
+        yield f"STYLESHEETS NOT IMPORTED BY ANY ROUTE: {len(self.orphans)}"
+        yield "-" * 80
+        yield from (f"  {stylesheet}" for stylesheet in self.orphans)
+        yield ""
+
+        yield "COMPONENTS:"
+        yield "-" * 80
+        for component in self.components:
+            size = sum(size for _, size in component.stylesheets.values())
+            yield f"{component.name} ({component.module}): {len(component.units)} rules, {size:,} bytes"
+            for stylesheet, (rules, size) in sorted(component.stylesheets.items()):
+                yield f"  {stylesheet}: {rules} rules, {size:,} bytes"
+            yield ""
+
+    def generate_report(self) -> str:
+        """Generate the dependency report."""
+        return '\n'.join(self.iter_report_lines())
+
+    def report_summary(self) -> dict:
+        """Summary statistics for the structured report formats."""
+        return {
+            'report': 'css-dependencies',
+            'components': len(self.components),
+            'stylesheets': len(self.units),
+            'orphan_stylesheets': self.orphans,
+            'routes': {
+                split.page: {
+                    'entry': split.entry,
+                    'current_bytes': split.current_size,
+                    'current_gzip_bytes': split.current_gzip_size,
+                    'route_bytes': split.bundles[0].size,
+                    'route_gzip_bytes': split.bundles[0].gzip_size,
+                    'lazy_bundles': sum(1 for bundle in split.bundles if bundle.kind == LAZY),
+                    'unused_bytes': split.unused_size,
+                } for split in self.splits
+            },
+        }
+
+    def iter_report_records(self) -> Iterator[dict]:
+        """Yield one record per suggested bundle and per component stylesheet."""
+        for split in self.splits:
+            for bundle in split.bundles:
+                yield {
+                    'type': 'bundle',
+                    'route': split.page,
+                    'file': bundle.name,
+                    'kind': bundle.kind,
+                    'root': bundle.root,
+                    'rules': len(bundle.units),
+                    'bytes': bundle.size,
+                    'gzip_bytes': bundle.gzip_size,
+                }
+        for component in self.components:
+            for stylesheet, (rules, size) in sorted(component.stylesheets.items()):
+                yield {
+                    'type': 'dependency',
+                    'component': component.name,
+                    'module': component.module,
+                    'stylesheet': stylesheet,
+                    'rules': rules,
+                    'bytes': size,
+                }
@@ -8,57 +8,46 @@ detailed report.
 
 Features:
 - Scans all CSS files in src/styles/ directory
-- Extracts CSS class definitions using regex patterns
+- Extracts CSS class definitions with the shared single-pass parser (css_parser.py)
 - Handles nested classes, media queries, pseudo-selectors
-- Tracks file locations and line numbers
+- Pairs braces at any depth and records each rule's at-rule context path
+- Bounds per-file parse time (--time-budget) so one bad file cannot hang the report
+- Tracks file locations, line and column numbers
+- Caches per-file results in .css-hygiene-cache/ so reruns only parse changed files
+- Parses files in parallel worker processes (--jobs N)
 - Identifies identical vs different duplicate definitions
-- Generates comprehensive report with statistics
+- --near finds similar rules across all selectors (near_duplicates.py)
+- Generates comprehensive report with statistics, streamed as text, JSON or NDJSON
 """
 
-import os
-import re
-import hashlib
-from collections import defaultdict, namedtuple
+import argparse
+from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Set, Tuple, Optional
+from typing import Iterator, List, Optional
 
-# Data structures
-ClassDefinition = namedtuple('ClassDefinition', ['file_path', 'line_number', 'content', 'content_hash', 'selector'])
+import css_parser
+import profiling
+from class_table import MembershipMatrix
+from git_scope import run_since
+from near_duplicates import DEFAULT_THRESHOLD, NearDuplicateAnalyzer
+from report_writer import FORMATS, output_path_for, write_report
+from session import AnalysisSession, default_base_path
+from stylesheet_summary import StylesheetSummary, summarize_stylesheet
+from watch import DEFAULT_INTERVAL, run_watch
 
 class CSSClassAnalyzer:
-    def __init__(self, base_path: str):
+    def __init__(self, base_path: str, use_cache: bool = True, jobs: Optional[int] = None,
+                 time_budget: Optional[float] = css_parser.DEFAULT_TIME_BUDGET,
+                 session: Optional[AnalysisSession] = None):
         self.base_path = Path(base_path)
+        self.time_budget = time_budget
+        self.session = session or AnalysisSession(base_path, use_cache, jobs, time_budget)
         self.css_files = []
-        self.class_definitions = defaultdict(list)
+        self.summaries: List[StylesheetSummary] = []
+        self.classes = self.session.classes
+        self.matrix = MembershipMatrix(self.classes)  # file x class bitsets
         self.total_classes = 0
         self.duplicate_classes = {}
-        
-        # Comprehensive regex patterns for CSS class extraction
-        self.class_patterns = [
-            # Standard class selectors: .classname
-            r'\.([a-zA-Z_][\w-]*)\s*(?:[,\s{]|$)',
-            
-            # Classes with pseudo-selectors: .classname:hover, .classname::before
-            r'\.([a-zA-Z_][\w-]*):+[\w-]+\s*(?:[,\s{]|$)',
-            
-            # Classes in complex selectors: .parent .child, .class1.class2
-            r'\.([a-zA-Z_][\w-]*)\s*(?=[\s\.,#:\[])',
-            
-            # Classes at the beginning of rules
-            r'^\s*\.([a-zA-Z_][\w-]*)',
-            
-            # Classes after combinators: > .class, + .class, ~ .class
-            r'[>+~]\s*\.([a-zA-Z_][\w-]*)',
-        ]
-        
-        # Compile regex patterns for efficiency
-        self.compiled_patterns = [re.compile(pattern, re.MULTILINE) for pattern in self.class_patterns]
-        
-        # Pattern to extract CSS rule content (class definition to closing brace)
-        self.rule_content_pattern = re.compile(
-            r'(\.[\w\s\-:.,#>+~\[\]="\'()]+)\s*\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}',
-            re.MULTILINE | re.DOTALL
-        )
     
     def find_css_files(self) -> List[Path]:
         """Find all CSS files in the src/styles directory."""
@@ -78,76 +67,34 @@ class CSSClassAnalyzer:
         
         return sorted(css_files)
     
-    def extract_css_content(self, file_path: Path, start_line: int, selector: str) -> str:
-        """Extract the CSS content for a specific selector."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Find the rule that contains this selector
-            for match in self.rule_content_pattern.finditer(content):
-                if selector in match.group(1):
-                    # Return first 200 characters of the rule content
-                    rule_content = match.group(2).strip()
-                    return rule_content[:200] + ('...' if len(rule_content) > 200 else '')
-            
-            return "Content not found"
-            
-        except Exception as e:
-            return f"Error reading content: {str(e)}"
-    
     def parse_css_file(self, file_path: Path) -> None:
         """Parse a CSS file and extract class definitions."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                lines = content.split('\n')
+            summary = summarize_stylesheet(file_path, self.base_path, time_budget=self.time_budget)
         except Exception as e:
             print(f"Error reading {file_path}: {e}")
             return
-        
-        # Track found classes to avoid duplicates from multiple patterns
-        found_classes = set()
-        
-        # Use the comprehensive rule pattern to find complete CSS rules
-        for match in self.rule_content_pattern.finditer(content):
-            selector_part = match.group(1)
-            rule_content = match.group(2)
-            
-            # Extract class names from the selector
-            classes_in_selector = set()
-            for pattern in self.compiled_patterns:
-                for class_match in pattern.finditer(selector_part):
-                    class_name = class_match.group(1)
-                    if class_name and class_name not in found_classes:
-                        classes_in_selector.add(class_name)
-            
-            # For each class found in this rule
-            for class_name in classes_in_selector:
-                if class_name not in found_classes:
-                    found_classes.add(class_name)
-                    
-                    # Find line number
-                    line_number = content[:match.start()].count('\n') + 1
-                    
-                    # Create content hash for duplicate detection
-                    content_hash = hashlib.md5(rule_content.encode()).hexdigest()
-                    
-                    # Store class definition
-                    class_def = ClassDefinition(
-                        file_path=str(file_path.relative_to(self.base_path)),
-                        line_number=line_number,
-                        content=rule_content.strip()[:200] + ('...' if len(rule_content.strip()) > 200 else ''),
-                        content_hash=content_hash,
-                        selector=selector_part.strip()
-                    )
-                    
-                    self.class_definitions[class_name].append(class_def)
-                    self.total_classes += 1
+        self.merge_summary(summary)
+    
+    def merge_summary(self, summary: StylesheetSummary) -> None:
+        """Add the class definitions of one summarized stylesheet."""
+        self.summaries.append(summary)
+        self.matrix.add_row(summary.file_path, self.session.class_row(summary))
+        self.total_classes += len(summary.definitions)
     
     def analyze_duplicates(self) -> None:
         """Analyze class definitions to find duplicates."""
-        for class_name, definitions in self.class_definitions.items():
+        # Classes set in two or more file rows; only their definitions are gathered
+        shared = self.matrix.shared
+        duplicated = set(self.classes.names_of(shared))
+        class_definitions = defaultdict(list)
+        for summary, row in zip(self.summaries, self.matrix.rows):
+            if row & shared:
+                for class_name, class_def in summary.definitions:
+                    if class_name in duplicated:
+                        class_definitions[class_name].append(class_def)
+        
+        for class_name, definitions in class_definitions.items():
             if len(definitions) > 1:
                 # Check if definitions are identical or different
                 unique_hashes = set(defn.content_hash for defn in definitions)
@@ -157,17 +104,15 @@ class CSSClassAnalyzer:
                     'total_occurrences': len(definitions),
                     'unique_definitions': len(unique_hashes),
                     'is_identical': len(unique_hashes) == 1,
-                    'files_involved': list(set(defn.file_path for defn in definitions))
+                    'files_involved': sorted(set(defn.file_path for defn in definitions))
                 }
                 
                 self.duplicate_classes[class_name] = duplicate_info
     
-    def generate_report(self) -> str:
-        """Generate a comprehensive duplicate CSS classes report."""
-        report_lines = []
-        
+    def iter_report_lines(self) -> Iterator[str]:
+        """Yield the lines of the duplicate CSS classes report one at a time."""
         # Header
-        report_lines.extend([
+        yield from [
             "=" * 80,
             "CSS DUPLICATE CLASS ANALYSIS REPORT",
             "=" * 80,
@@ -175,42 +120,42 @@ class CSSClassAnalyzer:
             f"Analysis completed on: {self.base_path}",
             f"Files analyzed: {len(self.css_files)}",
             f"Total CSS classes found: {self.total_classes}",
-            f"Unique class names: {len(self.class_definitions)}",
+            f"Unique class names: {len(self.classes)}",
             f"Classes with duplicates: {len(self.duplicate_classes)}",
             "",
-        ])
+        ]
         
         # Summary statistics
         if self.duplicate_classes:
             identical_duplicates = sum(1 for info in self.duplicate_classes.values() if info['is_identical'])
             different_duplicates = len(self.duplicate_classes) - identical_duplicates
             
-            report_lines.extend([
+            yield from [
                 "SUMMARY STATISTICS:",
                 "-" * 40,
                 f"Classes with identical duplicates: {identical_duplicates}",
                 f"Classes with different duplicates: {different_duplicates}",
                 f"Total duplicate occurrences: {sum(info['total_occurrences'] for info in self.duplicate_classes.values())}",
                 "",
-            ])
+            ]
         
         # Files analyzed
-        report_lines.extend([
+        yield from [
             "FILES ANALYZED:",
             "-" * 40,
-        ])
+        ]
         for css_file in self.css_files:
             relative_path = css_file.relative_to(self.base_path)
-            report_lines.append(f"  - {relative_path}")
-        report_lines.append("")
+            yield f"  - {relative_path}"
+        yield ""
         
         # Detailed duplicate analysis
         if self.duplicate_classes:
-            report_lines.extend([
+            yield from [
                 "DETAILED DUPLICATE ANALYSIS:",
                 "=" * 50,
                 "",
-            ])
+            ]
             
             # Sort by number of occurrences (most duplicated first)
             sorted_duplicates = sorted(
@@ -220,7 +165,7 @@ class CSSClassAnalyzer:
             )
             
             for class_name, info in sorted_duplicates:
-                report_lines.extend([
+                yield from [
                     f"CLASS: .{class_name}",
                     "-" * (len(class_name) + 8),
                     f"Total occurrences: {info['total_occurrences']}",
@@ -228,143 +173,218 @@ class CSSClassAnalyzer:
                     f"Status: {'IDENTICAL' if info['is_identical'] else 'DIFFERENT'} duplicates",
                     f"Files involved: {', '.join(info['files_involved'])}",
                     "",
-                ])
+                ]
                 
                 # Show each definition
                 for i, defn in enumerate(info['definitions'], 1):
-                    report_lines.extend([
+                    yield from [
                         f"  Definition #{i}:",
                         f"    File: {defn.file_path}",
-                        f"    Line: {defn.line_number}",
+                        f"    Line: {defn.line_number}, Column: {defn.column_number}",
                         f"    Selector: {defn.selector}",
+                        f"    Context: {' > '.join(defn.context) or '(top level)'}",
                         f"    Content preview:",
-                    ])
+                    ]
                     
                     # Format CSS content preview
                     content_lines = defn.content.split('\n')
                     for line in content_lines[:5]:  # Show first 5 lines
                         if line.strip():
-                            report_lines.append(f"      {line.strip()}")
+                            yield f"      {line.strip()}"
                     
                     if len(content_lines) > 5:
-                        report_lines.append("      ...")
+                        yield "      ..."
                     
-                    report_lines.append("")
+                    yield ""
                 
-                report_lines.append("-" * 60)
-                report_lines.append("")
+                yield "-" * 60
+                yield ""
         
         else:
-            report_lines.extend([
+            yield from [
                 "NO DUPLICATE CLASSES FOUND!",
                 "",
                 "This is excellent - your CSS codebase has no duplicate class definitions.",
                 "All class names are unique across your stylesheets.",
                 "",
-            ])
+            ]
         
         # Recommendations
         if self.duplicate_classes:
-            report_lines.extend([
+            yield from [
                 "",
                 "RECOMMENDATIONS:",
                 "=" * 30,
                 "",
-            ])
+            ]
             
             identical_count = sum(1 for info in self.duplicate_classes.values() if info['is_identical'])
             different_count = len(self.duplicate_classes) - identical_count
             
             if identical_count > 0:
-                report_lines.extend([
+                yield from [
                     f"1. CONSOLIDATION OPPORTUNITIES ({identical_count} classes):",
                     "   - These classes have identical definitions across multiple files",
                     "   - Consider moving them to a shared/common CSS file",
                     "   - Remove duplicates to reduce bundle size and improve maintainability",
+                    "   - `css_hygiene.py consolidate` hoists identical rules where the cascade allows",
                     "",
-                ])
+                ]
             
             if different_count > 0:
-                report_lines.extend([
+                yield from [
                     f"2. POTENTIAL CONFLICTS ({different_count} classes):",
                     "   - These classes have different definitions with the same name",
                     "   - Review for unintended style conflicts",
                     "   - Consider renaming classes to be more specific",
                     "   - Check CSS specificity and cascade order",
                     "",
-                ])
+                ]
             
-            report_lines.extend([
+            yield from [
                 "3. GENERAL RECOMMENDATIONS:",
                 "   - Use consistent naming conventions (BEM methodology recommended)",
                 "   - Organize CSS into logical modules/components",
                 "   - Consider CSS-in-JS or CSS modules for component isolation",
                 "   - Implement CSS linting rules to prevent future duplicates",
                 "",
-            ])
+            ]
         
         # Footer
-        report_lines.extend([
+        yield from [
             "=" * 80,
             "End of CSS Duplicate Analysis Report",
             "=" * 80,
-        ])
-        
-        return '\n'.join(report_lines)
+        ]
     
-    def run_analysis(self) -> str:
-        """Run the complete CSS duplicate analysis."""
+    def generate_report(self) -> str:
+        """Generate a comprehensive duplicate CSS classes report."""
+        return '\n'.join(self.iter_report_lines())
+    
+    def report_summary(self) -> dict:
+        """Summary statistics for the structured report formats."""
+        identical = sum(1 for info in self.duplicate_classes.values() if info['is_identical'])
+        return {
+            'report': 'duplicate-css-classes',
+            'files_analyzed': len(self.css_files),
+            'total_classes': self.total_classes,
+            'unique_class_names': len(self.classes),
+            'classes_with_duplicates': len(self.duplicate_classes),
+            'identical_duplicates': identical,
+            'different_duplicates': len(self.duplicate_classes) - identical,
+        }
+    
+    def iter_report_records(self) -> Iterator[dict]:
+        """Yield one record per definition of every duplicated class."""
+        sorted_duplicates = sorted(
+            self.duplicate_classes.items(),
+            key=lambda x: x[1]['total_occurrences'],
+            reverse=True
+        )
+        for class_name, info in sorted_duplicates:
+            for defn in info['definitions']:
+                yield {
+                    'type': 'definition',
+                    'class': class_name,
+                    'status': 'identical' if info['is_identical'] else 'different',
+                    'total_occurrences': info['total_occurrences'],
+                    'file': defn.file_path,
+                    'line': defn.line_number,
+                    'column': defn.column_number,
+                    'selector': defn.selector,
+                    'context': list(defn.context),
+                    'content_hash': defn.content_hash,
+                }
+    
+    def analyze(self) -> None:
+        """Run the parse and duplicate detection phases without building a report."""
         print("Starting CSS duplicate class analysis...")
         
         # Find CSS files
-        self.css_files = self.find_css_files()
+        with profiling.phase('discover'):
+            self.css_files = self.find_css_files()
         print(f"Found {len(self.css_files)} CSS files")
         
         if not self.css_files:
-            return "No CSS files found to analyze."
+            return
         
-        # Parse each CSS file
-        for css_file in self.css_files:
-            print(f"Parsing: {css_file.relative_to(self.base_path)}")
-            self.parse_css_file(css_file)
+        # Parse each CSS file (unchanged files are merged from the cache)
+        for summary in self.session.summarize(self.css_files):
+            self.merge_summary(summary)
+        if self.session.cache_dir:
+            print(f"Parsed {self.session.parsed} CSS files ({self.session.cached} unchanged, from cache)")
         
         print(f"Extracted {self.total_classes} total class definitions")
-        print(f"Found {len(self.class_definitions)} unique class names")
+        print(f"Found {len(self.classes)} unique class names")
         
         # Analyze for duplicates
-        self.analyze_duplicates()
+        with profiling.phase('diff'):
+            self.analyze_duplicates()
         print(f"Identified {len(self.duplicate_classes)} classes with duplicates")
+    
+    def run_analysis(self) -> str:
+        """Run the complete CSS duplicate analysis."""
+        self.analyze()
         
-        # Generate report
-        report = self.generate_report()
+        if not self.css_files:
+            return "No CSS files found to analyze."
         
-        return report
+        # Generate report
+        with profiling.phase('report'):
+            return self.generate_report()
 
-def main():
-    """Main function to run the CSS duplicate analysis."""
-    # Get the current working directory as base path
-    base_path = os.getcwd()
+def run(args):
+    """Run the analysis for the parsed command-line arguments."""
+    base_path = args.base_path or str(default_base_path())
+    
+    if args.watch:
+        session = AnalysisSession(base_path, use_cache=not args.no_cache, jobs=args.jobs,
+                                  time_budget=args.time_budget or None)
+        run_watch(session, CSSClassAnalyzer(base_path, session=session).find_css_files, args.interval)
+        return
+    
+    if args.since:
+        session = AnalysisSession(base_path, use_cache=not args.no_cache, jobs=args.jobs,
+                                  time_budget=args.time_budget or None)
+        default_output = Path(base_path) / 'css-hygiene' / 'duplicate-css-changes-report.txt'
+        run_since(session, args.since, ('duplicates',),
+                  Path(args.output) if args.output else output_path_for(default_output, args.format), args.format)
+        return
+    
+    if args.near:
+        session = AnalysisSession(base_path, use_cache=not args.no_cache, jobs=args.jobs,
+                                  time_budget=args.time_budget or None)
+        analyzer = NearDuplicateAnalyzer(session, threshold=args.threshold)
+        analyzer.analyze()
+        default_output = Path(base_path) / 'css-hygiene' / 'near-duplicate-css-rules-report.txt'
+        output_file = Path(args.output) if args.output else output_path_for(default_output, args.format)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        write_report(analyzer, output_file, args.format)
+        print(f"\nReport saved to: {output_file}")
+        print(f"- Clusters: {len(analyzer.clusters)}")
+        print(f"- Estimated bytes saved: {sum(cluster.bytes_saved for cluster in analyzer.clusters):,}")
+        return
     
     print(f"CSS Duplicate Class Analyzer")
     print(f"Analyzing codebase at: {base_path}")
     print("-" * 60)
     
     # Create analyzer and run analysis
-    analyzer = CSSClassAnalyzer(base_path)
-    report = analyzer.run_analysis()
-    
-    # Save report to file
-    output_file = Path(base_path) / 'css-hygiene' / 'duplicate-css-classes-report.txt'
-    output_file.parent.mkdir(exist_ok=True)
+    analyzer = CSSClassAnalyzer(base_path, use_cache=not args.no_cache, jobs=args.jobs,
+                                time_budget=args.time_budget or None)
+    analyzer.analyze()
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(report)
+    # Stream the report to file section by section
+    default_output = Path(base_path) / 'css-hygiene' / 'duplicate-css-classes-report.txt'
+    output_file = Path(args.output) if args.output else output_path_for(default_output, args.format)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    write_report(analyzer, output_file, args.format)
     
     print(f"\nReport saved to: {output_file}")
     print("\nSummary:")
     print(f"- Files analyzed: {len(analyzer.css_files)}")
     print(f"- Total classes: {analyzer.total_classes}")
-    print(f"- Unique classes: {len(analyzer.class_definitions)}")
+    print(f"- Unique classes: {len(analyzer.classes)}")
     print(f"- Duplicate classes: {len(analyzer.duplicate_classes)}")
     
     if analyzer.duplicate_classes:
@@ -373,5 +393,40 @@ def main():
         print(f"  - Identical duplicates: {identical}")
         print(f"  - Different duplicates: {different}")
 
+
+def main():
+    """Main function to run the CSS duplicate analysis."""
+    parser = argparse.ArgumentParser(description="Find CSS classes with duplicate definitions.")
+    parser.add_argument('--base-path', default=None,
+                        help="Repository to analyze (default: the repository containing css-hygiene/)")
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help="Worker processes for parsing (default: all cores)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignore and do not update .css-hygiene-cache/")
+    parser.add_argument('--time-budget', type=float, default=css_parser.DEFAULT_TIME_BUDGET,
+                        help="Seconds allowed for parsing any one stylesheet (0 disables)")
+    parser.add_argument('--format', choices=FORMATS, default='text',
+                        help="Report format (default: text)")
+    parser.add_argument('--output', '-o', default=None,
+                        help="Report path (default: css-hygiene/duplicate-css-classes-report.<ext>)")
+    parser.add_argument('--near', action='store_true',
+                        help="Find similar rules across all selectors (canonicalized, MinHash/LSH)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Minimum Jaccard similarity for --near (default: 0.8)")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep the class index in memory and re-report on every change")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help="Watch mode polling interval in seconds")
+    parser.add_argument('--since', metavar='REF', default=None,
+                        help="Only re-analyze stylesheets and sources changed since a git ref")
+    parser.add_argument('--profile', metavar='TRACE', default=None,
+                        help="Write a Chrome trace of per-phase and per-file timings to TRACE")
+    parser.add_argument('--cprofile', metavar='FILE', default=None,
+                        help="Write cProfile statistics of the run to FILE")
+    args = parser.parse_args()
+    
+    with profiling.profile_run(args.profile, args.cprofile):
+        run(args)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+css-hygiene Command Line
+
+Single entry point for the css-hygiene tools. Several commands can be given in
+one invocation; they share one analysis session, so the stylesheets and the
+JSX/JS sources are parsed once no matter how many commands run.
+
+Commands:
+- unused:     report CSS classes not used by the JSX/JS sources
+- duplicates: report CSS classes defined more than once
+- similar:    report clusters of similar rules across all selectors
+- weights:    rank classes by bytes in the sources and the dist bundle
+- references: find every mention of each defined class in JS/JSX/HTML files
+- critical:   split the bundle into inlined critical CSS and deferred chunks
+- purge:      write a purged, minified copy of the bundle to dist/purged/ (sources untouched)
+- deps:       map components to the rules and stylesheets they use; suggest bundles
+- consolidate: hoist identical duplicate rules into one shared stylesheet (runs last)
+- index:      update the SQLite class index (see index_db.py)
+- remove:     delete unused class definitions from src/styles (runs last)
+- report:     shorthand for "unused duplicates"
+
+Usage:
+    python css-hygiene/css_hygiene.py unused duplicates
+    python css-hygiene/css_hygiene.py report --format json
+    python css-hygiene/css_hygiene.py report --since origin/main
+    python css-hygiene/css_hygiene.py report --baseline main.snapshot --fail-on-regression
+    python css-hygiene/css_hygiene.py critical --critical Banner,Header,StudyOverview
+    python css-hygiene/css_hygiene.py consolidate --dry-run
+
+Runs of unused/duplicates store a compact snapshot of the analysis state
+(snapshot.py) in .css-hygiene-cache/; --baseline compares against an earlier one and prints only
+what changed, and --fail-on-regression turns new unused classes or new
+duplicates into a failing exit status for CI.
+
+The analyzers (and the parser, cache and worker-pool machinery behind them)
+are imported only by the commands that need them, so --help and cache-hit
+runs start quickly.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from report_writer import FORMATS, output_path_for, write_report
+
+COMMANDS = ('unused', 'duplicates', 'similar', 'weights', 'references', 'critical', 'purge', 'deps', 'consolidate', 'index', 'remove', 'report')
+
+# Commands that edit the stylesheets; they run after every report
+WRITE_COMMANDS = ('consolidate', 'remove')
+
+# Commands whose state each run stores in a snapshot (snapshot.py), compared by --baseline
+SNAPSHOT_COMMANDS = ('unused', 'duplicates')
+
+
+def run_unused(session, args) -> None:
+    """Write the unused-class report"""
+    if args.since:
+        return run_since(session, args, 'unused', output_dir(session, args) / 'unused-css-changes-report.txt')
+    if args.baseline is not None:
+        return  # run_snapshot reports the changes since the baseline instead
+    from analyze_unused_css import CSSAnalyzer
+
+    analyzer = CSSAnalyzer(session.base_path, session=session)
+    analyzer.analyze()
+    output_file = output_path_for(output_dir(session, args) / 'unused-css-classes-report.txt', args.format)
+    write_report(analyzer, output_file, args.format)
+
+    total_css_classes = sum(len(classes) for classes in analyzer.all_css_classes.values())
+    total_unused = sum(len(classes) for classes in analyzer.unused_classes.values())
+    print(f"📄 Unused classes: {total_unused} of {total_css_classes} -> {output_file}")
+
+
+def run_duplicates(session, args) -> None:
+    """Write the duplicate-class report"""
+    if args.since:
+        default_dir = output_dir(session, args, session.base_path / 'css-hygiene')
+        return run_since(session, args, 'duplicates', default_dir / 'duplicate-css-changes-report.txt')
+    if args.baseline is not None:
+        return  # run_snapshot reports the changes since the baseline instead
+    from css_duplicate_analyzer import CSSClassAnalyzer
+
+    analyzer = CSSClassAnalyzer(session.base_path, time_budget=session.time_budget, session=session)
+    analyzer.analyze()
+    default_dir = output_dir(session, args, session.base_path / 'css-hygiene')
+    output_file = output_path_for(default_dir / 'duplicate-css-classes-report.txt', args.format)
+    write_report(analyzer, output_file, args.format)
+    print(f"📄 Duplicate classes: {len(analyzer.duplicate_classes)} -> {output_file}")
+
+
+def run_since(session, args, kind, default_output) -> None:
+    """Write the report of how the changes since --since moved classes in or out of a set"""
+    import git_scope
+
+    git_scope.run_since(session, args.since, (kind,), output_path_for(default_output, args.format), args.format)
+
+
+def run_snapshot(session, args) -> int:
+    """Store the run's snapshot; with --baseline, report only what changed since the baseline snapshot"""
+    import snapshot
+    from parse_cache import default_cache_dir
+
+    default_dir = output_dir(session, args, default_cache_dir(session.base_path))
+    snapshot_file = Path(args.snapshot) if args.snapshot else default_dir / snapshot.SNAPSHOT_FILE
+    baseline_file = Path(args.baseline or snapshot_file) if args.baseline is not None else None
+    baseline = None
+    if baseline_file and not baseline_file.exists():
+        print(f"⚠️  No baseline snapshot at {baseline_file}; this run's snapshot becomes the first")
+    elif baseline_file:
+        # Read before this run's snapshot possibly overwrites it
+        try:
+            baseline = snapshot.read_snapshot(baseline_file)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 2
+
+    current = snapshot.build_snapshot(session)
+    size = snapshot.write_snapshot(current, snapshot_file)
+    print(f"📸 Snapshot: {size:,} bytes -> {snapshot_file}")
+    if baseline is None:
+        return 0
+
+    delta = snapshot.SnapshotDelta(baseline, current, str(baseline_file))
+    delta.analyze()
+    snapshot.print_delta(delta)
+    output_file = output_path_for(default_dir / 'css-hygiene-delta-report.txt', args.format)
+    write_report(delta, output_file, args.format)
+    regressions = delta.regressions()
+    print(f"📄 Changes since {baseline_file}: {len(delta.changes)} classes, "
+          f"{len(regressions)} regressions -> {output_file}")
+    return 1 if args.fail_on_regression and regressions else 0
+
+
+def run_similar(session, args) -> None:
+    """Write the near-duplicate rules report"""
+    from near_duplicates import NearDuplicateAnalyzer
+
+    analyzer = NearDuplicateAnalyzer(session, threshold=args.threshold)
+    analyzer.analyze()
+    default_dir = output_dir(session, args, session.base_path / 'css-hygiene')
+    output_file = output_path_for(default_dir / 'near-duplicate-css-rules-report.txt', args.format)
+    write_report(analyzer, output_file, args.format)
+    saved = sum(cluster.bytes_saved for cluster in analyzer.clusters)
+    print(f"📄 Similar rule clusters: {len(analyzer.clusters)} (~{saved:,} bytes) -> {output_file}")
+
+
+def run_weights(session, args) -> None:
+    """Write the byte-weighted savings report"""
+    from byte_weights import ByteWeightAnalyzer
+
+    analyzer = ByteWeightAnalyzer(session, dist_path=args.dist)
+    analyzer.analyze()
+    default_dir = output_dir(session, args, session.base_path / 'css-hygiene')
+    output_file = output_path_for(default_dir / 'css-byte-weights-report.txt', args.format)
+    write_report(analyzer, output_file, args.format)
+    print(f"📄 Byte weights: {len(analyzer.weights)} classes -> {output_file}")
+
+
+def run_references(session, args) -> None:
+    """Write the class references report"""
+    from usage_scanner import ReferenceAnalyzer
+
+    analyzer = ReferenceAnalyzer(session)
+    analyzer.analyze()
+    default_dir = output_dir(session, args, session.base_path / 'css-hygiene')
+    output_file = output_path_for(default_dir / 'css-class-references-report.txt', args.format)
+    write_report(analyzer, output_file, args.format)
+    print(f"📄 Classes mentioned nowhere: {len(analyzer.unreferenced())} -> {output_file}")
+
+
+def run_critical(session, args) -> None:
+    """Write the critical CSS, the deferred chunks and their report"""
+    from critical_css import CriticalCSSAnalyzer
+
+    critical = [name.strip() for name in args.critical.split(',') if name.strip()]
+    analyzer = CriticalCSSAnalyzer(session, entry=args.entry, critical=critical)
+    try:
+        analyzer.analyze()
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    default_dir = output_dir(session, args, session.base_path / 'css-hygiene')
+    chunks_dir = analyzer.write_chunks(default_dir / 'critical-css')
+    output_file = output_path_for(default_dir / 'critical-css-report.txt', args.format)
+    write_report(analyzer, output_file, args.format)
+    critical_chunk = analyzer.chunks[0]
+    print(f"📄 Critical CSS: {critical_chunk.size:,} of {analyzer.bundle_size:,} bytes render-blocking, "
+          f"{len(analyzer.deferred_chunks())} deferred chunks -> {chunks_dir}, {output_file}")
+
+
+def run_purge(session, args) -> None:
+    """Write the purged and minified stylesheet of an entry to dist/purged/"""
+    from purge_css import CSSPurger
+
+    purger = CSSPurger(session, entry=args.entry, dist_path=args.dist)
+    try:
+        purger.analyze()
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    default_dir = output_dir(session, args, session.base_path / 'css-hygiene')
+    output_file = output_path_for(default_dir / 'purged-css-report.txt', args.format)
+    write_report(purger, output_file, args.format)
+    print(f"📄 Purged CSS: {purger.original_size:,} -> {purger.purged_size:,} bytes "
+          f"({purger.original_gzip_size:,} -> {purger.purged_gzip_size:,} gzip) -> {output_file}")
+
+
+def run_deps(session, args) -> None:
+    """Write the component/stylesheet dependency graph and the suggested bundle split"""
+    from css_dependencies import GRAPH_FILE, CSSDependencyAnalyzer
+
+    lazy = [name.strip() for name in args.lazy.split(',') if name.strip()] if args.lazy is not None else None
+    analyzer = CSSDependencyAnalyzer(session, lazy=lazy)
+    analyzer.analyze()
+    default_dir = output_dir(session, args, session.base_path / 'css-hygiene')
+    graph_file = analyzer.write_graph(default_dir / GRAPH_FILE)
+    output_file = output_path_for(default_dir / 'css-dependencies-report.txt', args.format)
+    write_report(analyzer, output_file, args.format)
+    for split in analyzer.splits:
+        print(f"- {split.page}: {split.current_size:,} -> {split.bundles[0].size:,} bytes on first load, "
+              f"{len(split.bundles) - 1} deferred bundles")
+    print(f"📄 Dependency graph: {len(analyzer.components)} components -> {graph_file}, {output_file}")
+
+
+def run_consolidate(session, args) -> None:
+    """Hoist identical duplicate rules into a shared stylesheet and write the report"""
+    from consolidate_css import CSSConsolidator
+
+    consolidator = CSSConsolidator(session, entry=args.entry, dry_run=args.dry_run)
+    try:
+        consolidator.analyze()
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    consolidator.apply()
+    default_dir = output_dir(session, args, session.base_path / 'css-hygiene')
+    output_file = output_path_for(default_dir / 'consolidated-css-report.txt', args.format)
+    write_report(consolidator, output_file, args.format)
+    change = consolidator.size_change(consolidator.bundle_size, consolidator.new_bundle_size)
+    print(f"📄 {'Would hoist' if args.dry_run else 'Hoisted'} {len(consolidator.hoisted())} identical rules "
+          f"into {consolidator.shared}, bundle {change} -> {output_file}")
+
+
+def run_index(session, args) -> None:
+    """Update the persistent class index"""
+    from index_db import IndexDatabase, default_db_path
+
+    with IndexDatabase(default_db_path(session.base_path)) as db:
+        updated, dropped = db.update(session)
+        counts = db.counts()
+    print(f"📇 Index: re-indexed {updated} files ({dropped} removed), {counts['classes']} classes")
+
+
+def run_remove(session, args) -> None:
+    """Remove unused class definitions from src/styles"""
+    from remove_unused_css import remove_unused
+
+    remove_unused(session, dry_run=args.dry_run)
+
+
+RUNNERS = {'unused': run_unused, 'duplicates': run_duplicates, 'similar': run_similar, 'weights': run_weights, 'references': run_references, 'critical': run_critical, 'purge': run_purge, 'deps': run_deps, 'consolidate': run_consolidate, 'index': run_index, 'remove': run_remove, 'snapshot': run_snapshot}
+
+
+def output_dir(session, args, default=None):
+    """Directory for report files: --output-dir, else the given default, else the repository"""
+    directory = Path(args.output_dir) if args.output_dir else (default or session.base_path)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def expand_commands(commands, snapshot: bool = True) -> list:
+    """Resolve "report" and duplicates; commands that edit stylesheets run after the reports
+
+    With snapshot, the snapshot of unused/duplicates runs is stored before any stylesheet is edited.
+    """
+    expanded = []
+    for command in commands:
+        for name in (('unused', 'duplicates') if command == 'report' else (command,)):
+            if name not in expanded:
+                expanded.append(name)
+    expanded.sort(key=lambda name: name in WRITE_COMMANDS)
+    if snapshot and any(name in SNAPSHOT_COMMANDS for name in expanded):
+        writes = [index for index, name in enumerate(expanded) if name in WRITE_COMMANDS]
+        expanded.insert(writes[0] if writes else len(expanded), 'snapshot')
+    return expanded
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='css_hygiene.py',
+        description="Find unused and duplicate CSS classes; several commands share one parse."
+    )
+    parser.add_argument('commands', nargs='+', choices=COMMANDS, metavar='command',
+                        help=f"One or more of: {', '.join(COMMANDS)}")
+    parser.add_argument('--base-path', default=None,
+                        help="Repository to analyze (default: the repository containing css-hygiene/)")
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help="Worker processes for parsing (default: all cores)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignore and do not update .css-hygiene-cache/")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="Seconds allowed for parsing any one stylesheet (default: 10, 0 disables)")
+    parser.add_argument('--format', choices=FORMATS, default='text',
+                        help="Report format (default: text)")
+    parser.add_argument('--threshold', type=float, default=0.8,
+                        help="similar: minimum Jaccard similarity of declaration sets (default: 0.8)")
+    parser.add_argument('--dist', default=None,
+                        help="weights: build directory whose assets/ hold the CSS bundle; "
+                             "purge: build directory to write purged/ into (default: dist/)")
+    parser.add_argument('--entry', default='src/main.jsx',
+                        help="critical/purge/consolidate: entry module whose stylesheets are processed (default: src/main.jsx)")
+    parser.add_argument('--critical', default='Banner,Header,StudyOverview',
+                        help="critical: comma-separated above-the-fold components (default: Banner,Header,StudyOverview)")
+    parser.add_argument('--lazy', default=None,
+                        help="deps: comma-separated components to split into lazy bundles "
+                             "(default: dynamic imports and src/components/charts/)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="remove/consolidate: print a unified diff and the byte savings without writing")
+    parser.add_argument('--since', metavar='REF', default=None,
+                        help="unused/duplicates: only re-analyze files changed since a git ref")
+    parser.add_argument('--baseline', metavar='SNAPSHOT', nargs='?', const='', default=None,
+                        help="unused/duplicates: print only the changes since a baseline snapshot "
+                             "(default: the previous run's snapshot)")
+    parser.add_argument('--snapshot', metavar='FILE', default=None,
+                        help="unused/duplicates: where to store this run's snapshot "
+                             "(default: .css-hygiene-cache/css-hygiene.snapshot)")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="--baseline: exit with status 1 on new unused classes or new duplicates")
+    parser.add_argument('--output-dir', default=None,
+                        help="Directory for report files (default: where each tool writes them)")
+    parser.add_argument('--profile', metavar='TRACE', default=None,
+                        help="Write a Chrome trace of per-phase and per-file timings to TRACE")
+    parser.add_argument('--cprofile', metavar='FILE', default=None,
+                        help="Write cProfile statistics of the run to FILE")
+    args = parser.parse_args(argv)
+
+    import profiling
+    from css_parser import DEFAULT_TIME_BUDGET
+    from session import AnalysisSession, default_base_path
+
+    time_budget = DEFAULT_TIME_BUDGET if args.time_budget is None else args.time_budget or None
+    session = AnalysisSession(args.base_path or default_base_path(), use_cache=not args.no_cache,
+                              jobs=args.jobs, time_budget=time_budget)
+    status = 0
+    with profiling.profile_run(args.profile, args.cprofile):
+        # --since reads the class index rather than every stylesheet, so it takes no snapshot
+        for command in expand_commands(args.commands, snapshot=not args.since):
+            status = max(status, RUNNERS[command](session, args) or 0)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+CSS Tokenizer and Parser
+
+Single-pass CSS parser shared by all css-hygiene tools. Each stylesheet is
+read once and scanned once, left to right, with one compiled token pattern.
+The parser emits style rules, at-rule scopes, class tokens and declaration
+blocks together with their byte offsets, so the tools no longer re-scan the
+same file with their own (and mutually inconsistent) regex sets.
+
+Features:
+- Linear-time scan that skips comments and string literals
+- Pairs braces at any depth (@media, @supports, nested rules)
+- Records the full at-rule context path of every rule
+- Enforces an optional per-file time budget (ParseTimeoutError)
+- Extracts class tokens from selectors, ignoring attribute values and strings
+- Works on bytes, so every offset is a byte offset into the original file
+- Maps offsets to line/column through a per-file newline index (binary search)
+
+A "class" is any `.identifier` token in the selector of a style rule.
+Selectors inside @keyframes, @font-face and similar at-rules never define
+classes.
+"""
+
+import re
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from pathlib import Path
+from typing import List, Optional, Set, Tuple, Union
+
+import profiling
+
+# Data structures
+ClassToken = namedtuple('ClassToken', ['name', 'offset'])
+Rule = namedtuple('Rule', ['selector', 'start', 'block_start', 'end', 'context', 'classes'])
+AtRule = namedtuple('AtRule', ['name', 'prelude', 'start', 'block_start', 'end', 'context'])
+Stylesheet = namedtuple('Stylesheet', ['path', 'data', 'rules', 'at_rules'])
+
+# Structural tokens: comments, strings (unterminated ones stop at end of line)
+# and the three characters that delimit preludes and blocks.
+TOKEN_PATTERN = re.compile(
+    rb'/\*.*?(?:\*/|\Z)'
+    rb'|"(?:\\.|[^"\\\n])*"?'
+    rb"|'(?:\\.|[^'\\\n])*'?"
+    rb'|[{};]',
+    re.DOTALL
+)
+
+# Class tokens inside a selector. Comments, strings and attribute selectors are
+# matched (and discarded) first so `[href$=".pdf"]` never yields a class.
+SELECTOR_PATTERN = re.compile(
+    rb'/\*.*?(?:\*/|\Z)'
+    rb'|"(?:\\.|[^"\\])*"'
+    rb"|'(?:\\.|[^'\\])*'"
+    rb'|\[[^\]]*\]'
+    rb'|\.(-?(?:[A-Za-z_\x80-\xff]|\\.)(?:[\w\x80-\xff-]|\\.)*)',
+    re.DOTALL
+)
+
+NEWLINE_PATTERN = re.compile(rb'\n')
+COMMENT_PATTERN = re.compile(rb'/\*.*?(?:\*/|\Z)', re.DOTALL)
+AT_PRELUDE_PATTERN = re.compile(rb'\s*@')
+AT_NAME_PATTERN = re.compile(rb'@(-?[\w-]+)')
+WHITESPACE = b' \t\r\n\f'
+
+# At-rules whose child preludes are not selectors
+NON_SELECTOR_AT_RULES = {'font-face', 'page', 'counter-style', 'property', 'font-feature-values', 'viewport'}
+
+OPEN_BRACE, CLOSE_BRACE, SEMICOLON = ord('{'), ord('}'), ord(';')
+
+# Default per-file parse budget in seconds, checked every N tokens
+DEFAULT_TIME_BUDGET = 10.0
+BUDGET_CHECK_INTERVAL = 1024
+
+
+class ParseTimeoutError(Exception):
+    """Raised when a stylesheet takes longer than its time budget to parse."""
+
+
+def decode(data: bytes) -> str:
+    """Decode a slice of stylesheet bytes for display."""
+    return data.decode('utf-8', errors='replace')
+
+
+def _is_selector_scope(at_name: str) -> bool:
+    """Return True if rules nested directly in this at-rule have selectors."""
+    return not (at_name.endswith('keyframes') or at_name in NON_SELECTOR_AT_RULES)
+
+
+def _prelude(data: bytes, start: int, end: int):
+    """Return (stripped_start, normalized text) of the prelude in data[start:end]."""
+    raw = data[start:end]
+    stripped = raw.lstrip(WHITESPACE)
+    start += len(raw) - len(stripped)
+    if b'/*' in stripped:
+        stripped = COMMENT_PATTERN.sub(b' ', stripped)
+    return start, ' '.join(decode(stripped).split())
+
+
+def extract_selector_classes(data: bytes, start: int, end: int) -> tuple:
+    """Extract class tokens (with absolute offsets) from the selector at data[start:end]."""
+    tokens = []
+    for match in SELECTOR_PATTERN.finditer(data, start, end):
+        if match.lastindex:
+            tokens.append(ClassToken(decode(match.group(1)), match.start()))
+    return tuple(tokens)
+
+
+def parse_css(data: bytes, path: Optional[Union[str, Path]] = None,
+              time_budget: Optional[float] = None) -> Stylesheet:
+    """Parse stylesheet bytes into rules and at-rules in a single pass.
+
+    Raises ParseTimeoutError if parsing takes longer than time_budget seconds.
+    """
+    rules: List[Optional[Rule]] = []
+    at_rules: List[Optional[AtRule]] = []
+
+    # Each open block is a frame: (kind, index, selector scope, context)
+    stack = []
+    context = ()
+    selector_scope = True
+    prelude_start = 0
+    # End of the previous token and whether the prelude has text before it
+    last_end = 0
+    prelude_empty = True
+
+    deadline = time.monotonic() + time_budget if time_budget else None
+    count = -1
+    selector_scans = 0
+
+    for count, match in enumerate(TOKEN_PATTERN.finditer(data)):
+        if deadline and count % BUDGET_CHECK_INTERVAL == 0 and time.monotonic() > deadline:
+            raise ParseTimeoutError(
+                f"parsing {path or 'stylesheet'} exceeded the {time_budget:g}s time budget"
+            )
+
+        pos = match.start()
+        char = data[pos]
+        prelude_empty = prelude_empty and not data[last_end:pos].strip(WHITESPACE)
+        last_end = match.end()
+
+        if char == OPEN_BRACE:
+            start, text = _prelude(data, prelude_start, pos)
+            if text.startswith('@'):
+                name_match = AT_NAME_PATTERN.match(text.encode())
+                name = name_match.group(1).decode().lower() if name_match else ''
+                at_rules.append(AtRule(name, text, start, pos, None, context))
+                stack.append(('at', len(at_rules) - 1, selector_scope, context))
+                context = context + (text,)
+                selector_scope = _is_selector_scope(name)
+            else:
+                classes = ()
+                if selector_scope:
+                    classes = extract_selector_classes(data, start, pos)
+                    selector_scans += 1
+                rules.append(Rule(text, start, pos, None, context, classes))
+                stack.append(('rule', len(rules) - 1, selector_scope, context))
+            prelude_start = pos + 1
+            prelude_empty = True
+
+        elif char == CLOSE_BRACE:
+            if stack:
+                kind, index, selector_scope, context = stack.pop()
+                if kind == 'rule':
+                    rules[index] = rules[index]._replace(end=pos + 1)
+                else:
+                    at_rules[index] = at_rules[index]._replace(end=pos + 1)
+            prelude_start = pos + 1
+            prelude_empty = True
+
+        elif char == SEMICOLON:
+            # Statement at-rules such as @import and @charset
+            if AT_PRELUDE_PATTERN.match(data, prelude_start, pos):
+                start, text = _prelude(data, prelude_start, pos)
+                name_match = AT_NAME_PATTERN.match(text.encode())
+                name = name_match.group(1).decode().lower() if name_match else ''
+                at_rules.append(AtRule(name, text, start, None, pos + 1, context))
+            prelude_start = pos + 1
+            prelude_empty = True
+
+        elif prelude_empty and data.startswith(b'/*', pos):
+            # A comment before any prelude text does not belong to the prelude
+            prelude_start = match.end()
+
+        else:
+            prelude_empty = False
+
+    # Close blocks left open by a truncated or malformed file
+    size = len(data)
+    while stack:
+        kind, index, _, _ = stack.pop()
+        if kind == 'rule':
+            rules[index] = rules[index]._replace(end=size)
+        else:
+            at_rules[index] = at_rules[index]._replace(end=size)
+
+    profiling.count('css.token_matches', count + 1)
+    profiling.count('css.selector_scans', selector_scans)
+    profiling.count('css.rules', len(rules))
+    return Stylesheet(str(path) if path is not None else None, data, rules, at_rules)
+
+
+def parse_css_file(file_path: Union[str, Path], time_budget: Optional[float] = None) -> Stylesheet:
+    """Read a stylesheet once, as bytes, and parse it."""
+    with profiling.phase('read', file=str(file_path)):
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    with profiling.phase('tokenize', file=str(file_path)):
+        return parse_css(data, file_path, time_budget)
+
+
+def block_content(data: bytes, rule) -> bytes:
+    """Return the declaration block of a rule (or at-rule), without its braces."""
+    end = rule.end
+    if end > rule.block_start + 1 and data[end - 1] == CLOSE_BRACE:
+        end -= 1
+    return data[rule.block_start + 1:end]
+
+
+def stylesheet_classes(sheet: Stylesheet) -> Set[str]:
+    """Return the set of class names referenced by any selector in the stylesheet."""
+    return {token.name for rule in sheet.rules for token in rule.classes}
+
+
+class LineIndex:
+    """Newline offset table built once per file for O(log n) position lookups."""
+
+    __slots__ = ('data', 'line_starts')
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.line_starts = [0]
+        self.line_starts.extend(match.end() for match in NEWLINE_PATTERN.finditer(data))
+
+    def line(self, offset: int) -> int:
+        """Return the 1-based line number of a byte offset."""
+        return bisect_right(self.line_starts, offset)
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """Return the 1-based (line, column) of a byte offset; columns count characters."""
+        line = bisect_right(self.line_starts, offset)
+        line_start = self.line_starts[line - 1]
+        return line, len(decode(self.data[line_start:offset])) + 1
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Stylesheet Units
+
+Splits parsed stylesheets into the smallest pieces that can be moved to
+another output file on their own, and writes such pieces back out as CSS.
+A unit is a style rule, a @font-face/@keyframes/@page block or a statement
+at-rule, together with the at-rule context (@media, @supports, ...) it sits
+in. Tools that re-bundle CSS (critical CSS, code splitting, purging) select
+units and let render_units re-open the at-rule blocks around them.
+
+Features:
+- Units in source order, spanning whole rules, so nested rules move with
+  their parent
+- Selector-list parts of every style rule, with the classes each part
+  requires (classes inside :not(...) and other functional pseudo-classes
+  are not required)
+- @keyframes units carry their animation name; external @import units their URL
+- Consecutive units sharing an at-rule context are written inside one block
+"""
+
+import re
+from collections import namedtuple
+from typing import Iterable, List, Optional
+
+import css_parser
+from remove_unused_css import _selector_parts
+
+# Data structures
+Unit = namedtuple('Unit', ['kind', 'file_path', 'start', 'end', 'context', 'text', 'parts', 'name'])
+
+# Unit kinds
+RULE = 'rule'            # style rule with class tokens; parts are (selector, required classes)
+GLOBAL = 'global'        # style rule without classes, @font-face, @page, @layer statements...
+KEYFRAMES = 'keyframes'  # @keyframes block; name is the animation name
+IMPORT = 'import'        # @import of an external stylesheet; name is its URL
+
+IMPORT_URL_PATTERN = re.compile(r'@import\s+(?:url\(\s*)?(?:([\'"])(.*?)\1|([^\'")\s;]+))', re.IGNORECASE)
+
+# Statement at-rules that are dropped: local @import is expanded by the caller
+DROPPED_STATEMENTS = ('charset',)
+
+
+def _is_external(url: str) -> bool:
+    return url.startswith(('http:', 'https:', '//', 'data:'))
+
+
+def stylesheet_units(sheet: css_parser.Stylesheet, file_path: Optional[str] = None) -> List[Unit]:
+    """Return the movable units of a parsed stylesheet in source order."""
+    data = sheet.data
+    nodes = [(rule.start, rule.end, False, rule) for rule in sheet.rules]
+    nodes += [(at_rule.start, at_rule.end, True, at_rule) for at_rule in sheet.at_rules]
+    nodes.sort(key=lambda node: (node[0], -node[1]))
+
+    units = []
+    covered = 0  # end of the last unit; anything starting before it is nested inside
+    for start, end, is_at_rule, node in nodes:
+        if start < covered:
+            continue
+        text = css_parser.decode(data[start:end])
+        if not is_at_rule:
+            parts = tuple(
+                (' '.join(css_parser.decode(data[part_start:part_end]).split()), frozenset(classes))
+                for part_start, part_end, classes in _selector_parts(data, node.start, node.block_start)
+            ) if node.classes else ()
+            units.append(Unit(RULE if node.classes else GLOBAL, file_path, start, end, node.context, text, parts, None))
+        elif node.block_start is None:
+            if node.name == 'import':
+                match = IMPORT_URL_PATTERN.match(node.prelude)
+                # Local imports are expanded by whoever orders the stylesheets
+                url = match and (match.group(2) or match.group(3))
+                if url and _is_external(url):
+                    units.append(Unit(IMPORT, file_path, start, end, node.context, text, (), url))
+                continue
+            if node.name in DROPPED_STATEMENTS:
+                continue
+            units.append(Unit(GLOBAL, file_path, start, end, node.context, text, (), None))
+        elif node.name.endswith('keyframes'):
+            name = node.prelude.split(None, 1)[1].strip('\'"') if ' ' in node.prelude else ''
+            units.append(Unit(KEYFRAMES, file_path, start, end, node.context, text, (), name))
+        elif not css_parser._is_selector_scope(node.name):
+            units.append(Unit(GLOBAL, file_path, start, end, node.context, text, (), None))
+        else:
+            # @media, @supports, ...: their rules become units of their own
+            continue
+        covered = end
+    return units
+
+
+def declarations(unit: Unit) -> str:
+    """The text of a unit after its selector or prelude."""
+    brace = unit.text.find('{')
+    return unit.text[brace + 1:] if brace != -1 else ''
+
+
+def render_units(units: Iterable[Unit], compact: bool = False) -> str:
+    """Write units back out as CSS, re-opening the at-rule blocks they were nested in.
+
+    compact writes minified units without indentation or newlines.
+    """
+    indent, separator = ('', '') if compact else ('  ', '\n')
+    chunks = []
+    open_context = ()
+    for unit in units:
+        shared = 0
+        while (shared < len(open_context) and shared < len(unit.context)
+               and open_context[shared] == unit.context[shared]):
+            shared += 1
+        while len(open_context) > shared:
+            open_context = open_context[:-1]
+            chunks.append(indent * len(open_context) + '}')
+        for prelude in unit.context[shared:]:
+            chunks.append(indent * len(open_context) + prelude + ('{' if compact else ' {'))
+            open_context += (prelude,)
+        chunks.append(indent * len(open_context) + unit.text)
+    while open_context:
+        open_context = open_context[:-1]
+        chunks.append(indent * len(open_context) + '}')
+    return separator.join(chunks) + '\n' if chunks else ''
@@ -1,44 +1,14 @@
 #!/usr/bin/env python3
 
-import re
 import os
-from pathlib import Path
+import sys
+
+from css_parser import parse_css_file, stylesheet_classes
+from session import AnalysisSession, default_base_path
 
 def extract_css_classes(file_path):
     """Extract all CSS class definitions from a file"""
-    classes = set()
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-        
-        # Match class selectors (excluding pseudo-classes and pseudo-elements)
-        # This regex captures: .class-name but not :hover, ::before, etc.
-        pattern = r'^\s*\.([a-zA-Z0-9_-]+)(?:\s|{|,|:(?!:))'
-        
-        for line in content.split('\n'):
-            matches = re.findall(pattern, line, re.MULTILINE)
-            for match in matches:
-                classes.add(match)
-                
-    return classes
-
-def extract_used_classes(file_path):
-    """Extract used classes from the used-css-classes.txt file"""
-    used_classes = set()
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-        
-        # Extract classes from lines starting with "- "
-        for line in content.split('\n'):
-            line = line.strip()
-            if line.startswith('- '):
-                class_name = line[2:].strip()
-                # Handle conditional classes (e.g., "checkbox-label--control")
-                if class_name and not class_name.startswith('`'):
-                    used_classes.add(class_name)
-                    
-    return used_classes
+    return stylesheet_classes(parse_css_file(file_path))
 
 def find_css_files(directory):
     """Find all CSS files in the given directory"""
@@ -51,13 +21,18 @@ def find_css_files(directory):
 
 def main():
     # Define paths
-    styles_dir = "/mnt/c/Rare/GitHub/greys-anatomy-report/src/styles"
-    used_classes_file = "/mnt/c/Rare/GitHub/greys-anatomy-report/used-css-classes.txt"
+    base_path = sys.argv[1] if len(sys.argv) > 1 else str(default_base_path())
+    styles_dir = os.path.join(base_path, "src", "styles")
     
-    # Extract used classes
-    used_classes = extract_used_classes(used_classes_file)
+    # Extract used classes from the JSX/JS sources
+    session = AnalysisSession(base_path)
+    used_classes = session.used_classes()
     print(f"Found {len(used_classes)} used CSS classes")
     
+    # Dynamically composed classes and safelist.txt patterns are never unused
+    safelist = session.safelist()
+    print(f"Loaded {len(safelist)} safelist patterns")
+    
     # Find all CSS files
     css_files = find_css_files(styles_dir)
     print(f"Found {len(css_files)} CSS files")
@@ -76,6 +51,7 @@ def main():
     for css_file, defined_classes in all_defined_classes.items():
         total_defined += len(defined_classes)
         unused = defined_classes - used_classes
+        unused -= safelist.filter(unused).keys()
         if unused:
             unused_classes_by_file[css_file] = sorted(unused)
             
@@ -88,13 +64,13 @@ def main():
     print("="*80)
     
     for css_file, unused_classes in sorted(unused_classes_by_file.items()):
-        relative_path = css_file.replace("/mnt/c/Rare/GitHub/greys-anatomy-report/", "")
+        relative_path = os.path.relpath(css_file, base_path)
         print(f"\n{relative_path} ({len(unused_classes)} unused classes):")
         for class_name in unused_classes:
             print(f"  - .{class_name}")
             
     # Create a summary file
-    with open("/mnt/c/Rare/GitHub/greys-anatomy-report/unused-css-summary.txt", "w") as f:
+    with open(os.path.join(base_path, "unused-css-summary.txt"), "w") as f:
         f.write("UNUSED CSS CLASSES SUMMARY\n")
         f.write("="*80 + "\n\n")
         f.write(f"Total CSS files analyzed: {len(css_files)}\n")
@@ -106,7 +82,7 @@ def main():
         f.write("="*80 + "\n")
         
         for css_file, unused_classes in sorted(unused_classes_by_file.items()):
-            relative_path = css_file.replace("/mnt/c/Rare/GitHub/greys-anatomy-report/", "")
+            relative_path = os.path.relpath(css_file, base_path)
             f.write(f"\n{relative_path} ({len(unused_classes)} unused classes):\n")
             for class_name in unused_classes:
                 f.write(f"  - .{class_name}\n")
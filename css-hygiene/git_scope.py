@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Git-Scoped Analysis
+
+Fast path for reviewing a change: instead of re-analyzing the whole tree,
+--since REF reads the list of stylesheets and JSX/JS sources changed since a
+git ref, re-parses only those files (the working tree version and the version
+at REF) and reports how the change moved classes in and out of the unused and
+duplicate sets. The rest of the tree comes from the persistent class index
+(index_db.py), whose incremental update only stats unchanged files, so the
+parsing work is proportional to the diff rather than to the repository.
+
+Features:
+- Changed files from plain git: `git diff --name-only REF` plus untracked files
+- Classes that became unused (e.g. their last JSX usage was deleted) and new
+  definitions that nothing uses
+- Classes that stopped being unused, because they are used again or their
+  definitions were removed
+- Classes that became, or stopped being, defined in more than one stylesheet
+"""
+
+import copy
+import subprocess
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import profiling
+from index_db import IndexDatabase, default_db_path
+from jsx_class_extractor import SOURCE_EXTENSIONS, extract_class_usages, scan_source_file
+from stylesheet_summary import summarize_stylesheet
+
+# Data structures
+ClassChange = namedtuple('ClassChange', ['class_name', 'change', 'definitions', 'changed_files'])
+
+# Change kinds, in report order, with their report headings
+UNUSED_CHANGES = (
+    ('became-unused', "BECAME UNUSED (no usage left in the sources)"),
+    ('new-unused', "NEW DEFINITIONS THAT NOTHING USES"),
+    ('now-used', "NO LONGER UNUSED (used again)"),
+    ('unused-removed', "UNUSED DEFINITIONS REMOVED"),
+)
+DUPLICATE_CHANGES = (
+    ('new-duplicate', "BECAME DUPLICATED (defined in more than one stylesheet)"),
+    ('duplicate-resolved', "NO LONGER DUPLICATED"),
+)
+KINDS = {'unused': UNUSED_CHANGES, 'duplicates': DUPLICATE_CHANGES}
+
+
+def git(base_path: Path, *args: str) -> bytes:
+    """Run a git command in base_path and return its stdout."""
+    result = subprocess.run(['git', '-C', str(base_path), *args], capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout
+
+
+def is_analyzed(rel_path: str) -> bool:
+    """True for the stylesheets and sources under src/ that the analyzers read."""
+    path = Path(rel_path)
+    return (path.parts[:1] == ('src',) and 'node_modules' not in path.parts
+            and (path.suffix == '.css' or path.suffix in SOURCE_EXTENSIONS))
+
+
+def changed_files(base_path: Path, ref: str) -> List[str]:
+    """Analyzed files that differ from ref in the working tree, relative to base_path."""
+    diff = git(base_path, 'diff', '--name-only', '--relative', '--no-renames', '-z', ref, '--')
+    untracked = git(base_path, 'ls-files', '--others', '--exclude-standard', '-z')
+    names = {name.decode('utf-8', errors='surrogateescape') for name in (diff + untracked).split(b'\0') if name}
+    return sorted(name for name in names if is_analyzed(name))
+
+
+def file_at(base_path: Path, ref: str, rel_path: str) -> Optional[bytes]:
+    """Content of a file at ref, or None if it did not exist there."""
+    try:
+        return git(base_path, 'show', f'{ref}:./{rel_path}')
+    except RuntimeError:
+        return None
+
+
+class GitScopeAnalyzer:
+    def __init__(self, session, ref: str, kinds: Tuple[str, ...] = ('unused', 'duplicates')):
+        self.session = session
+        self.base_path = session.base_path
+        self.ref = ref
+        self.kinds = kinds
+        self.changed_css: List[str] = []
+        self.changed_sources: List[str] = []
+        self.candidates = 0
+        self.changes: List[ClassChange] = []
+
+    def _stylesheet_classes(self, rel_path: str, data: Optional[bytes]) -> Set[str]:
+        """Classes defined by one version of a stylesheet (None: the file did not exist)."""
+        if data is None:
+            return set()
+        try:
+            return set(summarize_stylesheet(self.base_path / rel_path, self.base_path, data,
+                                            self.session.time_budget).classes)
+        except Exception as e:
+            print(f"Error processing {rel_path} at {self.ref}: {e}")
+            return set()
+
+    def _current_stylesheet_classes(self, rel_path: str) -> Set[str]:
+        """Classes defined by the working tree version of a stylesheet."""
+        file_path = self.base_path / rel_path
+        if not file_path.exists():
+            return set()
+        return {class_name for summary in self.session.summarize([file_path]) for class_name in summary.classes}
+
+    def _source_classes(self, rel_path: str, data: Optional[bytes]) -> Set[str]:
+        """Classes used by one version of a source file (None: the file did not exist)."""
+        if data is None:
+            return set()
+        return {usage.class_name for usage in extract_class_usages(data.decode('utf-8', errors='replace'))}
+
+    def _current_source_classes(self, rel_path: str) -> Set[str]:
+        """Classes used by the working tree version of a source file."""
+        file_path = self.base_path / rel_path
+        if not file_path.exists():
+            return set()
+        return {usage.class_name for usage in scan_source_file(str(file_path)).usages}
+
+    def analyze(self) -> None:
+        """Re-parse the files changed since the ref and classify the affected classes."""
+        print(f"🔀 Analyzing CSS/JSX changes since {self.ref}...")
+        with profiling.phase('discover'):
+            changed = changed_files(self.base_path, self.ref)
+        self.changed_css = [path for path in changed if path.endswith('.css')]
+        self.changed_sources = [path for path in changed if not path.endswith('.css')]
+
+        # (old, new) class sets of every changed file
+        definitions: Dict[str, Tuple[Set[str], Set[str]]] = {}
+        usages: Dict[str, Tuple[Set[str], Set[str]]] = {}
+        with profiling.phase('changed-files', files=len(changed)):
+            for rel_path in self.changed_css:
+                definitions[rel_path] = (
+                    self._stylesheet_classes(rel_path, file_at(self.base_path, self.ref, rel_path)),
+                    self._current_stylesheet_classes(rel_path)
+                )
+            for rel_path in self.changed_sources:
+                usages[rel_path] = (
+                    self._source_classes(rel_path, file_at(self.base_path, self.ref, rel_path)),
+                    self._current_source_classes(rel_path)
+                )
+
+        # Only classes whose definitions or usages changed can change state
+        candidates = set()
+        for old, new in list(definitions.values()) + list(usages.values()):
+            candidates |= old ^ new
+        self.candidates = len(candidates)
+
+        # The index supplies the rest of the tree; unchanged files are only stat'ed
+        with IndexDatabase(default_db_path(self.base_path)) as db:
+            db.update(self.session)
+            current = db.class_files(candidates)
+
+        with profiling.phase('diff'):
+            self.changes = self._classify(current, definitions, usages)
+        print(f"   {len(changed)} changed files, {self.candidates} affected classes, "
+              f"{len(self.changes)} state changes")
+
+    def _classify(self, current: Dict[str, Tuple[Set[str], Set[str]]],
+                  definitions: Dict[str, Tuple[Set[str], Set[str]]],
+                  usages: Dict[str, Tuple[Set[str], Set[str]]]) -> List[ClassChange]:
+        """Compare each candidate's state at the ref with its state now."""
+        changes = []
+        # Safelisted classes are never unused; the current safelist is applied to both states
+        safelist = self.session.safelist()
+        for class_name in sorted(current):
+            defined_now, used_now = current[class_name]
+            # The state at the ref: the index minus the changed files plus their old versions
+            defined_then = {path for path in defined_now if path not in definitions}
+            defined_then.update(path for path, (old, _) in definitions.items() if class_name in old)
+            used_then = {path for path in used_now if path not in usages}
+            used_then.update(path for path, (old, _) in usages.items() if class_name in old)
+
+            causes = sorted(
+                path for path, (old, new) in list(definitions.items()) + list(usages.items())
+                if (class_name in old) != (class_name in new)
+            )
+            safelisted = safelist.match(class_name) is not None
+            unused_then = bool(defined_then) and not used_then and not safelisted
+            unused_now = bool(defined_now) and not used_now and not safelisted
+
+            change = None
+            if 'unused' in self.kinds and unused_now != unused_then:
+                if unused_now:
+                    change = 'became-unused' if defined_then else 'new-unused'
+                else:
+                    change = 'now-used' if defined_now else 'unused-removed'
+            if change:
+                changes.append(ClassChange(class_name, change, sorted(defined_now or defined_then), causes))
+
+            if 'duplicates' in self.kinds and (len(defined_now) > 1) != (len(defined_then) > 1):
+                change = 'new-duplicate' if len(defined_now) > 1 else 'duplicate-resolved'
+                changes.append(ClassChange(class_name, change, sorted(defined_now or defined_then), causes))
+        return changes
+
+    def restricted(self, kinds: Tuple[str, ...]) -> 'GitScopeAnalyzer':
+        """A view of the analysis that reports only the given kinds."""
+        view = copy.copy(self)
+        view.kinds = kinds
+        changes = {change for kind in kinds for change, _ in KINDS[kind]}
+        view.changes = [entry for entry in self.changes if entry.change in changes]
+        return view
+
+    def _sections(self):
+        return [section for kind in self.kinds for section in KINDS[kind]]
+
+    def iter_report_lines(self) -> Iterator[str]:
+        """Yield the lines of the change report one at a time."""
+        yield from [
+            "=" * 80,
+            f"CSS CLASS CHANGES SINCE {self.ref}",
+            "=" * 80,
+            "",
+            f"Analysis completed on: {self.base_path}",
+            f"Changed stylesheets: {len(self.changed_css)}",
+            f"Changed sources: {len(self.changed_sources)}",
+            f"Classes affected by the diff: {self.candidates}",
+            "",
+        ]
+        for change, heading in self._sections():
+            entries = [entry for entry in self.changes if entry.change == change]
+            yield f"{heading}: {len(entries)}"
+            yield "-" * 80
+            for entry in entries:
+                yield f".{entry.class_name}"
+                if entry.definitions:
+                    yield f"  defined in: {', '.join(entry.definitions)}"
+                if entry.changed_files:
+                    yield f"  changed by: {', '.join(entry.changed_files)}"
+            yield ""
+
+    def generate_report(self) -> str:
+        """Generate the change report."""
+        return '\n'.join(self.iter_report_lines())
+
+    def report_summary(self) -> dict:
+        """Summary statistics for the structured report formats."""
+        summary = {
+            'report': 'css-class-changes',
+            'since': self.ref,
+            'changed_stylesheets': len(self.changed_css),
+            'changed_sources': len(self.changed_sources),
+            'affected_classes': self.candidates,
+        }
+        for change, _ in self._sections():
+            summary[change.replace('-', '_')] = sum(1 for entry in self.changes if entry.change == change)
+        return summary
+
+    def iter_report_records(self) -> Iterator[dict]:
+        """Yield one record per class whose state changed."""
+        for entry in self.changes:
+            yield {
+                'type': 'change',
+                'class': entry.class_name,
+                'change': entry.change,
+                'definitions': entry.definitions,
+                'changed_files': entry.changed_files,
+            }
+
+
+def run_since(session, ref: str, kinds: Tuple[str, ...], output_file: Path, fmt: str) -> Optional[GitScopeAnalyzer]:
+    """Analyze the changes since ref, write the report and print its counts.
+
+    The analysis covers every kind and is kept on the session, so `report --since`
+    diffs, re-parses and updates the index once for both of its reports.
+    """
+    from report_writer import write_report
+
+    if ref not in session.scopes:
+        analyzer = GitScopeAnalyzer(session, ref, tuple(KINDS))
+        try:
+            analyzer.analyze()
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            analyzer = None
+        session.scopes[ref] = analyzer
+    if session.scopes[ref] is None:
+        return None
+    analyzer = session.scopes[ref].restricted(kinds)
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    write_report(analyzer, output_file, fmt)
+    for change, _ in analyzer._sections():
+        print(f"- {change}: {sum(1 for entry in analyzer.changes if entry.change == change)}")
+    print(f"📄 Changes since {ref} -> {output_file}")
+    return analyzer
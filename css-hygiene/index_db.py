@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Persistent Class Index
+
+SQLite inverted index of every CSS class definition and every JSX/JS class
+usage in the repository, stored in .css-hygiene-cache/index.sqlite3. The
+index is updated incrementally: only files whose mtime or size changed since
+the last update are re-read, so answering "where is .toc-link defined and
+used?" takes milliseconds instead of a full re-analysis.
+
+Features:
+- Tables for files, classes, definitions (file, line, column, selector,
+  at-rule context, content hash; one row per rule referencing the class)
+  and usages (source file, line)
+- Incremental updates keyed by file mtime/size; deleted files are dropped
+- Stylesheet parses go through the shared analysis session and parse cache
+- Exact and wildcard (`chart-*`) class lookups
+
+Usage:
+    python css-hygiene/index_db.py update
+    python css-hygiene/index_db.py where toc-link 'chart-*'
+"""
+
+import argparse
+import os
+import sqlite3
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+from jsx_class_extractor import find_source_files, scan_source_file
+from parallel import parallel_map
+from parse_cache import CACHE_DIR_NAME
+from session import AnalysisSession, default_base_path
+
+# Data structures
+DefinitionRow = namedtuple('DefinitionRow', ['class_name', 'file_path', 'line_number', 'column_number', 'selector', 'context', 'content_hash'])
+UsageRow = namedtuple('UsageRow', ['class_name', 'file_path', 'line_number'])
+
+DB_NAME = 'index.sqlite3'
+
+# Bump whenever the schema changes; older databases are rebuilt
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS classes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS definitions (
+    class_id INTEGER NOT NULL REFERENCES classes(id),
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    line INTEGER NOT NULL,
+    column INTEGER NOT NULL,
+    selector TEXT NOT NULL,
+    context TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS usages (
+    class_id INTEGER NOT NULL REFERENCES classes(id),
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS definitions_class ON definitions(class_id);
+CREATE INDEX IF NOT EXISTS definitions_file ON definitions(file_id);
+CREATE INDEX IF NOT EXISTS usages_class ON usages(class_id);
+CREATE INDEX IF NOT EXISTS usages_file ON usages(file_id);
+"""
+
+# Context paths are stored as one string, at-rule preludes joined by this separator
+CONTEXT_SEPARATOR = ' > '
+
+
+def default_db_path(base_path: Union[str, Path]) -> Path:
+    """Return the index database of an analyzed repository."""
+    return Path(base_path) / CACHE_DIR_NAME / DB_NAME
+
+
+def find_css_files(base_path: Path) -> List[Path]:
+    """Find all stylesheets under src/"""
+    src_path = Path(base_path) / 'src'
+    if not src_path.exists():
+        return []
+    return sorted(path for path in src_path.rglob('*.css') if 'node_modules' not in path.parts)
+
+
+class IndexDatabase:
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.db_path))
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self._create_schema()
+
+    def __enter__(self) -> 'IndexDatabase':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _create_schema(self) -> None:
+        """Create the tables, rebuilding them if they come from another schema version."""
+        version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+        if version != SCHEMA_VERSION:
+            with self.connection:
+                for table in ('usages', 'definitions', 'classes', 'files'):
+                    self.connection.execute(f'DROP TABLE IF EXISTS {table}')
+        self.connection.executescript(SCHEMA)
+        self.connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def _class_ids(self, names: Iterable[str]) -> dict:
+        """Return {name: id}, inserting classes seen for the first time."""
+        names = set(names)
+        self.connection.executemany('INSERT OR IGNORE INTO classes(name) VALUES (?)', ((name,) for name in names))
+        ids = {}
+        for name in names:
+            ids[name] = self.connection.execute('SELECT id FROM classes WHERE name = ?', (name,)).fetchone()[0]
+        return ids
+
+    def _replace_file(self, rel_path: str, kind: str, stat: os.stat_result) -> int:
+        """Drop a file's rows and register its new stat; return its id."""
+        self.connection.execute('DELETE FROM files WHERE path = ?', (rel_path,))
+        cursor = self.connection.execute(
+            'INSERT INTO files(path, kind, mtime_ns, size) VALUES (?, ?, ?, ?)',
+            (rel_path, kind, stat.st_mtime_ns, stat.st_size)
+        )
+        return cursor.lastrowid
+
+    def _changed_files(self, base_path: Path, files: List[Path]) -> List[Tuple[Path, os.stat_result]]:
+        """Return (path, stat) of files whose mtime or size differ from the index."""
+        known = {
+            path: (mtime_ns, size)
+            for path, mtime_ns, size in self.connection.execute('SELECT path, mtime_ns, size FROM files')
+        }
+        changed = []
+        for file_path in files:
+            stat = file_path.stat()
+            if known.get(str(file_path.relative_to(base_path))) != (stat.st_mtime_ns, stat.st_size):
+                changed.append((file_path, stat))
+        return changed
+
+    def update(self, session: AnalysisSession) -> Tuple[int, int]:
+        """Bring the index up to date with the tree; return (files re-indexed, files dropped)."""
+        base_path = session.base_path
+        css_files = find_css_files(base_path)
+        source_files = find_source_files(base_path)
+        changed_css = self._changed_files(base_path, css_files)
+        changed_sources = self._changed_files(base_path, source_files)
+
+        summaries = session.summarize(file_path for file_path, _ in changed_css)
+        scans = parallel_map(scan_source_file, [str(file_path) for file_path, _ in changed_sources], session.jobs)
+
+        current = {str(file_path.relative_to(base_path)) for file_path in css_files + source_files}
+        with self.connection:
+            stale = [
+                (path,) for (path,) in self.connection.execute('SELECT path FROM files')
+                if path not in current
+            ]
+            self.connection.executemany('DELETE FROM files WHERE path = ?', stale)
+
+            stats = {str(file_path.relative_to(base_path)): stat for file_path, stat in changed_css}
+            for summary in summaries:
+                file_id = self._replace_file(summary.file_path, 'css', stats[summary.file_path])
+                class_ids = self._class_ids(class_name for class_name, _ in summary.rule_definitions)
+                self.connection.executemany(
+                    'INSERT INTO definitions VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    ((class_ids[class_name], file_id, defn.line_number, defn.column_number, defn.selector,
+                      CONTEXT_SEPARATOR.join(defn.context), defn.content_hash)
+                     for class_name, defn in summary.rule_definitions)
+                )
+
+            for (file_path, stat), scan in zip(changed_sources, scans):
+                file_id = self._replace_file(str(file_path.relative_to(base_path)), 'source', stat)
+                class_ids = self._class_ids(usage.class_name for usage in scan.usages)
+                self.connection.executemany(
+                    'INSERT INTO usages VALUES (?, ?, ?)',
+                    ((class_ids[usage.class_name], file_id, usage.line_number) for usage in scan.usages)
+                )
+
+            # Classes neither defined nor used anywhere any more
+            self.connection.execute(
+                'DELETE FROM classes WHERE id NOT IN (SELECT class_id FROM definitions) '
+                'AND id NOT IN (SELECT class_id FROM usages)'
+            )
+
+        return len(summaries) + len(scans), len(stale)
+
+    def _match(self, pattern: str) -> Tuple[str, str]:
+        """SQL condition and parameter for an exact or wildcard class lookup"""
+        if any(char in pattern for char in '*?['):
+            return 'classes.name GLOB ?', pattern
+        return 'classes.name = ?', pattern
+
+    def definitions(self, pattern: str) -> List[DefinitionRow]:
+        """Where a class (or wildcard pattern) is defined."""
+        condition, parameter = self._match(pattern)
+        rows = self.connection.execute(
+            'SELECT classes.name, files.path, line, column, selector, context, content_hash '
+            'FROM definitions JOIN classes ON classes.id = class_id JOIN files ON files.id = file_id '
+            f'WHERE {condition} ORDER BY classes.name, files.path, line',
+            (parameter,)
+        )
+        return [DefinitionRow(*row) for row in rows]
+
+    def usages(self, pattern: str) -> List[UsageRow]:
+        """Where a class (or wildcard pattern) is used."""
+        condition, parameter = self._match(pattern)
+        rows = self.connection.execute(
+            'SELECT classes.name, files.path, line '
+            'FROM usages JOIN classes ON classes.id = class_id JOIN files ON files.id = file_id '
+            f'WHERE {condition} ORDER BY classes.name, files.path, line',
+            (parameter,)
+        )
+        return [UsageRow(*row) for row in rows]
+
+    def class_files(self, names: Iterable[str]) -> Dict[str, Tuple[Set[str], Set[str]]]:
+        """Map each class name to (files defining it, files using it)."""
+        result = {name: (set(), set()) for name in names}
+        names = list(result)
+        # Stay below SQLite's limit on bound parameters
+        for i in range(0, len(names), 500):
+            batch = names[i:i + 500]
+            placeholders = ', '.join('?' * len(batch))
+            for table, slot in (('definitions', 0), ('usages', 1)):
+                rows = self.connection.execute(
+                    f'SELECT DISTINCT classes.name, files.path FROM {table} '
+                    'JOIN classes ON classes.id = class_id JOIN files ON files.id = file_id '
+                    f'WHERE classes.name IN ({placeholders})',
+                    batch
+                )
+                for name, path in rows:
+                    result[name][slot].add(path)
+        return result
+
+    def counts(self) -> dict:
+        """Row counts of the index tables."""
+        return {
+            table: self.connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            for table in ('files', 'classes', 'definitions', 'usages')
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+
+def iter_where_lines(db: IndexDatabase, pattern: str):
+    """Yield the report lines answering where a class is defined and used."""
+    definitions = db.definitions(pattern)
+    usages = db.usages(pattern)
+    names = sorted({row.class_name for row in definitions} | {row.class_name for row in usages})
+    if not names:
+        yield f".{pattern}: not found"
+        return
+
+    for name in names:
+        yield f".{name}"
+        yield "  defined in:"
+        found = False
+        for row in definitions:
+            if row.class_name == name:
+                found = True
+                context = f"  [{row.context}]" if row.context else ""
+                yield f"    {row.file_path}:{row.line_number}:{row.column_number}  {row.selector}{context}"
+        if not found:
+            yield "    (nowhere)"
+        yield "  used in:"
+        found = False
+        for row in usages:
+            if row.class_name == name:
+                found = True
+                yield f"    {row.file_path}:{row.line_number}"
+        if not found:
+            yield "    (nowhere)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent SQLite index of CSS class definitions and usages.")
+    parser.add_argument('--base-path', default=None,
+                        help="Repository to index (default: the repository containing css-hygiene/)")
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help="Worker processes for parsing (default: all cores)")
+    parser.add_argument('--no-update', action='store_true',
+                        help="Query the index as it is, without checking for changed files")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('update', help="Update the index")
+    where = subparsers.add_parser('where', help="Show where classes are defined and used")
+    where.add_argument('classes', nargs='+', help="Class names, with or without the dot; * and ? wildcards")
+    args = parser.parse_args()
+
+    session = AnalysisSession(args.base_path or default_base_path(), jobs=args.jobs)
+    with IndexDatabase(default_db_path(session.base_path)) as db:
+        if args.command == 'update' or not args.no_update:
+            updated, dropped = db.update(session)
+            if args.command == 'update':
+                counts = db.counts()
+                print(f"Re-indexed {updated} files ({dropped} removed): {counts['files']} files, "
+                      f"{counts['classes']} classes, {counts['definitions']} definitions, "
+                      f"{counts['usages']} usages")
+        if args.command == 'where':
+            for pattern in args.classes:
+                for line in iter_where_lines(db, pattern.lstrip('.')):
+                    print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+JSX/JS Used-Class Extractor
+
+Builds the set of CSS classes used by the application directly from the
+source tree (src/**/*.jsx and src/**/*.js), replacing the hand-maintained
+used-css-classes.txt list. Each source file is read and scanned once; files
+are scanned in parallel worker processes on large trees, and results can be
+kept in the persistent parse cache so unchanged files are never rescanned.
+
+Recognized class sinks:
+- className="..." / className={...} (and any *ClassName prop)
+- className: ... in object literals
+- d3 .attr('class', ...) and .classed(...)
+- element.classList.add/remove/toggle/contains/replace(...)
+- selector strings passed to select/selectAll/querySelector(All)/closest/matches
+
+Inside a sink every string literal, template-literal chunk and conditional
+branch contributes class names, e.g. `toc-link ${active ? 'active' : ''}`
+yields toc-link and active. Fragments glued to an interpolation
+(`checkbox-label--${id}`) are dynamic and are not reported as used classes;
+they are reported as DynamicClass prefixes (or suffixes, for `${size}-btn`)
+from which safelist.py keeps every matching class.
+Strings that are only compared against (`wave === 'Immediate'`) or used as
+subscripts (`details['study-design']`) are ignored.
+"""
+
+import re
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import profiling
+from parallel import parallel_map
+from parse_cache import ParseCache, content_digest
+
+# Data structures
+ClassUsage = namedtuple('ClassUsage', ['class_name', 'line_number'])
+DynamicClass = namedtuple('DynamicClass', ['prefix', 'suffix', 'line_number'])
+SourceScan = namedtuple('SourceScan', ['file_path', 'digest', 'usages', 'dynamic'])
+
+SOURCE_EXTENSIONS = ('.jsx', '.js')
+
+SINK_PATTERN = re.compile(
+    r'(?P<prop>\b(?:[A-Za-z_$][\w$]*ClassName|className|class))\s*(?:=(?!=)|:)\s*'
+    r'|(?P<attr>\.attr\(\s*([\'"])class\3\s*,)'
+    r'|(?P<call>\.classed\(|\bclassList\.(?:add|remove|toggle|contains|replace)\()'
+    r'|(?P<query>\b(?:select|selectAll|querySelector|querySelectorAll|closest|matches)\()'
+)
+
+CLASS_NAME_PATTERN = re.compile(r'-?[A-Za-z_][\w-]*')
+FRAGMENT_PATTERN = re.compile(r'[\w-]*[A-Za-z][\w-]*')
+SELECTOR_CLASS_PATTERN = re.compile(r'\.(-?[A-Za-z_][\w-]*)')
+
+OPENERS = '([{'
+CLOSERS = ')]}'
+QUOTES = '"\''
+
+
+def _skip_string(source: str, i: int) -> int:
+    """Return the index just past the quoted string starting at i."""
+    quote = source[i]
+    n = len(source)
+    i += 1
+    while i < n:
+        c = source[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == quote or c == '\n':
+            return i + 1
+        i += 1
+    return n
+
+
+def _skip_template(source: str, i: int) -> int:
+    """Return the index just past the template literal starting at i."""
+    n = len(source)
+    i += 1
+    while i < n:
+        c = source[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '`':
+            return i + 1
+        if c == '$' and source.startswith('${', i):
+            i = _scan_value(source, i + 2) + 1
+            continue
+        i += 1
+    return n
+
+
+def _scan_value(source: str, i: int, stop_chars: str = '') -> int:
+    """Return the index of the first unmatched closer (or depth-0 stop char) from i."""
+    n = len(source)
+    depth = 0
+    while i < n:
+        c = source[i]
+        if c in QUOTES:
+            i = _skip_string(source, i)
+            continue
+        if c == '`':
+            i = _skip_template(source, i)
+            continue
+        if c in OPENERS:
+            depth += 1
+        elif c in CLOSERS:
+            if depth == 0:
+                return i
+            depth -= 1
+        elif depth == 0 and c in stop_chars:
+            return i
+        i += 1
+    return n
+
+
+def _neighbour(source: str, i: int, step: int) -> str:
+    """Return the nearest non-whitespace character before (step=-1) or after (step=1) i."""
+    n = len(source)
+    while 0 <= i < n:
+        if not source[i].isspace():
+            return source[i]
+        i += step
+    return ''
+
+
+def _is_operand(source: str, i: int, end: int, before: str, after: str) -> bool:
+    """Return True for strings only compared against or used as a subscript: x === 'a', obj['a']
+
+    i and end delimit the string literal, quotes included.
+    """
+    if before == '[' and after == ']':
+        return True
+    # A lone '=' is a JSX attribute, '==', '===', '<=' and '>=' are comparisons
+    attribute = before == '=' and _neighbour(source, source.rindex('=', 0, i) - 1, -1) not in ('=', '!', '<', '>')
+    if after and after in '=!':
+        return True
+    if after and after in '<>':
+        # 'a' >= x is a comparison; className="a"> closes the JSX tag
+        return _neighbour(source, source.index(after, end) + 1, 1) == '=' or not attribute
+    if before in ('!', '<', '>'):
+        return True
+    return before == '=' and not attribute
+
+
+def _spaced_operand(source: str, i: int) -> bool:
+    """Return True if the '+' after i adds a parenthesized expression whose strings all start with a space."""
+    j = source.index('+', i) + 1
+    while j < len(source) and source[j].isspace():
+        j += 1
+    if not source.startswith('(', j):
+        return False
+    pieces = [text for text, _, _ in _literal_pieces(source, j + 1, _scan_value(source, j + 1))]
+    return bool(pieces) and all(not text or text[0].isspace() for text in pieces)
+
+
+def _literal_pieces(source: str, start: int, end: int) -> Iterator[Tuple[str, bool, bool]]:
+    """Yield (text, glued_left, glued_right) for every string literal in source[start:end]."""
+    i = start
+    while i < end:
+        c = source[i]
+        if c in QUOTES:
+            string_end = _skip_string(source, i)
+            before = _neighbour(source, i - 1, -1)
+            after = _neighbour(source, string_end, 1)
+            if not _is_operand(source, i, string_end, before, after):
+                glued_right = after == '+' and not _spaced_operand(source, string_end)
+                yield source[i + 1:string_end - 1], before == '+', glued_right
+            i = string_end
+        elif c == '`':
+            yield from _template_pieces(source, i)
+            i = _skip_template(source, i)
+        else:
+            i += 1
+
+
+def _template_pieces(source: str, i: int) -> Iterator[Tuple[str, bool, bool]]:
+    """Yield the static chunks of a template literal and the literals in its interpolations."""
+    n = len(source)
+    chunk_start = i + 1
+    glued_left = False
+    i += 1
+    while i < n:
+        c = source[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '`':
+            yield source[chunk_start:i], glued_left, False
+            return
+        if c == '$' and source.startswith('${', i):
+            yield source[chunk_start:i], glued_left, True
+            expr_end = _scan_value(source, i + 2)
+            yield from _literal_pieces(source, i + 2, expr_end)
+            i = chunk_start = expr_end + 1
+            glued_left = True
+            continue
+        i += 1
+
+
+def _class_list_names(text: str, glued_left: bool, glued_right: bool) -> Tuple[List[str], str, str]:
+    """Split a class-list string into complete class names plus the dynamic fragments.
+
+    Returns (names, prefix, suffix): prefix is a word glued to a following
+    interpolation, suffix a word glued to a preceding one ('' if none).
+    """
+    words = text.split()
+    prefix = suffix = ''
+    if words and glued_left and not text[0].isspace():
+        suffix = words[0]
+        words = words[1:]
+    if glued_right and not text[-1:].isspace():
+        if words:
+            prefix = words.pop()
+        elif suffix:
+            # Glued on both sides (`${a}-mid-${b}`): neither end is known
+            suffix = ''
+    names = [word for word in words if CLASS_NAME_PATTERN.fullmatch(word)]
+    return (names, prefix if FRAGMENT_PATTERN.fullmatch(prefix) else '',
+            suffix if FRAGMENT_PATTERN.fullmatch(suffix) else '')
+
+
+def _selector_names(text: str, glued_right: bool) -> Tuple[List[str], str]:
+    """Extract complete class names from a CSS selector string, plus a trailing dynamic prefix."""
+    names, prefix = [], ''
+    for match in SELECTOR_CLASS_PATTERN.finditer(text):
+        if glued_right and match.end() == len(text):
+            prefix = match.group(1)
+        else:
+            names.append(match.group(1))
+    return names, prefix
+
+
+def extract_classes(source: str) -> Tuple[List[ClassUsage], List[DynamicClass]]:
+    """Extract every class usage and dynamic class fragment from JSX/JS source text, in source order."""
+    usages = []
+    dynamic = []
+    line_number = 1
+    last_pos = 0
+    sinks = 0
+
+    for match in SINK_PATTERN.finditer(source):
+        sinks += 1
+        line_number += source.count('\n', last_pos, match.start())
+        last_pos = match.start()
+        value_start = match.end()
+
+        if match.group('prop'):
+            if value_start >= len(source):
+                continue
+            first = source[value_start]
+            if first in QUOTES:
+                value_end = _skip_string(source, value_start)
+            elif first == '`':
+                value_end = _skip_template(source, value_start)
+            elif first == '{' and match.group(0).rstrip().endswith('='):
+                value_end = _scan_value(source, value_start + 1)
+            else:
+                value_end = _scan_value(source, value_start, ',;\n')
+        else:
+            value_end = _scan_value(source, value_start)
+
+        selector_mode = bool(match.group('query'))
+        for text, glued_left, glued_right in _literal_pieces(source, value_start, value_end):
+            if selector_mode:
+                names, prefix = _selector_names(text, glued_right)
+                suffix = ''
+            else:
+                names, prefix, suffix = _class_list_names(text, glued_left, glued_right)
+            for name in names:
+                usages.append(ClassUsage(name, line_number))
+            if prefix:
+                dynamic.append(DynamicClass(prefix, '', line_number))
+            if suffix:
+                dynamic.append(DynamicClass('', suffix, line_number))
+
+    profiling.count('jsx.sink_matches', sinks)
+    return usages, dynamic
+
+
+def extract_class_usages(source: str) -> List[ClassUsage]:
+    """Extract every class usage from JSX/JS source text, in source order.
+
+    >>> [usage.class_name for usage in extract_class_usages('<div className="view-toggle">')]
+    ['view-toggle']
+    >>> [usage.class_name for usage in extract_class_usages("<p className={wave >= 'a' ? 'on' : 'off'}>")]
+    ['on', 'off']
+    """
+    return extract_classes(source)[0]
+
+
+def scan_source_file(file_path: str) -> SourceScan:
+    """Read one source file and extract its class usages (process-pool worker)."""
+    try:
+        with profiling.phase('read', file=file_path):
+            with open(file_path, 'rb') as f:
+                data = f.read()
+    except Exception as e:
+        print(f"Error reading {file_path}: {e}")
+        return SourceScan(file_path, None, [], [])
+    with profiling.phase('scan', file=file_path):
+        source = data.decode('utf-8', errors='replace')
+        usages, dynamic = extract_classes(source)
+        return SourceScan(file_path, content_digest(data), usages, dynamic)
+
+
+def find_source_files(base_path: Path) -> List[Path]:
+    """Find all JS/JSX source files under src/"""
+    src_path = Path(base_path) / 'src'
+    if not src_path.exists():
+        return []
+    return sorted(
+        path for path in src_path.rglob('*')
+        if path.suffix in SOURCE_EXTENSIONS and 'node_modules' not in path.parts
+    )
+
+
+def collect_source_scans(base_path: Path, jobs: Optional[int] = None,
+                         cache: Optional[ParseCache] = None) -> Dict[str, Tuple[List[ClassUsage], List[DynamicClass]]]:
+    """Scan the source tree once and return (usages, dynamic classes) keyed by relative file path."""
+    base_path = Path(base_path)
+    files = [str(path) for path in find_source_files(base_path)]
+
+    # Only files missing from the cache are scanned
+    results = {}
+    if cache:
+        for file_path in files:
+            result = cache.get(file_path)
+            if result is not None:
+                results[file_path] = result
+    scans = parallel_map(scan_source_file, [f for f in files if f not in results], jobs)
+
+    for scan in scans:
+        results[scan.file_path] = (scan.usages, scan.dynamic)
+        if cache and scan.digest:
+            cache.put(scan.file_path, results[scan.file_path], scan.digest)
+    if cache:
+        cache.save()
+
+    return {str(Path(file_path).relative_to(base_path)): results[file_path] for file_path in files}
+
+
+def collect_class_usages(base_path: Path, jobs: Optional[int] = None,
+                         cache: Optional[ParseCache] = None) -> Dict[str, List[ClassUsage]]:
+    """Scan the source tree once and return class usages keyed by relative file path."""
+    return {
+        rel_path: usages for rel_path, (usages, _) in collect_source_scans(base_path, jobs, cache).items()
+    }
+
+
+def collect_used_classes(base_path: Path, jobs: Optional[int] = None,
+                         cache: Optional[ParseCache] = None) -> Set[str]:
+    """Return the set of class names used anywhere in the source tree."""
+    return {
+        usage.class_name
+        for file_usages in collect_class_usages(base_path, jobs, cache).values()
+        for usage in file_usages
+    }
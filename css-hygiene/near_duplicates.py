@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Rule Detector
+
+Finds style rules with the same or similar declarations across all selectors,
+not only rules that share a class name. Declaration blocks are canonicalized
+first, so rules that differ only in whitespace, declaration order, letter case
+or `#fff` vs `#ffffff` compare as equal. Similar rules are then found with
+MinHash signatures and locality-sensitive hashing, which avoids comparing
+every pair of rules.
+
+Features:
+- Canonical declarations: comments dropped, properties lowercased, values
+  whitespace-collapsed, hex colors expanded, zero lengths unified, later
+  declarations of the same property winning
+- 64-permutation MinHash over the canonical declarations of each rule
+- LSH banding; only rules in the same at-rule context are candidates
+- Selectors with vendor-prefixed pseudo-elements and pseudo-classes left out,
+  since they cannot share a selector list
+- Candidates verified by exact Jaccard similarity, then clustered
+- Estimated bytes saved by consolidating each cluster
+- Per-file results kept in the parse cache and computed in parallel
+"""
+
+import hashlib
+import re
+from collections import defaultdict, namedtuple
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+import css_parser
+from parallel import parallel_map
+from parse_cache import ParseCache, content_digest
+
+# Data structures
+CanonicalRule = namedtuple('CanonicalRule', ['file_path', 'line_number', 'selector', 'context', 'declarations'])
+Cluster = namedtuple('Cluster', ['rules', 'min_similarity', 'max_similarity', 'shared', 'bytes_saved'])
+
+DEFAULT_THRESHOLD = 0.8
+MIN_DECLARATIONS = 2
+
+# MinHash: NUM_PERMUTATIONS = BANDS * ROWS; candidates share at least one band
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS = NUM_PERMUTATIONS // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+DECLARATION_PATTERN = re.compile(
+    r'(?:"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|\([^()]*\)|[^;{}"\'(])+'
+)
+HEX_COLOR_PATTERN = re.compile(r'#([0-9a-fA-F]{3,4})\b')
+ZERO_LENGTH_PATTERN = re.compile(r'(?<![\w.#-])0(?:px|em|rem|%|pt|vh|vw)(?![\w%])')
+PRESERVE_CASE_PATTERN = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|url\([^)]*\)', re.IGNORECASE)
+KEYFRAMES_PATTERN = re.compile(r'@(?:-[\w]+-)?keyframes\b', re.IGNORECASE)
+# ::-webkit-scrollbar, :-moz-placeholder, ...: a browser drops a whole selector
+# list holding a prefix it does not know, so these rules must stay separate
+VENDOR_PSEUDO_PATTERN = re.compile(r'::?-(?:webkit|moz|ms|o)-', re.IGNORECASE)
+
+
+def _permutations() -> List[Tuple[int, int]]:
+    """Deterministic (a, b) coefficients of the MinHash permutations."""
+    permutations = []
+    for i in range(NUM_PERMUTATIONS):
+        digest = hashlib.blake2b(f'minhash-{i}'.encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'little') % (MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], 'little') % MERSENNE_PRIME
+        permutations.append((a, b))
+    return permutations
+
+
+PERMUTATIONS = _permutations()
+
+
+def _expand_hex(match) -> str:
+    return '#' + ''.join(char * 2 for char in match.group(1))
+
+
+def canonical_value(value: str) -> str:
+    """Normalize a declaration value; strings and url() keep their case."""
+    value = ' '.join(value.split())
+    value = value.replace(' !important', '!important').replace('! important', '!important')
+    value = HEX_COLOR_PATTERN.sub(_expand_hex, value)
+    value = ZERO_LENGTH_PATTERN.sub('0', value)
+    # Lowercase everything outside strings and url(...)
+    pieces = []
+    pos = 0
+    for match in PRESERVE_CASE_PATTERN.finditer(value):
+        pieces.append(value[pos:match.start()].lower())
+        pieces.append(match.group())
+        pos = match.end()
+    pieces.append(value[pos:].lower())
+    return ''.join(pieces).replace(', ', ',')
+
+
+def canonical_declarations(block: str) -> Tuple[str, ...]:
+    """Reduce a declaration block to its sorted canonical `property:value` strings."""
+    if '/*' in block:
+        block = css_parser.COMMENT_PATTERN.sub(b' ', block.encode()).decode()
+    # Declarations of nested rules belong to those rules
+    if '{' in block:
+        depth = 0
+        flat = []
+        for char in block:
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+            elif depth == 0:
+                flat.append(char)
+        block = ''.join(flat)
+
+    declarations = {}
+    for match in DECLARATION_PATTERN.finditer(block):
+        name, colon, value = match.group().partition(':')
+        name = name.strip().lower()
+        value = value.strip()
+        if colon and name and value:
+            # Later declarations override earlier ones, as in the cascade
+            declarations[name] = canonical_value(value)
+    return tuple(sorted(f'{name}:{value}' for name, value in declarations.items()))
+
+
+def canonical_rules(file_path: Union[str, Path], base_path: Union[str, Path],
+                    data: Optional[bytes] = None,
+                    time_budget: Optional[float] = None) -> List[CanonicalRule]:
+    """Parse a stylesheet and canonicalize the declaration block of every style rule."""
+    file_path = Path(file_path)
+    if data is None:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    sheet = css_parser.parse_css(data, file_path, time_budget)
+    lines = css_parser.LineIndex(sheet.data)
+    relative_path = str(file_path.relative_to(base_path))
+
+    rules = []
+    for rule in sheet.rules:
+        if any(KEYFRAMES_PATTERN.match(prelude) for prelude in rule.context):
+            continue
+        block = css_parser.block_content(sheet.data, rule)
+        declarations = canonical_declarations(css_parser.decode(block))
+        if declarations:
+            rules.append(CanonicalRule(relative_path, lines.line(rule.start), rule.selector,
+                                       rule.context, declarations))
+    return rules
+
+
+def _canonical_task(task: Tuple[str, str, Optional[float]]) -> Tuple[Optional[List[CanonicalRule]], Optional[str], Optional[str]]:
+    """Canonicalize one stylesheet in a worker process, returning (rules, digest, error)."""
+    file_path, base_path, time_budget = task
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        return canonical_rules(file_path, base_path, data, time_budget), content_digest(data), None
+    except Exception as e:
+        return None, None, f"Error processing {file_path}: {e}"
+
+
+def collect_canonical_rules(files: Iterable[Path], base_path: Union[str, Path],
+                            cache: Optional[ParseCache] = None, jobs: Optional[int] = None,
+                            time_budget: Optional[float] = css_parser.DEFAULT_TIME_BUDGET) -> List[CanonicalRule]:
+    """Canonical rules of all files in input order, computing cache misses in parallel."""
+    files = list(files)
+    results = {}
+    if cache:
+        for file_path in files:
+            rules = cache.get(file_path)
+            if rules is not None:
+                results[file_path] = rules
+
+    misses = [file_path for file_path in files if file_path not in results]
+    tasks = [(str(file_path), str(base_path), time_budget) for file_path in misses]
+    for file_path, (rules, digest, error) in zip(misses, parallel_map(_canonical_task, tasks, jobs)):
+        if error:
+            print(error)
+            continue
+        results[file_path] = rules
+        if cache:
+            cache.put(file_path, rules, digest)
+    if cache:
+        cache.save()
+
+    return [rule for file_path in files for rule in results.get(file_path, ())]
+
+
+def token_signature(token: str) -> Tuple[int, ...]:
+    """Hash of one declaration under every MinHash permutation."""
+    h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), 'little')
+    return tuple(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for a, b in PERMUTATIONS)
+
+
+def minhash(token_signatures: Iterable[Tuple[int, ...]]) -> Tuple[int, ...]:
+    """MinHash signature of a set from the signatures of its tokens."""
+    return tuple(map(min, *token_signatures)) if token_signatures else ()
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    """Exact Jaccard similarity of two declaration sets."""
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def find_clusters(rules: List[CanonicalRule], threshold: float = DEFAULT_THRESHOLD,
+                  min_declarations: int = MIN_DECLARATIONS) -> List[Cluster]:
+    """Cluster rules whose canonical declarations are at least `threshold` similar."""
+    rules = [rule for rule in rules
+             if len(rule.declarations) >= min_declarations and not VENDOR_PSEUDO_PATTERN.search(rule.selector)]
+
+    # Rules with identical declarations share one signature and one cluster seed
+    groups = defaultdict(list)
+    for index, rule in enumerate(rules):
+        groups[(rule.context, rule.declarations)].append(index)
+    keys = list(groups)
+    sets = [frozenset(declarations) for _, declarations in keys]
+
+    # LSH: any shared band, within the same at-rule context, makes a candidate pair
+    # Declarations repeat across rules, so each one is hashed once
+    token_signatures = {}
+    buckets = defaultdict(list)
+    for key_index, (context, declarations) in enumerate(keys):
+        signatures = []
+        for token in declarations:
+            value = token_signatures.get(token)
+            if value is None:
+                value = token_signatures[token] = token_signature(token)
+            signatures.append(value)
+        signature = minhash(signatures) if len(signatures) > 1 else signatures[0]
+        for band in range(BANDS):
+            buckets[(context, band, signature[band * ROWS:(band + 1) * ROWS])].append(key_index)
+
+    # Union-find over verified pairs
+    parent = list(range(len(keys)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    checked = set()
+    edges = []  # (a, b, similarity) of the pairs that linked a cluster
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                pair = (a, b) if a < b else (b, a)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                # Already linked through other rules; the cluster does not change
+                root_a, root_b = find(a), find(b)
+                if root_a == root_b:
+                    continue
+                # Jaccard can never exceed the ratio of the set sizes
+                size_a, size_b = len(sets[a]), len(sets[b])
+                if min(size_a, size_b) < threshold * max(size_a, size_b):
+                    continue
+                similarity = jaccard(sets[a], sets[b])
+                if similarity >= threshold:
+                    edges.append((a, b, similarity))
+                    parent[root_a] = root_b
+
+    components = defaultdict(list)
+    for key_index in range(len(keys)):
+        components[find(key_index)].append(key_index)
+    component_scores = defaultdict(list)
+    for a, _, similarity in edges:
+        component_scores[find(a)].append(similarity)
+
+    clusters = []
+    for root, members in components.items():
+        cluster_rules = [rules[index] for key_index in members for index in groups[keys[key_index]]]
+        if len(cluster_rules) < 2:
+            continue
+        # Members with identical declarations are similarity 1.0
+        scores = component_scores[root] or [1.0]
+        shared = frozenset.intersection(*(sets[key_index] for key_index in members))
+        # Consolidating keeps one copy of the shared declarations
+        shared_bytes = sum(len(declaration) + 1 for declaration in shared)
+        clusters.append(Cluster(
+            rules=cluster_rules,
+            min_similarity=min(scores),
+            max_similarity=max(scores),
+            shared=tuple(sorted(shared)),
+            bytes_saved=shared_bytes * (len(cluster_rules) - 1)
+        ))
+
+    clusters.sort(key=lambda cluster: (-cluster.bytes_saved, cluster.rules[0].file_path, cluster.rules[0].line_number))
+    return clusters
+
+
+class NearDuplicateAnalyzer:
+    def __init__(self, session, threshold: float = DEFAULT_THRESHOLD,
+                 min_declarations: int = MIN_DECLARATIONS):
+        self.session = session
+        self.base_path = session.base_path
+        self.threshold = threshold
+        self.min_declarations = min_declarations
+        self.css_files = []
+        self.rules = []
+        self.clusters = []
+
+    def find_css_files(self) -> List[Path]:
+        """Find all CSS files under src/"""
+        src_path = self.base_path / 'src'
+        if not src_path.exists():
+            return []
+        return sorted(path for path in src_path.rglob('*.css') if 'node_modules' not in path.parts)
+
+    def analyze(self) -> None:
+        """Canonicalize every rule and cluster the similar ones."""
+        print("Starting near-duplicate rule analysis...")
+        self.css_files = self.find_css_files()
+        cache = ParseCache(self.session.cache_dir, 'canonical-rules') if self.session.cache_dir else None
+        self.rules = collect_canonical_rules(self.css_files, self.base_path, cache,
+                                             self.session.jobs, self.session.time_budget)
+        print(f"Canonicalized {len(self.rules)} rules in {len(self.css_files)} CSS files")
+        self.clusters = find_clusters(self.rules, self.threshold, self.min_declarations)
+        print(f"Found {len(self.clusters)} clusters of similar rules")
+
+    def iter_report_lines(self) -> Iterator[str]:
+        """Yield the lines of the near-duplicate rules report one at a time."""
+        total_saved = sum(cluster.bytes_saved for cluster in self.clusters)
+        yield from [
+            "=" * 80,
+            "CSS NEAR-DUPLICATE RULE ANALYSIS REPORT",
+            "=" * 80,
+            "",
+            f"Analysis completed on: {self.base_path}",
+            f"Files analyzed: {len(self.css_files)}",
+            f"Rules analyzed: {len(self.rules)}",
+            f"Similarity threshold: {self.threshold:.2f} (rules with at least {self.min_declarations} declarations)",
+            f"Clusters found: {len(self.clusters)}",
+            f"Estimated bytes saved by consolidating: {total_saved:,}",
+            "",
+        ]
+
+        for number, cluster in enumerate(self.clusters, 1):
+            similarity = (f"{cluster.min_similarity:.2f}" if cluster.min_similarity == cluster.max_similarity
+                          else f"{cluster.min_similarity:.2f}-{cluster.max_similarity:.2f}")
+            yield f"CLUSTER {number}: {len(cluster.rules)} rules, similarity {similarity}, ~{cluster.bytes_saved:,} bytes saved"
+            yield "-" * 80
+            context = cluster.rules[0].context
+            if context:
+                yield f"  Context: {' > '.join(context)}"
+            for rule in cluster.rules:
+                yield f"  {rule.file_path}:{rule.line_number}  {rule.selector}"
+            yield "  Shared declarations:"
+            for declaration in cluster.shared:
+                yield f"    {declaration};"
+            yield ""
+
+    def generate_report(self) -> str:
+        """Generate the near-duplicate rules report."""
+        return '\n'.join(self.iter_report_lines())
+
+    def report_summary(self) -> dict:
+        """Summary statistics for the structured report formats."""
+        return {
+            'report': 'near-duplicate-css-rules',
+            'files_analyzed': len(self.css_files),
+            'rules_analyzed': len(self.rules),
+            'threshold': self.threshold,
+            'clusters': len(self.clusters),
+            'bytes_saved': sum(cluster.bytes_saved for cluster in self.clusters),
+        }
+
+    def iter_report_records(self) -> Iterator[dict]:
+        """Yield one record per rule of every cluster."""
+        for number, cluster in enumerate(self.clusters, 1):
+            for rule in cluster.rules:
+                yield {
+                    'type': 'rule',
+                    'cluster': number,
+                    'min_similarity': cluster.min_similarity,
+                    'max_similarity': cluster.max_similarity,
+                    'bytes_saved': cluster.bytes_saved,
+                    'file': rule.file_path,
+                    'line': rule.line_number,
+                    'selector': rule.selector,
+                    'context': list(rule.context),
+                    'declarations': list(rule.declarations),
+                }
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Parallel Helpers
+
+Small wrapper around ProcessPoolExecutor used by the css-hygiene tools to fan
+per-file work out to worker processes. Results always come back in input
+order so reports stay deterministic regardless of the number of workers.
+"""
+
+import os
+from typing import Callable, Iterable, List, Optional
+
+import profiling
+
+# Below this many items, worker start-up costs more than it saves
+MIN_PARALLEL_ITEMS = 32
+
+
+def resolve_jobs(jobs: Optional[int]) -> int:
+    """Translate a --jobs value into a worker count (None or 0 means all cores)."""
+    if not jobs or jobs < 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def parallel_map(func: Callable, items: Iterable, jobs: Optional[int] = None) -> List:
+    """Map a picklable top-level function over items, preserving input order."""
+    items = list(items)
+    workers = min(resolve_jobs(jobs), len(items))
+
+    if workers <= 1 or len(items) < MIN_PARALLEL_ITEMS:
+        return [func(item) for item in items]
+
+    # Imported here: the pool machinery costs ~25 ms of start-up on every run
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(items) // (workers * 4))
+    profiler = profiling.active()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if profiler is None:
+            return list(pool.map(func, items, chunksize=chunksize))
+
+        # Workers profile their own calls; their events are merged into this trace
+        tasks = [(func, item, profiler.trace_memory) for item in items]
+        results = []
+        for result, events, counters in pool.map(profiling.profiled_call, tasks, chunksize=chunksize):
+            profiler.merge(events, counters)
+            results.append(result)
+        return results
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Persistent Incremental Analysis Cache
+
+On-disk cache of per-file analysis results for the css-hygiene tools, stored
+under .css-hygiene-cache/ in the analyzed repository. Entries are keyed by
+file path and validated by mtime and size; when only the mtime changed the
+content hash decides, so touching a file does not force a re-parse. Reruns on
+an unchanged tree only stat the files and load one pickle.
+"""
+
+import hashlib
+import os
+import pickle
+from collections import namedtuple
+from pathlib import Path
+from typing import Any, Optional, Union
+
+CACHE_DIR_NAME = '.css-hygiene-cache'
+
+# Bump whenever the shape of cached values or the extraction behind them changes
+CACHE_VERSION = 7
+
+# Data structures
+CacheEntry = namedtuple('CacheEntry', ['mtime_ns', 'size', 'digest', 'value'])
+
+
+def content_digest(data: bytes) -> str:
+    """Return the content hash used to validate cached results."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def default_cache_dir(base_path: Union[str, Path]) -> Path:
+    """Return the cache directory for an analyzed repository."""
+    return Path(base_path) / CACHE_DIR_NAME
+
+
+class ParseCache:
+    def __init__(self, cache_dir: Union[str, Path], name: str):
+        self.cache_file = Path(cache_dir) / f'{name}.pickle'
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._stats = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        """Load the cache file, discarding it if unreadable or from another version."""
+        try:
+            with open(self.cache_file, 'rb') as f:
+                version, entries = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Warning: ignoring unreadable cache {self.cache_file}: {e}")
+            return
+        if version == CACHE_VERSION:
+            self.entries = entries
+
+    def get(self, file_path: Union[str, Path]) -> Optional[Any]:
+        """Return the cached value for a file if its content is unchanged, else None."""
+        key = str(file_path)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        self._stats[key] = stat
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                self.hits += 1
+                return entry.value
+
+            # Touched but possibly unchanged: let the content hash decide
+            if entry.size == stat.st_size:
+                with open(file_path, 'rb') as f:
+                    digest = content_digest(f.read())
+                if digest == entry.digest:
+                    self.entries[key] = entry._replace(mtime_ns=stat.st_mtime_ns)
+                    self._dirty = True
+                    self.hits += 1
+                    return entry.value
+
+        self.misses += 1
+        return None
+
+    def put(self, file_path: Union[str, Path], value: Any, digest: str) -> None:
+        """Store the result computed for a file's current content."""
+        key = str(file_path)
+        # Use the stat taken before the file was read so a concurrent edit invalidates
+        stat = self._stats.pop(key, None) or os.stat(file_path)
+        self.entries[key] = CacheEntry(stat.st_mtime_ns, stat.st_size, digest, value)
+        self._dirty = True
+
+    def prune(self) -> None:
+        """Drop entries for files that no longer exist."""
+        stale = [key for key in self.entries if not os.path.exists(key)]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache back to disk atomically if anything changed."""
+        self.prune()
+        if not self._dirty:
+            return
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix('.tmp')
+            with open(tmp_file, 'wb') as f:
+                pickle.dump((CACHE_VERSION, self.entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, self.cache_file)
+            self._dirty = False
+        except Exception as e:
+            print(f"Warning: could not write cache {self.cache_file}: {e}")
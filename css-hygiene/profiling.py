@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Analysis Profiling
+
+Optional instrumentation for the css-hygiene tools. When enabled (--profile),
+every analysis phase (discover, read, tokenize, extract, diff, report) records
+its wall time, CPU time and net allocations, per file where the phase works on
+one file, and the parsers count their regex scans. The result is written as a
+Chrome trace (open it in chrome://tracing or https://ui.perfetto.dev) whose
+metadata holds per-phase totals and the counters. --cprofile additionally
+dumps cProfile statistics of the whole run.
+
+When profiling is disabled, phase() returns a shared no-op context manager and
+count() returns immediately, so the instrumentation costs nothing measurable.
+Phases that run in worker processes are recorded there and merged back into
+the trace by parallel_map.
+"""
+
+import contextlib
+import json
+import os
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple, Union
+
+TRACE_CATEGORY = 'css-hygiene'
+
+# Number of slowest files listed in the console summary
+SLOWEST_FILES = 5
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class Profiler:
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.events = []
+        self.counters = Counter()
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        """Begin recording (and start tracemalloc if allocations are traced)."""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self) -> None:
+        """Stop tracemalloc if this profiler started it."""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextlib.contextmanager
+    def phase(self, name: str, **args) -> Iterator[None]:
+        """Record one phase as a complete trace event."""
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        allocated = tracemalloc.get_traced_memory()[0] if tracing else 0
+        cpu = time.process_time()
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter_ns() - start
+            args['cpu_ms'] = round((time.process_time() - cpu) * 1000, 3)
+            if tracing:
+                args['alloc_bytes'] = tracemalloc.get_traced_memory()[0] - allocated
+            self.events.append({
+                'name': name,
+                'cat': TRACE_CATEGORY,
+                'ph': 'X',
+                'ts': start / 1000,
+                'dur': duration / 1000,
+                'pid': os.getpid(),
+                'tid': 0,
+                'args': args,
+            })
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add n to a named counter."""
+        self.counters[name] += n
+
+    def merge(self, events: List[dict], counters: dict) -> None:
+        """Add events and counters recorded in a worker process."""
+        self.events.extend(events)
+        self.counters.update(counters)
+
+    def phase_totals(self) -> dict:
+        """Per-phase totals: calls, wall ms, CPU ms and net allocated bytes."""
+        totals = defaultdict(lambda: {'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0, 'alloc_bytes': 0})
+        for event in self.events:
+            total = totals[event['name']]
+            total['calls'] += 1
+            total['wall_ms'] += event['dur'] / 1000
+            total['cpu_ms'] += event['args'].get('cpu_ms', 0)
+            total['alloc_bytes'] += event['args'].get('alloc_bytes', 0)
+        return {name: dict(total, wall_ms=round(total['wall_ms'], 3), cpu_ms=round(total['cpu_ms'], 3))
+                for name, total in totals.items()}
+
+    def slowest_files(self, limit: int = SLOWEST_FILES) -> List[Tuple[str, float]]:
+        """Files with the most wall time across their per-file phases."""
+        per_file = Counter()
+        for event in self.events:
+            file_path = event['args'].get('file')
+            if file_path:
+                per_file[file_path] += event['dur'] / 1000
+        return per_file.most_common(limit)
+
+    def write_trace(self, output_file: Union[str, Path]) -> None:
+        """Write the events as a Chrome trace with totals and counters as metadata."""
+        events = sorted(self.events, key=lambda event: event['ts'])
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'traceEvents': events,
+                'displayTimeUnit': 'ms',
+                'otherData': {
+                    'phases': self.phase_totals(),
+                    'counters': dict(self.counters),
+                    'slowest_files': self.slowest_files(),
+                },
+            }, f, indent=1)
+
+    def summary_lines(self) -> List[str]:
+        """Console summary of the phase totals, counters and slowest files."""
+        lines = [f"{'Phase':<16} {'Calls':>7} {'Wall ms':>10} {'CPU ms':>10} {'Alloc KiB':>10}"]
+        for name, total in sorted(self.phase_totals().items(), key=lambda item: -item[1]['wall_ms']):
+            lines.append(f"{name:<16} {total['calls']:>7} {total['wall_ms']:>10.1f} {total['cpu_ms']:>10.1f} "
+                         f"{total['alloc_bytes'] / 1024:>10.1f}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"  {name}: {value:,}")
+        slowest = self.slowest_files()
+        if slowest:
+            lines.append("Slowest files:")
+            lines.extend(f"  {wall_ms:8.1f} ms  {file_path}" for file_path, wall_ms in slowest)
+        return lines
+
+
+_profiler: Optional[Profiler] = None
+
+
+def enable(trace_memory: bool = True) -> Profiler:
+    """Turn profiling on for this process and return the profiler."""
+    global _profiler
+    _profiler = Profiler(trace_memory)
+    _profiler.start()
+    return _profiler
+
+
+def disable() -> Optional[Profiler]:
+    """Turn profiling off and return the profiler that was active."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler:
+        profiler.stop()
+    return profiler
+
+
+def active() -> Optional[Profiler]:
+    """The active profiler, or None when profiling is off."""
+    return _profiler
+
+
+def phase(name: str, **args):
+    """Context manager timing one phase (a no-op unless profiling is on)."""
+    if _profiler is None:
+        return _NULL_CONTEXT
+    return _profiler.phase(name, **args)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add n to a counter (a no-op unless profiling is on)."""
+    if _profiler is not None:
+        _profiler.count(name, n)
+
+
+def profiled_call(task: Tuple[Callable, object, bool]) -> Tuple[object, List[dict], dict]:
+    """Run func(item) in a worker with its own profiler; return (result, events, counters)."""
+    func, item, trace_memory = task
+    profiler = enable(trace_memory)
+    try:
+        return func(item), profiler.events, dict(profiler.counters)
+    finally:
+        disable()
+
+
+@contextlib.contextmanager
+def profile_run(trace_file: Optional[str] = None, cprofile_file: Optional[str] = None,
+                trace_memory: bool = True) -> Iterator[None]:
+    """Profile the enclosed run if trace_file or cprofile_file is given, then write the results."""
+    if not trace_file and not cprofile_file:
+        yield
+        return
+
+    profiler = enable(trace_memory) if trace_file else None
+    cprofiler = None
+    if cprofile_file:
+        import cProfile
+
+        cprofiler = cProfile.Profile()
+        cprofiler.enable()
+    try:
+        yield
+    finally:
+        if cprofiler:
+            cprofiler.disable()
+            cprofiler.dump_stats(cprofile_file)
+            print(f"🧭 cProfile stats saved to: {cprofile_file}")
+        if profiler:
+            disable()
+            profiler.write_trace(trace_file)
+            print("\n".join(profiler.summary_lines()))
+            print(f"🧭 Trace saved to: {trace_file}")
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Purged Production Stylesheet
+
+Non-destructive alternative to remove_unused_css.py: instead of editing the
+stylesheets people maintain, it reads the stylesheets of an entry point in
+bundle order (component_graph.py), drops what the JSX/JS sources never use
+and writes one purged, minified and deduplicated stylesheet to dist/purged/,
+apart from the dist/assets/ bundle the weights report measures. The
+sources are never touched, so no file needs to be skipped by name; element,
+:root and @font-face rules have no classes and are always kept.
+
+Features:
+- Selector lists are cut down to their used members (`.used, .unused {}`
+  becomes `.used{}`); classes only inside :not(...) never drop a selector
+- Classes kept by the safelist (dynamic prefixes and safelist.txt) count as used
+- @keyframes no kept rule refers to are dropped
+- @media/@supports blocks left without rules disappear; consecutive rules
+  sharing a block are written inside one
+- Identical rules in the same at-rule context are written once, at their
+  last position, which leaves the cascade unchanged
+- Minified output: comments and insignificant whitespace removed, repeated
+  identical declarations written once
+- Original, minified-only and purged sizes, raw and gzip-compressed
+"""
+
+import re
+from collections import namedtuple
+from pathlib import Path
+from typing import Iterator, List, Tuple, Union
+
+import css_parser
+import profiling
+from byte_weights import gzip_size
+from component_graph import ComponentGraph
+from css_units import GLOBAL, KEYFRAMES, RULE, declarations, render_units, stylesheet_units
+from near_duplicates import DECLARATION_PATTERN
+
+# Data structures
+PurgeStats = namedtuple('PurgeStats', ['selectors', 'rules', 'keyframes', 'duplicates'])
+
+DEFAULT_ENTRY = 'src/main.jsx'
+
+# Output subdirectory of dist/; dist/assets/ is the shipped bundle and stays untouched
+PURGED_DIR = 'purged'
+
+# Strings and comments, which minification must not look into (comments are dropped)
+STRING_OR_COMMENT_PATTERN = re.compile(r'/\*.*?(?:\*/|\Z)|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'', re.DOTALL)
+STRUCTURE_PATTERN = re.compile(r'/\*.*?(?:\*/|\Z)|"(?:\\.|[^"\\])*"?|\'(?:\\.|[^\'\\])*\'?|[{};]', re.DOTALL)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+SELECTOR_SPACE_PATTERN = re.compile(r'\s*([,>{}])\s*')
+VALUE_SPACE_PATTERN = re.compile(r'\s*(,|!important)\s*', re.IGNORECASE)
+
+
+def _outside_strings(text: str, minify) -> str:
+    """Apply minify to the parts of text outside strings, dropping comments, and strip the result."""
+    pieces = []
+    pending = []  # text outside strings since the last string; comments count as whitespace
+    pos = 0
+    for match in STRING_OR_COMMENT_PATTERN.finditer(text):
+        pending.append(text[pos:match.start()])
+        token = match.group()
+        if token.startswith('/*'):
+            pending.append(' ')
+        else:
+            pieces.append(minify(''.join(pending)))
+            pieces.append(token)
+            pending = []
+        pos = match.end()
+    pending.append(text[pos:])
+    pieces.append(minify(''.join(pending)))
+    return ''.join(pieces).strip()
+
+
+def _collapse(text: str) -> str:
+    return WHITESPACE_PATTERN.sub(' ', text)
+
+
+def minify_selector(selector: str) -> str:
+    """Collapse the whitespace of a selector or at-rule prelude."""
+    if selector.lstrip().startswith('@'):
+        return _outside_strings(selector, _collapse)
+    return _outside_strings(selector, lambda text: SELECTOR_SPACE_PATTERN.sub(r'\1', _collapse(text)))
+
+
+def minify_declarations(block: str) -> str:
+    """Minify a declaration block; identical repeated declarations are kept once, last."""
+    if '/*' in block:
+        block = _outside_strings(block, lambda text: text)
+    minified = []
+    for match in DECLARATION_PATTERN.finditer(block):
+        name, colon, value = match.group().partition(':')
+        name = name.strip()
+        value = _outside_strings(value, lambda text: VALUE_SPACE_PATTERN.sub(r'\1', _collapse(text)))
+        if colon and name and value:
+            minified.append(f'{name}:{value}')
+    # Different values of one property are fallbacks and all stay; exact repeats do not
+    deduplicated = list(reversed(dict.fromkeys(reversed(minified))))
+    return ';'.join(deduplicated)
+
+
+def minify_css(text: str) -> str:
+    """Minify CSS text: rules, at-rule blocks and statements, recursively."""
+    pieces = []
+    depth = 0
+    prelude_start = 0
+    prelude_end = body_start = 0
+    nested = False
+    for match in STRUCTURE_PATTERN.finditer(text):
+        token = match.group()
+        if token == '{':
+            if depth == 0:
+                prelude_end, body_start = match.start(), match.end()
+                nested = False
+            elif depth == 1:
+                nested = True
+            depth += 1
+        elif token == '}' and depth:
+            depth -= 1
+            if depth == 0:
+                body = text[body_start:match.start()]
+                body = minify_css(body) if nested else minify_declarations(body)
+                prelude = minify_selector(text[prelude_start:prelude_end])
+                if body or prelude.startswith('@'):
+                    pieces.append(f'{prelude}{{{body}}}')
+                prelude_start = match.end()
+        elif token == ';' and depth == 0:
+            statement = _outside_strings(text[prelude_start:match.start()], _collapse)
+            if statement:
+                pieces.append(statement + ';')
+            prelude_start = match.end()
+    rest = _outside_strings(text[prelude_start:], _collapse)
+    if rest:
+        # Declarations of a nested block, or an unterminated statement
+        pieces.append(minify_declarations(rest) if depth == 0 and ':' in rest and not rest.startswith('@') else rest)
+    return ''.join(pieces)
+
+
+def entry_output_name(entry: str) -> str:
+    """Output file name for an entry: src/scrolly/main.jsx -> scrolly-main.purged.min.css."""
+    path = Path(entry)
+    parts = path.with_suffix('').parts
+    if parts[:1] == ('src',):
+        parts = parts[1:]
+    return '-'.join(parts) + '.purged.min.css'
+
+
+class CSSPurger:
+    def __init__(self, session, entry: str = DEFAULT_ENTRY, dist_path: Union[str, Path, None] = None):
+        self.session = session
+        self.base_path = session.base_path
+        self.entry = entry
+        self.dist_path = Path(dist_path) if dist_path else self.base_path / 'dist'
+        self.output_file = self.dist_path / PURGED_DIR / entry_output_name(entry)
+        self.stylesheets: List[str] = []
+        self.original_size = self.original_gzip_size = 0
+        self.minified_size = self.minified_gzip_size = 0
+        self.purged_size = self.purged_gzip_size = 0
+        self.rules = 0
+        self.stats = PurgeStats(0, 0, 0, 0)
+        self.removed: List[Tuple[str, str]] = []  # (file, selector) of every dropped selector
+
+    def analyze(self) -> None:
+        """Purge, minify and deduplicate the entry's stylesheets and write the result to dist/purged/."""
+        print(f"🧹 Purging and minifying the stylesheets of {self.entry}...")
+        with profiling.phase('graph'):
+            graph = ComponentGraph(self.base_path).build()
+        if self.entry not in graph.imports:
+            raise ValueError(f"Entry point {self.entry} is not a JS/JSX file under src/")
+        self.stylesheets = graph.stylesheet_order(self.entry)
+
+        used_classes = self.session.used_classes()
+        safelist = self.session.safelist()
+        kept_classes = {}
+
+        def is_used(class_name: str) -> bool:
+            used = kept_classes.get(class_name)
+            if used is None:
+                used = kept_classes[class_name] = (class_name in used_classes
+                                                   or safelist.match(class_name) is not None)
+            return used
+
+        original = []
+        units = []
+        with profiling.phase('parse', files=len(self.stylesheets)):
+            for stylesheet in self.stylesheets:
+                try:
+                    sheet = css_parser.parse_css_file(self.base_path / stylesheet, self.session.time_budget)
+                except Exception as e:
+                    print(f"Error processing {stylesheet}: {e}")
+                    continue
+                original.append(sheet.data)
+                units.extend(stylesheet_units(sheet, stylesheet))
+        self.rules = len(units)
+
+        with profiling.phase('purge'):
+            dropped_selectors = dropped_rules = 0
+            purged = []
+            for unit in units:
+                if unit.kind != RULE:
+                    purged.append(unit)
+                    continue
+                kept = [selector for selector, classes in unit.parts if all(map(is_used, classes))]
+                if len(kept) == len(unit.parts):
+                    purged.append(unit)
+                    continue
+                dropped_selectors += len(unit.parts) - len(kept)
+                self.removed.extend((unit.file_path, selector) for selector, _ in unit.parts if selector not in kept)
+                if not kept:
+                    dropped_rules += 1
+                    continue
+                purged.append(unit._replace(text=', '.join(kept) + ' {' + declarations(unit)))
+
+            # Keyframes survive only if a kept rule still names them
+            names = {unit.name for unit in purged if unit.kind == KEYFRAMES and unit.name}
+            referenced = set()
+            if names:
+                name_pattern = re.compile(r'(?<![\w-])(' + '|'.join(map(re.escape, sorted(names))) + r')(?![\w-])')
+                for unit in purged:
+                    if unit.kind in (RULE, GLOBAL):
+                        referenced.update(name_pattern.findall(declarations(unit)))
+            dropped_keyframes = sum(1 for unit in purged if unit.kind == KEYFRAMES and unit.name not in referenced)
+            purged = [unit for unit in purged if unit.kind != KEYFRAMES or unit.name in referenced]
+
+        with profiling.phase('minify'):
+            minified_all = self._minify(units)[0]
+            output, duplicates = self._minify(purged)
+        self.stats = PurgeStats(dropped_selectors, dropped_rules, dropped_keyframes, duplicates)
+
+        original_data = b'\n'.join(original)
+        self.original_size, self.original_gzip_size = len(original_data), gzip_size(original_data)
+        self.minified_size, self.minified_gzip_size = len(minified_all), gzip_size(minified_all)
+        self.purged_size, self.purged_gzip_size = len(output), gzip_size(output)
+
+        self.output_file.parent.mkdir(parents=True, exist_ok=True)
+        self.output_file.write_bytes(output)
+        print(f"   {self.original_size:,} -> {self.purged_size:,} bytes "
+              f"({self.original_gzip_size:,} -> {self.purged_gzip_size:,} gzip) -> {self.output_file}")
+
+    def _minify(self, units) -> tuple:
+        """Minified bytes of units with identical rules written once; returns (data, duplicates)."""
+        minified = []
+        for unit in units:
+            text = minify_css(unit.text)
+            if text:
+                minified.append(unit._replace(text=text, context=tuple(map(minify_selector, unit.context))))
+
+        # An identical rule later in the same context wins wherever the earlier copy would
+        last = {}
+        for position, unit in enumerate(minified):
+            last[(unit.context, unit.text)] = position
+        deduplicated = [unit for position, unit in enumerate(minified) if last[(unit.context, unit.text)] == position]
+        data = render_units(deduplicated, compact=True).encode('utf-8')
+        return data, len(minified) - len(deduplicated)
+
+    def _saving(self, before: int, after: int) -> str:
+        return f"{before - after:,} bytes ({(before - after) / before * 100:.1f}%)" if before else "n/a"
+
+    def iter_report_lines(self) -> Iterator[str]:
+        """Yield the lines of the purge report one at a time."""
+        yield from [
+            "=" * 80,
+            "PURGED CSS BUILD REPORT",
+            "=" * 80,
+            "",
+            f"Analysis completed on: {self.base_path}",
+            f"Entry point: {self.entry}",
+            f"Stylesheets: {len(self.stylesheets)}",
+            f"Output: {self.output_file}",
+            "",
+            "SIZES:",
+            f"{'':<22}  {'Raw':>10}  {'gzip':>9}",
+            f"{'Original':<22}  {self.original_size:>10,}  {self.original_gzip_size:>9,}",
+            f"{'Minified only':<22}  {self.minified_size:>10,}  {self.minified_gzip_size:>9,}",
+            f"{'Purged and minified':<22}  {self.purged_size:>10,}  {self.purged_gzip_size:>9,}",
+            "",
+            f"Saved: {self._saving(self.original_size, self.purged_size)} raw, "
+            f"{self._saving(self.original_gzip_size, self.purged_gzip_size)} gzip",
+            "",
+            "REMOVED:",
+            f"- Unused selectors: {self.stats.selectors}",
+            f"- Rules left without selectors: {self.stats.rules}",
+            f"- Unreferenced @keyframes: {self.stats.keyframes}",
+            f"- Duplicate rules: {self.stats.duplicates}",
+            "",
+            "DROPPED SELECTORS:",
+            "-" * 80,
+        ]
+        for file_path, selector in self.removed:
+            yield f"{file_path}  {selector}"
+
+    def generate_report(self) -> str:
+        """Generate the purge report."""
+        return '\n'.join(self.iter_report_lines())
+
+    def report_summary(self) -> dict:
+        """Summary statistics for the structured report formats."""
+        return {
+            'report': 'purged-css',
+            'entry': self.entry,
+            'output': str(self.output_file),
+            'stylesheets': len(self.stylesheets),
+            'rules': self.rules,
+            'original_bytes': self.original_size,
+            'original_gzip_bytes': self.original_gzip_size,
+            'minified_bytes': self.minified_size,
+            'minified_gzip_bytes': self.minified_gzip_size,
+            'purged_bytes': self.purged_size,
+            'purged_gzip_bytes': self.purged_gzip_size,
+            'dropped_selectors': self.stats.selectors,
+            'dropped_rules': self.stats.rules,
+            'dropped_keyframes': self.stats.keyframes,
+            'duplicate_rules': self.stats.duplicates,
+        }
+
+    def iter_report_records(self) -> Iterator[dict]:
+        """Yield one record per dropped selector."""
+        for file_path, selector in self.removed:
+            yield {'type': 'selector', 'file': file_path, 'selector': selector}
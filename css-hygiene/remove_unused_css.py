@@ -1,157 +1,328 @@
 #!/usr/bin/env python3
+"""
+Unused CSS Removal
 
-import re
+Deletes the definitions of unused classes from the stylesheets in src/styles.
+Removal is driven by the byte offsets of the parsed rules, so it handles
+minified files, rules nested in @media/@supports and selector lists that mix
+used and unused classes.
+
+Features:
+- Drops only the selectors of a list that reference an unused class
+  (`.used, .unused {}` becomes `.used {}`)
+- Removes rules inside at-rules, and at-rules left empty by the removal
+- Never drops selectors whose unused class only appears inside :not(...) and
+  other functional pseudo-classes
+- Splices each file once from all of its edit spans
+- Keeps safelisted classes (dynamic class prefixes inferred from the sources
+  and patterns in css-hygiene/safelist.txt)
+- Writes through a temporary file and os.replace, so a file is never left
+  half-written
+- Processes files in parallel worker processes (--jobs N)
+- --dry-run prints a unified diff and the byte savings without writing
+"""
+
+import argparse
+import difflib
 import os
+import tempfile
+from collections import namedtuple
 from pathlib import Path
+from typing import Iterable, List, Set, Tuple
+
+import css_parser
+import profiling
+from css_parser import parse_css, parse_css_file, stylesheet_classes
+from parallel import parallel_map
+from session import AnalysisSession, default_base_path
+
+# Data structures
+Edit = namedtuple('Edit', ['start', 'end', 'replacement'])
+RemovalResult = namedtuple('RemovalResult', ['file_path', 'original_size', 'new_size', 'removed', 'diff', 'error'])
+
+# Stylesheets that hold imports or global rules and are never pruned
+SKIPPED_FILES = ('variables.css', 'reset.css', 'fonts.css', 'main.css', 'design-tokens.css')
+
+COMMA, OPEN_PAREN, CLOSE_PAREN = ord(','), ord('('), ord(')')
+OPEN_BRACKET, CLOSE_BRACKET = ord('['), ord(']')
+QUOTES = (ord('"'), ord("'"))
+WHITESPACE = b' \t\r\f'
+
 
 def extract_css_classes(file_path):
     """Extract all CSS class definitions from a file"""
-    classes = set()
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-        
-        # Match class selectors (excluding pseudo-classes and pseudo-elements)
-        pattern = r'^\s*\.([a-zA-Z0-9_-]+)(?:\s|{|,|:(?!:))'
-        
-        for line in content.split('\n'):
-            matches = re.findall(pattern, line, re.MULTILINE)
-            for match in matches:
-                classes.add(match)
-                
-    return classes
-
-def extract_used_classes(file_path):
-    """Extract used classes from the used-css-classes.txt file"""
-    used_classes = set()
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-        
-        # Extract classes from lines starting with "- "
-        for line in content.split('\n'):
-            line = line.strip()
-            if line.startswith('- '):
-                class_name = line[2:].strip()
-                if class_name and not class_name.startswith('`'):
-                    used_classes.add(class_name)
-                    
-    return used_classes
-
-def remove_unused_classes(css_file, unused_classes):
-    """Remove unused class definitions from a CSS file"""
-    
-    with open(css_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-        lines = content.split('\n')
-    
-    # Keep track of which lines to keep
-    new_lines = []
-    inside_unused_block = False
-    current_block = []
-    brace_count = 0
-    
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        
-        # Check if this line starts an unused class definition
-        class_match = re.match(r'^\s*\.([a-zA-Z0-9_-]+)(?:\s|{|,|:|$)', line)
-        
-        if class_match and not inside_unused_block:
-            class_name = class_match.group(1)
-            if class_name in unused_classes:
-                # Check if this is a complete rule on one line
-                if '{' in line and '}' in line:
-                    # Single line rule - skip it
-                    i += 1
-                    continue
-                elif '{' in line:
-                    # Start of a multi-line rule
-                    inside_unused_block = True
-                    brace_count = line.count('{') - line.count('}')
-                    current_block = [line]
-                else:
-                    # Class selector without opening brace yet
-                    # Look ahead to see if next line has the opening brace
-                    if i + 1 < len(lines) and '{' in lines[i + 1]:
-                        inside_unused_block = True
-                        current_block = [line]
-                    else:
-                        new_lines.append(line)
-            else:
-                new_lines.append(line)
-        elif inside_unused_block:
-            current_block.append(line)
-            brace_count += line.count('{') - line.count('}')
-            if brace_count <= 0:
-                # End of the unused block
-                inside_unused_block = False
-                current_block = []
-                brace_count = 0
-        else:
-            new_lines.append(line)
-        
-        i += 1
-    
-    # Remove extra empty lines (more than 2 consecutive)
-    final_lines = []
-    empty_count = 0
-    
-    for line in new_lines:
-        if line.strip() == '':
-            empty_count += 1
-            if empty_count <= 2:
-                final_lines.append(line)
+    return stylesheet_classes(parse_css_file(file_path))
+
+
+def _selector_parts(data: bytes, start: int, end: int) -> List[Tuple[int, int, Set[str]]]:
+    """Split the selector list at data[start:end] on top-level commas.
+
+    Returns (part_start, part_end, classes) where classes are the class tokens
+    outside any parentheses, i.e. the ones every matching element must carry.
+    """
+    parts = []
+    nested = []  # (open, close) offsets of parenthesized groups
+    part_start = start
+    depth = 0
+    open_at = None
+    pos = start
+    while pos < end:
+        char = data[pos]
+        if char in QUOTES:
+            close = data.find(bytes([char]), pos + 1, end)
+            pos = end if close == -1 else close + 1
+            continue
+        if char == OPEN_BRACKET:
+            close = data.find(b']', pos + 1, end)
+            pos = end if close == -1 else close + 1
+            continue
+        if data.startswith(b'/*', pos):
+            close = data.find(b'*/', pos + 2, end)
+            pos = end if close == -1 else close + 2
+            continue
+        if char == OPEN_PAREN:
+            if depth == 0:
+                open_at = pos
+            depth += 1
+        elif char == CLOSE_PAREN and depth:
+            depth -= 1
+            if depth == 0:
+                nested.append((open_at, pos))
+        elif char == COMMA and depth == 0:
+            parts.append((part_start, pos))
+            part_start = pos + 1
+        pos += 1
+    if depth:
+        nested.append((open_at, end))
+    parts.append((part_start, end))
+
+    result = []
+    for part_start, part_end in parts:
+        classes = {
+            token.name for token in css_parser.extract_selector_classes(data, part_start, part_end)
+            if not any(open_at < token.offset < close for open_at, close in nested)
+        }
+        result.append((part_start, part_end, classes))
+    return result
+
+
+def _line_span(data: bytes, start: int, end: int) -> Tuple[int, int]:
+    """Widen [start, end) to whole lines when nothing else shares those lines."""
+    line_start = start
+    while line_start > 0 and data[line_start - 1] in WHITESPACE:
+        line_start -= 1
+    if line_start > 0 and data[line_start - 1] != ord('\n'):
+        return start, end
+
+    line_end = end
+    while line_end < len(data) and data[line_end] in WHITESPACE:
+        line_end += 1
+    if line_end < len(data) and data[line_end] != ord('\n'):
+        return start, end
+    return line_start, min(line_end + 1, len(data))
+
+
+def _is_blank(data: bytes, start: int, end: int, removed: List[Tuple[int, int]]) -> bool:
+    """True if data[start:end] holds only whitespace and comments once `removed` spans are gone."""
+    pos = start
+    for span_start, span_end in removed:
+        if span_end <= pos or span_start >= end:
+            continue
+        if css_parser.COMMENT_PATTERN.sub(b'', data[pos:span_start]).strip():
+            return False
+        pos = max(pos, span_end)
+    return not css_parser.COMMENT_PATTERN.sub(b'', data[pos:end]).strip()
+
+
+def removal_edits(sheet: css_parser.Stylesheet, unused_classes: Set[str]) -> Tuple[List[Edit], int]:
+    """Compute the edits that remove unused classes from a parsed stylesheet.
+
+    Returns (edits, removed) where edits are sorted, non-overlapping spans and
+    removed counts the selectors dropped.
+    """
+    data = sheet.data
+    edits = []
+    removed = 0
+
+    for rule in sheet.rules:
+        if not rule.classes or not any(token.name in unused_classes for token in rule.classes):
+            continue
+        parts = _selector_parts(data, rule.start, rule.block_start)
+        kept = [(start, end) for start, end, classes in parts if not classes & unused_classes]
+        if len(kept) == len(parts):
+            continue
+        removed += len(parts) - len(kept)
+        if not kept:
+            start, end = _line_span(data, rule.start, rule.end)
+            edits.append(Edit(start, end, b''))
         else:
-            empty_count = 0
-            final_lines.append(line)
-    
-    # Write back the cleaned content
-    with open(css_file, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(final_lines))
+            selector = b', '.join(data[start:end].strip() for start, end in kept)
+            selector_end = rule.block_start
+            while selector_end > rule.start and data[selector_end - 1] in WHITESPACE + b'\n':
+                selector_end -= 1
+            edits.append(Edit(rule.start, selector_end, selector))
+    return deletion_edits(sheet, edits), removed
 
-def main():
-    # Define paths
-    styles_dir = "/mnt/c/Rare/GitHub/greys-anatomy-report/src/styles"
-    used_classes_file = "/mnt/c/Rare/GitHub/greys-anatomy-report/used-css-classes.txt"
-    
-    # Extract used classes
-    used_classes = extract_used_classes(used_classes_file)
+
+def deletion_edits(sheet: css_parser.Stylesheet, edits: List[Edit]) -> List[Edit]:
+    """Complete edits that delete rules with the deletion of at-rules they leave empty.
+
+    Returns sorted, non-overlapping edits; edits inside a larger deletion are dropped.
+    """
+    data = sheet.data
+    edits = list(edits)
+
+    # At-rules emptied by the removal go too, innermost first
+    deleted = sorted((edit.start, edit.end) for edit in edits if not edit.replacement)
+    for at_rule in sorted(sheet.at_rules, key=lambda at_rule: (at_rule.end or 0) - at_rule.start):
+        if at_rule.block_start is None or not deleted:
+            continue
+        inner = [span for span in deleted if at_rule.block_start < span[0] and span[1] <= at_rule.end]
+        if inner and _is_blank(data, at_rule.block_start + 1, at_rule.end - 1, inner):
+            start, end = _line_span(data, at_rule.start, at_rule.end)
+            edits.append(Edit(start, end, b''))
+            deleted = sorted(deleted + [(start, end)])
+
+    # Drop edits contained in a larger deletion
+    edits.sort(key=lambda edit: (edit.start, -edit.end))
+    merged = []
+    for edit in edits:
+        if merged and edit.start < merged[-1].end:
+            continue
+        merged.append(edit)
+    return merged
+
+
+def apply_edits(data: bytes, edits: Iterable[Edit]) -> bytes:
+    """Splice sorted, non-overlapping edits into data in one pass."""
+    view = memoryview(data)
+    chunks = []
+    pos = 0
+    for edit in edits:
+        chunks.append(view[pos:edit.start])
+        chunks.append(edit.replacement)
+        pos = edit.end
+    chunks.append(view[pos:])
+    return b''.join(chunks)
+
+
+def atomic_write(file_path: Path, data: bytes) -> None:
+    """Replace a file's content through a temporary file in the same directory."""
+    file_path = Path(file_path)
+    fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f'.{file_path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, os.stat(file_path).st_mode & 0o7777)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def unified_diff(file_path: str, before: bytes, after: bytes) -> str:
+    """Return a unified diff of a stylesheet before and after removal."""
+    return ''.join(difflib.unified_diff(
+        css_parser.decode(before).splitlines(keepends=True),
+        css_parser.decode(after).splitlines(keepends=True),
+        fromfile=f'a/{file_path}', tofile=f'b/{file_path}'
+    ))
+
+
+def remove_unused_classes(css_file, unused_classes, dry_run=False, label=None):
+    """Remove unused class definitions from a CSS file"""
+    with profiling.phase('read', file=str(css_file)):
+        with open(css_file, 'rb') as f:
+            data = f.read()
+    with profiling.phase('tokenize', file=str(css_file)):
+        sheet = parse_css(data, css_file)
+
+    with profiling.phase('edit', file=str(css_file)):
+        edits, removed = removal_edits(sheet, set(unused_classes))
+        new_data = apply_edits(data, edits) if edits else data
+
+    diff = None
+    if dry_run:
+        diff = unified_diff(label or str(css_file), data, new_data) if edits else ''
+    elif edits:
+        with profiling.phase('write', file=str(css_file)):
+            atomic_write(css_file, new_data)
+    return RemovalResult(str(label or css_file), len(data), len(new_data), removed, diff, None)
+
+
+def _remove_task(task: Tuple[str, str, frozenset, bool]) -> RemovalResult:
+    """Remove unused classes from one file in a worker process."""
+    css_file, label, unused_classes, dry_run = task
+    try:
+        return remove_unused_classes(css_file, unused_classes, dry_run, label)
+    except Exception as e:
+        return RemovalResult(label, 0, 0, 0, None, f"Error processing {label}: {e}")
+
+
+def remove_unused(session, dry_run=False):
+    """Remove unused class definitions from every stylesheet in src/styles"""
+    # Extract used classes from the JSX/JS sources
+    used_classes = session.used_classes()
     print(f"Found {len(used_classes)} used CSS classes")
-    
+
     # Find all CSS files
-    css_files = []
-    for root, dirs, files in os.walk(styles_dir):
-        for file in files:
-            if file.endswith('.css'):
-                css_files.append(os.path.join(root, file))
-    
+    styles_dir = session.base_path / 'src' / 'styles'
+    css_files = sorted(styles_dir.rglob('*.css'))
     print(f"Found {len(css_files)} CSS files")
-    
-    # Process each CSS file
+
+    # Skip certain files that might be imports or have special rules
+    css_files = [css_file for css_file in css_files if not css_file.name.endswith(SKIPPED_FILES)]
+
+    # Classes composed at runtime or listed in safelist.txt are never removed
+    safelist = session.safelist()
+
+    tasks = []
+    for summary in session.summarize(css_files):
+        unused_classes = set(summary.classes) - used_classes
+        unused_classes -= safelist.filter(unused_classes).keys()
+        if unused_classes:
+            tasks.append((str(session.base_path / summary.file_path), summary.file_path,
+                          frozenset(unused_classes), dry_run))
+
+    # Each file is parsed, spliced and written independently
     total_removed = 0
-    
-    for css_file in sorted(css_files):
-        # Skip certain files that might be imports or have special rules
-        if css_file.endswith(('variables.css', 'reset.css', 'fonts.css', 'main.css', 'design-tokens.css')):
+    total_saved = 0
+    for result in parallel_map(_remove_task, tasks, session.jobs):
+        if result.error:
+            print(result.error)
             continue
-            
-        # Extract classes from this file
-        defined_classes = extract_css_classes(css_file)
-        unused_classes = defined_classes - used_classes
-        
-        if unused_classes:
-            relative_path = css_file.replace("/mnt/c/Rare/GitHub/greys-anatomy-report/", "")
-            print(f"\nProcessing {relative_path} - removing {len(unused_classes)} unused classes")
-            
-            # Remove unused classes
-            remove_unused_classes(css_file, unused_classes)
-            total_removed += len(unused_classes)
-            
+        if dry_run and result.diff:
+            print(result.diff, end='')
+        saved = result.original_size - result.new_size
+        print(f"\n{'Would remove' if dry_run else 'Removed'} {result.removed} selectors from "
+              f"{result.file_path} ({saved:,} bytes)")
+        total_removed += result.removed
+        total_saved += saved
+
     print(f"\n{'='*80}")
-    print(f"COMPLETED: Removed {total_removed} unused CSS class definitions")
+    if dry_run:
+        print(f"DRY RUN: Would remove {total_removed} unused selectors, saving {total_saved:,} bytes")
+    else:
+        print(f"COMPLETED: Removed {total_removed} unused selectors, saving {total_saved:,} bytes")
     print(f"{'='*80}")
+    return total_removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove unused CSS class definitions from src/styles.")
+    parser.add_argument('--base-path', default=None,
+                        help="Repository to clean (default: the repository containing css-hygiene/)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Print a unified diff and the byte savings without writing")
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help="Worker processes (default: all cores)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignore and do not update .css-hygiene-cache/")
+    args = parser.parse_args()
+
+    session = AnalysisSession(args.base_path or default_base_path(), use_cache=not args.no_cache, jobs=args.jobs)
+    remove_unused(session, dry_run=args.dry_run)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Streaming Report Writer
+
+Writes css-hygiene reports section by section as they are produced instead of
+building the whole report in memory first. Three formats are supported:
+
+- text:   the human-readable report (one line at a time)
+- json:   {"summary": {...}, "records": [...]} with records streamed into the array
+- ndjson: a summary line followed by one JSON record per line
+
+Records are flat dicts, one per class or definition, so downstream tools can
+stream-parse the output.
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable, TextIO, Union
+
+import profiling
+
+FORMATS = ('text', 'json', 'ndjson')
+EXTENSIONS = {'text': '.txt', 'json': '.json', 'ndjson': '.ndjson'}
+
+
+def output_path_for(path: Union[str, Path], fmt: str) -> Path:
+    """Return the report path with the extension matching the output format."""
+    return Path(path).with_suffix(EXTENSIONS[fmt])
+
+
+class ReportWriter:
+    def __init__(self, stream: TextIO, fmt: str = 'text'):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown report format '{fmt}' (expected one of {', '.join(FORMATS)})")
+        self.stream = stream
+        self.format = fmt
+        self.records_written = 0
+        self._json_state = None
+        self._lines_started = False
+
+    def write_lines(self, lines: Iterable[str]) -> None:
+        """Stream text report lines (ignored by the structured formats)."""
+        if self.format != 'text':
+            return
+        write = self.stream.write
+        for line in lines:
+            # Lines are newline-separated, matching "\n".join(lines)
+            if self._lines_started:
+                write('\n')
+            write(line)
+            self._lines_started = True
+
+    def write_summary(self, summary: dict) -> None:
+        """Write the summary object (structured formats only)."""
+        if self.format == 'ndjson':
+            self.stream.write(json.dumps(dict(summary, type='summary'), ensure_ascii=False) + '\n')
+        elif self.format == 'json':
+            self.stream.write('{"summary": ' + json.dumps(summary, ensure_ascii=False) + ', "records": [')
+            self._json_state = 'open'
+
+    def write_records(self, records: Iterable[dict]) -> None:
+        """Stream records, one at a time (structured formats only)."""
+        if self.format == 'text':
+            return
+        write = self.stream.write
+        if self.format == 'json' and self._json_state is None:
+            write('{"records": [')
+            self._json_state = 'open'
+        for record in records:
+            if self.format == 'ndjson':
+                write(json.dumps(record, ensure_ascii=False) + '\n')
+            else:
+                write((',\n' if self.records_written else '\n') + json.dumps(record, ensure_ascii=False))
+            self.records_written += 1
+
+    def close(self) -> None:
+        """Terminate the JSON document, if one was opened."""
+        if self.format == 'json':
+            if self._json_state is None:
+                self.stream.write('{"records": [')
+            self.stream.write('\n]}\n')
+            self._json_state = 'closed'
+
+
+def write_report(analyzer, output_file: Union[str, Path], fmt: str = 'text') -> None:
+    """Stream an analyzer's report to output_file in the requested format.
+
+    The analyzer provides iter_report_lines() for text output and
+    report_summary() / iter_report_records() for the structured formats.
+    """
+    with profiling.phase('report', format=fmt), open(output_file, 'w', encoding='utf-8') as f:
+        writer = ReportWriter(f, fmt)
+        if fmt == 'text':
+            writer.write_lines(analyzer.iter_report_lines())
+        else:
+            writer.write_summary(analyzer.report_summary())
+            writer.write_records(analyzer.iter_report_records())
+        writer.close()
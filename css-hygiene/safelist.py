@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Class Safelist
+
+Classes that must never be reported as unused or removed even though no
+className sink names them literally. Two sources feed the safelist:
+
+- Dynamic class fragments inferred from the JSX/JS sources by
+  jsx_class_extractor.py: `checkbox-label--${id}` keeps every class starting
+  with checkbox-label--, `${size}-btn` every class ending with -btn
+- User patterns in css-hygiene/safelist.txt, one per line:
+      chart-tooltip        exact class name
+      chart-*              glob (*, ?, [...])
+      /^wave-(a|b)$/       regular expression (matched anywhere in the name;
+                           no named groups or backreferences)
+  Blank lines and lines starting with # are ignored.
+
+All patterns are compiled into one matcher: exact names go into a set,
+prefixes and suffixes into character tries, and the remaining globs and
+regular expressions into a single alternation, so checking a class costs
+O(length of the name) for the common cases rather than one test per pattern.
+"""
+
+import fnmatch
+import re
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+# Data structures
+SafelistPattern = namedtuple('SafelistPattern', ['kind', 'pattern', 'origin'])
+
+SAFELIST_FILE = 'safelist.txt'
+
+GLOB_CHARS = '*?['
+
+BACKREFERENCE_PATTERN = re.compile(r'\(\?P[<=]|\\[1-9]')
+
+# Leading inline flags such as (?i), global to the whole expression they start
+GLOBAL_FLAGS_PATTERN = re.compile(r'\(\?([aiLmsux]+)\)')
+
+# Key of the trie node field holding the pattern that ends at that node
+_END = ''
+
+
+def default_safelist_path(base_path: Union[str, Path]) -> Path:
+    """Return the user safelist of an analyzed repository."""
+    return Path(base_path) / 'css-hygiene' / SAFELIST_FILE
+
+
+def load_safelist_file(file_path: Union[str, Path]) -> List[SafelistPattern]:
+    """Read user patterns from a safelist file (missing file: no patterns)."""
+    file_path = Path(file_path)
+    try:
+        lines = file_path.read_text(encoding='utf-8').splitlines()
+    except FileNotFoundError:
+        return []
+
+    patterns = []
+    for line_number, line in enumerate(lines, 1):
+        entry = line.strip()
+        if not entry or entry.startswith('#'):
+            continue
+        origin = f"{file_path.name}:{line_number}"
+        if len(entry) > 1 and entry.startswith('/') and entry.endswith('/'):
+            patterns.append(SafelistPattern('regex', entry[1:-1], origin))
+        else:
+            patterns.append(SafelistPattern('glob', entry.lstrip('.'), origin))
+    return patterns
+
+
+def inferred_patterns(dynamic_classes: Dict[str, Iterable]) -> List[SafelistPattern]:
+    """Prefix and suffix patterns from the dynamic class fragments of each source file."""
+    patterns = []
+    for rel_path, fragments in sorted(dynamic_classes.items()):
+        for fragment in fragments:
+            origin = f"{rel_path}:{fragment.line_number}"
+            if fragment.prefix:
+                patterns.append(SafelistPattern('prefix', fragment.prefix, origin))
+            if fragment.suffix:
+                patterns.append(SafelistPattern('suffix', fragment.suffix, origin))
+    return patterns
+
+
+def _scoped(pattern: str) -> str:
+    """Wrap a regex in a group, turning leading global flags into scoped ones.
+
+    >>> _scoped('(?i)btn-.*')
+    '(?i:btn-.*)'
+    >>> _scoped('btn-.*')
+    '(?:btn-.*)'
+    """
+    flags = ''
+    found = GLOBAL_FLAGS_PATTERN.match(pattern)
+    while found:
+        flags += found.group(1)
+        pattern = pattern[found.end():]
+        found = GLOBAL_FLAGS_PATTERN.match(pattern)
+    return f"(?{flags}:{pattern})"
+
+
+class _Trie:
+    """Character trie answering "which stored string is a prefix of this name?"."""
+
+    __slots__ = ('root',)
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, key: str, label: str) -> None:
+        node = self.root
+        for char in key:
+            node = node.setdefault(char, {})
+        node.setdefault(_END, label)
+
+    def match(self, name: str) -> Optional[str]:
+        """Label of the shortest stored prefix of name, or None."""
+        node = self.root
+        for char in name:
+            node = node.get(char)
+            if node is None:
+                return None
+            if _END in node:
+                return node[_END]
+        return None
+
+
+class Safelist:
+    def __init__(self, patterns: Iterable[SafelistPattern] = ()):
+        self.patterns: List[SafelistPattern] = []
+        self.exact: Dict[str, str] = {}
+        self.prefixes = _Trie()
+        self.suffixes = _Trie()  # keys stored reversed
+        self._others: List[str] = []
+        self._other_labels: List[str] = []
+        self._combined = None
+        for pattern in patterns:
+            self.add(pattern)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def add(self, pattern: SafelistPattern) -> None:
+        """Route one pattern to the set, a trie or the combined expression."""
+        self.patterns.append(pattern)
+        label = f"{pattern.pattern!r} ({pattern.origin})"
+        text = pattern.pattern
+        if pattern.kind == 'prefix':
+            self.prefixes.add(text, label)
+        elif pattern.kind == 'suffix':
+            self.suffixes.add(text[::-1], label)
+        elif pattern.kind == 'glob' and not any(char in text for char in GLOB_CHARS):
+            self.exact.setdefault(text, label)
+        elif pattern.kind == 'glob' and text.endswith('*') and not any(char in text[:-1] for char in GLOB_CHARS):
+            self.prefixes.add(text[:-1], label)
+        elif pattern.kind == 'glob' and text.startswith('*') and not any(char in text[1:] for char in GLOB_CHARS):
+            self.suffixes.add(text[:0:-1], label)
+        else:
+            if pattern.kind == 'glob':
+                expression = fnmatch.translate(text)
+            else:
+                expression = f".*?{_scoped(pattern.pattern)}"
+                error = None
+                # Named groups and backreferences would clash inside the combined expression
+                if BACKREFERENCE_PATTERN.search(pattern.pattern):
+                    error = "named groups and backreferences are not supported"
+                else:
+                    # Validate the fragment exactly as it appears in the combined expression
+                    try:
+                        re.compile(f"(?P<p0>{expression})", re.DOTALL)
+                    except re.error as e:
+                        error = e
+                if error is not None:
+                    print(f"Warning: ignoring invalid safelist regex {label}: {error}")
+                    self.patterns.pop()
+                    return
+            self._others.append(expression)
+            self._other_labels.append(label)
+            self._combined = None
+
+    def _expression(self):
+        """One compiled alternation of every glob and regex, each in its own group."""
+        if self._combined is None and self._others:
+            self._combined = re.compile('|'.join(
+                f"(?P<p{index}>{expression})" for index, expression in enumerate(self._others)
+            ), re.DOTALL)
+        return self._combined
+
+    def match(self, class_name: str) -> Optional[str]:
+        """Return the pattern (with its origin) that keeps a class, or None."""
+        label = self.exact.get(class_name)
+        if label is None:
+            label = self.prefixes.match(class_name)
+        if label is None:
+            label = self.suffixes.match(class_name[::-1])
+        if label is None:
+            expression = self._expression()
+            if expression:
+                found = expression.match(class_name)
+                if found:
+                    label = self._other_labels[int(found.lastgroup[1:])]
+        return label
+
+    def filter(self, class_names: Iterable[str]) -> Dict[str, str]:
+        """Map every safelisted class among class_names to its pattern."""
+        kept = {}
+        for class_name in class_names:
+            label = self.match(class_name)
+            if label is not None:
+                kept[class_name] = label
+        return kept
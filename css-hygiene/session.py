@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Analysis Session
+
+State shared by every css-hygiene analysis run in one process. A session
+parses each stylesheet and scans the source tree at most once, so running the
+unused, duplicate and removal passes together costs a single parse of the
+tree instead of one per tool.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import profiling
+from class_table import ClassTable
+from css_parser import DEFAULT_TIME_BUDGET
+from jsx_class_extractor import DynamicClass, collect_source_scans, scan_source_file
+from parse_cache import ParseCache, default_cache_dir
+from safelist import Safelist, default_safelist_path, inferred_patterns, load_safelist_file
+from stylesheet_summary import StylesheetSummary, summarize_stylesheets
+
+
+def default_base_path() -> Path:
+    """Return the repository that contains the css-hygiene directory."""
+    return Path(__file__).resolve().parent.parent
+
+
+class AnalysisSession:
+    def __init__(self, base_path: Union[str, Path], use_cache: bool = True, jobs: Optional[int] = None,
+                 time_budget: Optional[float] = DEFAULT_TIME_BUDGET):
+        self.base_path = Path(base_path)
+        self.cache_dir = default_cache_dir(self.base_path) if use_cache else None
+        self.jobs = jobs
+        self.time_budget = time_budget
+        self.summaries: Dict[str, Optional[StylesheetSummary]] = {}  # absolute path -> summary
+        self.parsed = 0
+        self.cached = 0
+        self.classes = ClassTable()  # class-name IDs shared by every analyzer of the session
+        self._class_rows: Dict[Tuple[str, str], int] = {}
+        self._source_classes = None
+        self._used_classes = None
+        self._dynamic_classes = None
+        self._safelist = None
+        self.scopes: Dict[str, object] = {}  # git ref -> analysis of the changes since it (git_scope.py)
+
+    def summarize(self, files: Iterable[Path]) -> List[StylesheetSummary]:
+        """Return summaries of the given stylesheets, parsing each file at most once per session."""
+        files = [Path(file_path) for file_path in files]
+        missing = [file_path for file_path in files if str(file_path) not in self.summaries]
+
+        if missing:
+            cache = ParseCache(self.cache_dir, 'stylesheets') if self.cache_dir else None
+            with profiling.phase('stylesheets'):
+                summaries = summarize_stylesheets(missing, self.base_path, cache, self.jobs, self.time_budget)
+            by_path = {summary.file_path: summary for summary in summaries}
+            for file_path in missing:
+                # Files that failed to parse are remembered as None so they are reported once
+                self.summaries[str(file_path)] = by_path.get(str(file_path.relative_to(self.base_path)))
+            if cache:
+                profiling.count('cache.stylesheet_hits', cache.hits)
+                self.parsed += cache.misses
+                self.cached += cache.hits
+                cache.save()
+            else:
+                self.parsed += len(missing)
+
+        return [self.summaries[str(file_path)] for file_path in files if self.summaries[str(file_path)]]
+
+    def forget_stylesheet(self, file_path: Path) -> None:
+        """Drop the summary of a changed stylesheet so the next summarize() re-reads it."""
+        self.summaries.pop(str(file_path), None)
+
+    def class_row(self, summary: StylesheetSummary) -> int:
+        """Return the class bitset of a summarized stylesheet, built at most once per session."""
+        key = (summary.file_path, summary.digest)
+        row = self._class_rows.get(key)
+        if row is None:
+            row = self._class_rows[key] = self.classes.mask(summary.classes)
+        return row
+
+    def _scan_sources(self) -> None:
+        """Scan the JSX/JS sources once for used classes and dynamic class fragments."""
+        cache = ParseCache(self.cache_dir, 'sources') if self.cache_dir else None
+        with profiling.phase('sources'):
+            scans = collect_source_scans(self.base_path, self.jobs, cache)
+        self._source_classes = {
+            rel_path: frozenset(usage.class_name for usage in usages) for rel_path, (usages, _) in scans.items()
+        }
+        self._used_classes = set().union(*self._source_classes.values())
+        self._dynamic_classes = {rel_path: dynamic for rel_path, (_, dynamic) in scans.items() if dynamic}
+
+    def used_classes(self) -> Set[str]:
+        """Return the classes used by the JSX/JS sources, scanning the tree at most once."""
+        if self._used_classes is None:
+            self._scan_sources()
+        return self._used_classes
+
+    def source_classes(self) -> Dict[str, frozenset]:
+        """Return the classes used by each JSX/JS source file, keyed by relative path."""
+        if self._source_classes is None:
+            self._scan_sources()
+        return self._source_classes
+
+    def dynamic_classes(self) -> Dict[str, List[DynamicClass]]:
+        """Return the dynamically composed class fragments of each source file."""
+        if self._dynamic_classes is None:
+            self._scan_sources()
+        return self._dynamic_classes
+
+    def rescan_source(self, file_path: Path) -> None:
+        """Re-scan one changed (or deleted) JSX/JS source file."""
+        source_classes, dynamic_classes = self.source_classes(), self.dynamic_classes()
+        rel_path = str(Path(file_path).relative_to(self.base_path))
+        if Path(file_path).exists():
+            scan = scan_source_file(str(file_path))
+            source_classes[rel_path] = frozenset(usage.class_name for usage in scan.usages)
+            dynamic = scan.dynamic
+        else:
+            source_classes.pop(rel_path, None)
+            dynamic = []
+        self._used_classes = set().union(*source_classes.values())
+
+        # A changed dynamic class fragment changes the inferred safelist
+        if dynamic != dynamic_classes.get(rel_path, []):
+            if dynamic:
+                dynamic_classes[rel_path] = dynamic
+            else:
+                dynamic_classes.pop(rel_path, None)
+            self._safelist = None
+        self.scopes: Dict[str, object] = {}  # git ref -> analysis of the changes since it (git_scope.py)
+
+    def reload_safelist(self) -> None:
+        """Re-read css-hygiene/safelist.txt on the next safelist() call."""
+        self._safelist = None
+        self.scopes: Dict[str, object] = {}  # git ref -> analysis of the changes since it (git_scope.py)
+
+    def safelist(self) -> Safelist:
+        """Return the safelist: inferred dynamic-class patterns plus css-hygiene/safelist.txt."""
+        if self._safelist is None:
+            self._safelist = Safelist(
+                inferred_patterns(self.dynamic_classes()) + load_safelist_file(default_safelist_path(self.base_path))
+            )
+        return self._safelist
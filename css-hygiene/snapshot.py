@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Analysis Snapshots and Run-to-Run Deltas
+
+Stores the state behind the unused and duplicate reports as a compact binary
+snapshot, and compares two snapshots without parsing anything: reviewers and
+CI read what changed since a baseline run instead of diffing full reports.
+
+A snapshot holds the interned class table (class_table.py), one class bitset
+and the byte size per stylesheet, the bitsets of used and safelisted classes
+and an 8-byte hash of each class definition per file. Unused and duplicated
+classes are derived from the bitsets when two snapshots are compared, the way
+the analyzers derive them from a fresh parse.
+
+Features:
+- Little-endian struct records in one zlib stream behind a versioned header;
+  no pickle, so snapshots from other machines are safe to load
+- New unused classes and classes no longer unused
+- New and resolved duplicates, and duplicates whose definitions diverged or
+  became identical
+- Byte deltas per stylesheet and for all stylesheets together
+- Regressions (new unused classes, new duplicates) for failing CI builds
+
+Usage:
+    python css-hygiene/snapshot.py BASELINE CURRENT [--fail-on-regression]
+"""
+
+import argparse
+import struct
+import sys
+import time
+import zlib
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Union
+
+import profiling
+from class_table import ClassTable, iter_bits
+
+# Data structures
+Snapshot = namedtuple('Snapshot', ['created', 'names', 'files', 'used', 'safelisted', 'hashes'])
+FileState = namedtuple('FileState', ['file_path', 'size', 'classes'])
+ClassDelta = namedtuple('ClassDelta', ['class_name', 'change', 'files'])
+ByteDelta = namedtuple('ByteDelta', ['file_path', 'before', 'after'])
+
+SNAPSHOT_FILE = 'css-hygiene.snapshot'
+MAGIC = b'CSSHSNAP'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sHd')  # magic, format version, creation time
+COUNT = struct.Struct('<I')
+FILE_SIZE = struct.Struct('<Q')
+DEFINITION = struct.Struct('<II8s')  # class ID, file index, definition hash
+
+# Change kinds, in report order, with their report headings
+CHANGES = (
+    ('new-unused', "NEW UNUSED CLASSES"),
+    ('now-used', "NO LONGER UNUSED (used again or removed)"),
+    ('new-duplicate', "NEW DUPLICATES (defined in more than one stylesheet)"),
+    ('duplicate-resolved', "RESOLVED DUPLICATES"),
+    ('duplicate-diverged', "DUPLICATES WHOSE DEFINITIONS DIVERGED"),
+    ('duplicate-identical', "DUPLICATES WHOSE DEFINITIONS BECAME IDENTICAL"),
+)
+REGRESSIONS = ('new-unused', 'new-duplicate')
+
+
+def build_snapshot(session) -> Snapshot:
+    """Snapshot of the session's stylesheets, used classes and safelist."""
+    from css_duplicate_analyzer import CSSClassAnalyzer
+
+    css_files = CSSClassAnalyzer(session.base_path, session=session).find_css_files()
+    table = ClassTable()
+    files = []
+    hashes = {}
+    with profiling.phase('snapshot'):
+        for summary in session.summarize(css_files):
+            file_index = len(files)
+            files.append(FileState(summary.file_path, summary.size, table.mask(sorted(summary.classes))))
+            for class_name, definition in summary.definitions:
+                hashes[(table.ids[class_name], file_index)] = bytes.fromhex(definition.content_hash[:16])
+        defined = table.names[:]
+        used = table.mask(session.used_classes(), add=False)
+        safelisted = table.mask(session.safelist().filter(defined).keys(), add=False)
+    return Snapshot(time.time(), defined, files, used, safelisted, hashes)
+
+
+def _mask_bytes(mask: int) -> bytes:
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+    return COUNT.pack(len(data)) + data
+
+
+def _text_bytes(text: str) -> bytes:
+    data = text.encode('utf-8')
+    return COUNT.pack(len(data)) + data
+
+
+def encode_snapshot(snapshot: Snapshot) -> bytes:
+    """Serialize a snapshot to its binary form."""
+    body = [_text_bytes('\n'.join(snapshot.names)), COUNT.pack(len(snapshot.files))]
+    for state in snapshot.files:
+        body += [_text_bytes(state.file_path), FILE_SIZE.pack(state.size), _mask_bytes(state.classes)]
+    body += [_mask_bytes(snapshot.used), _mask_bytes(snapshot.safelisted), COUNT.pack(len(snapshot.hashes))]
+    body += [DEFINITION.pack(class_id, file_index, digest)
+             for (class_id, file_index), digest in sorted(snapshot.hashes.items())]
+    return HEADER.pack(MAGIC, FORMAT_VERSION, snapshot.created) + zlib.compress(b''.join(body), 9)
+
+
+def decode_snapshot(data: bytes) -> Snapshot:
+    """Parse the binary form of a snapshot; raises ValueError if it is not one."""
+    if len(data) < HEADER.size:
+        raise ValueError("not a css-hygiene snapshot")
+    magic, version, created = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a css-hygiene snapshot")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"snapshot format {version} is not supported (expected {FORMAT_VERSION})")
+    try:
+        body = memoryview(zlib.decompress(data[HEADER.size:]))
+    except zlib.error as e:
+        raise ValueError(f"corrupt snapshot: {e}")
+    pos = 0
+
+    def take(size: int) -> memoryview:
+        nonlocal pos
+        if pos + size > len(body):
+            raise ValueError("truncated snapshot")
+        chunk = body[pos:pos + size]
+        pos += size
+        return chunk
+
+    def take_count() -> int:
+        return COUNT.unpack(take(COUNT.size))[0]
+
+    def take_text() -> str:
+        return str(take(take_count()), 'utf-8')
+
+    def take_mask() -> int:
+        return int.from_bytes(take(take_count()), 'little')
+
+    names = take_text()
+    names = names.split('\n') if names else []
+    files = []
+    for _ in range(take_count()):
+        file_path = take_text()
+        size = FILE_SIZE.unpack(take(FILE_SIZE.size))[0]
+        files.append(FileState(file_path, size, take_mask()))
+    used, safelisted = take_mask(), take_mask()
+    count = take_count()
+    definitions = take(count * DEFINITION.size)
+    hashes = {(class_id, file_index): digest
+              for class_id, file_index, digest in DEFINITION.iter_unpack(definitions)}
+    return Snapshot(created, names, files, used, safelisted, hashes)
+
+
+def write_snapshot(snapshot: Snapshot, path: Union[str, Path]) -> int:
+    """Write a snapshot file; returns its size in bytes."""
+    data = encode_snapshot(snapshot)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return len(data)
+
+
+def read_snapshot(path: Union[str, Path]) -> Snapshot:
+    """Read a snapshot file; raises ValueError if it cannot be read."""
+    try:
+        data = Path(path).read_bytes()
+    except OSError as e:
+        raise ValueError(f"cannot read snapshot {path}: {e}")
+    return decode_snapshot(data)
+
+
+class SnapshotView:
+    """Name-level view of a snapshot's unused and duplicated classes."""
+
+    def __init__(self, snapshot: Snapshot):
+        self.snapshot = snapshot
+        names = snapshot.names
+        keep = snapshot.used | snapshot.safelisted
+        self.defined: Dict[str, List[str]] = {}  # class -> files defining it
+        self.unused: Dict[str, List[str]] = {}   # class -> files defining it, if unused
+        for state in snapshot.files:
+            for class_id in iter_bits(state.classes):
+                self.defined.setdefault(names[class_id], []).append(state.file_path)
+            for class_id in iter_bits(state.classes & ~keep):
+                self.unused.setdefault(names[class_id], []).append(state.file_path)
+        self.duplicated = {name for name, files in self.defined.items() if len(files) > 1}
+        self.digests: Dict[str, Set[bytes]] = {}  # class -> distinct definition hashes
+        for (class_id, _), digest in snapshot.hashes.items():
+            self.digests.setdefault(names[class_id], set()).add(digest)
+        self.sizes = {state.file_path: state.size for state in snapshot.files}
+
+    def is_identical(self, class_name: str) -> bool:
+        """True if every file defines a class with the same declarations."""
+        return len(self.digests.get(class_name, ())) == 1
+
+
+class SnapshotDelta:
+    def __init__(self, baseline: Snapshot, current: Snapshot, baseline_label: str = 'baseline'):
+        self.baseline = baseline
+        self.current = current
+        self.baseline_label = baseline_label
+        self.changes: List[ClassDelta] = []
+        self.byte_deltas: List[ByteDelta] = []
+        self.size_before = self.size_after = 0
+
+    def analyze(self) -> None:
+        """Compare the two snapshots."""
+        with profiling.phase('delta'):
+            then, now = SnapshotView(self.baseline), SnapshotView(self.current)
+            changes = []
+            for class_name in sorted(now.unused.keys() - then.unused.keys()):
+                changes.append(ClassDelta(class_name, 'new-unused', now.unused[class_name]))
+            for class_name in sorted(then.unused.keys() - now.unused.keys()):
+                changes.append(ClassDelta(class_name, 'now-used', now.defined.get(class_name, [])))
+            for class_name in sorted(now.duplicated - then.duplicated):
+                changes.append(ClassDelta(class_name, 'new-duplicate', now.defined[class_name]))
+            for class_name in sorted(then.duplicated - now.duplicated):
+                changes.append(ClassDelta(class_name, 'duplicate-resolved', now.defined.get(class_name, [])))
+            for class_name in sorted(now.duplicated & then.duplicated):
+                identical_then, identical_now = then.is_identical(class_name), now.is_identical(class_name)
+                if identical_then != identical_now:
+                    change = 'duplicate-identical' if identical_now else 'duplicate-diverged'
+                    changes.append(ClassDelta(class_name, change, now.defined[class_name]))
+            order = {change: index for index, (change, _) in enumerate(CHANGES)}
+            self.changes = sorted(changes, key=lambda entry: order[entry.change])
+
+            for file_path in sorted(then.sizes.keys() | now.sizes.keys()):
+                before, after = then.sizes.get(file_path, 0), now.sizes.get(file_path, 0)
+                if before != after:
+                    self.byte_deltas.append(ByteDelta(file_path, before, after))
+            self.size_before, self.size_after = sum(then.sizes.values()), sum(now.sizes.values())
+
+    def count(self, change: str) -> int:
+        """Number of classes with one kind of change."""
+        return sum(1 for entry in self.changes if entry.change == change)
+
+    def regressions(self) -> List[ClassDelta]:
+        """New unused classes and new duplicates."""
+        return [entry for entry in self.changes if entry.change in REGRESSIONS]
+
+    def iter_report_lines(self) -> Iterator[str]:
+        """Yield the lines of the delta report one at a time; sections without changes are left out."""
+        created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.baseline.created))
+        yield from [
+            "=" * 80,
+            f"CSS HYGIENE CHANGES SINCE {self.baseline_label}",
+            "=" * 80,
+            "",
+            f"Baseline snapshot taken: {created}",
+            f"Stylesheet bytes: {self.size_before:,} -> {self.size_after:,} "
+            f"({self.size_after - self.size_before:+,})",
+            f"Regressions: {len(self.regressions())}",
+            "",
+        ]
+        if not self.changes and not self.byte_deltas:
+            yield "No changes."
+            return
+        for change, heading in CHANGES:
+            entries = [entry for entry in self.changes if entry.change == change]
+            if not entries:
+                continue
+            yield f"{heading}: {len(entries)}"
+            yield "-" * 80
+            for entry in entries:
+                yield f".{entry.class_name}" + (f"  ({', '.join(entry.files)})" if entry.files else "")
+            yield ""
+        if self.byte_deltas:
+            yield f"BYTE DELTAS: {len(self.byte_deltas)} stylesheets"
+            yield "-" * 80
+            for delta in self.byte_deltas:
+                yield f"{delta.after - delta.before:>+10,}  {delta.file_path}  ({delta.before:,} -> {delta.after:,})"
+            yield ""
+
+    def generate_report(self) -> str:
+        """Generate the delta report."""
+        return '\n'.join(self.iter_report_lines())
+
+    def report_summary(self) -> dict:
+        """Summary statistics for the structured report formats."""
+        summary = {
+            'report': 'css-hygiene-delta',
+            'baseline': self.baseline_label,
+            'baseline_created': self.baseline.created,
+            'bytes_before': self.size_before,
+            'bytes_after': self.size_after,
+            'regressions': len(self.regressions()),
+        }
+        for change, _ in CHANGES:
+            summary[change.replace('-', '_')] = self.count(change)
+        return summary
+
+    def iter_report_records(self) -> Iterator[dict]:
+        """Yield one record per changed class and per resized stylesheet."""
+        for entry in self.changes:
+            yield {'type': 'change', 'class': entry.class_name, 'change': entry.change, 'files': entry.files}
+        for delta in self.byte_deltas:
+            yield {'type': 'bytes', 'file': delta.file_path, 'before': delta.before, 'after': delta.after}
+
+
+def print_delta(delta: SnapshotDelta) -> None:
+    """Print the changed sections of a delta to stdout."""
+    for line in delta.iter_report_lines():
+        print(line)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two css-hygiene snapshots without re-parsing.")
+    parser.add_argument('baseline', help="Snapshot of the baseline run")
+    parser.add_argument('current', help="Snapshot of the run to compare")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="Exit with status 1 if there are new unused classes or new duplicates")
+    args = parser.parse_args(argv)
+
+    try:
+        baseline, current = read_snapshot(args.baseline), read_snapshot(args.current)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    delta = SnapshotDelta(baseline, current, args.baseline)
+    delta.analyze()
+    print_delta(delta)
+    return 1 if args.fail_on_regression and delta.regressions() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
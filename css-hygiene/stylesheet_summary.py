@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Stylesheet Summaries
+
+Compact per-file analysis results shared by the css-hygiene analyzers. A
+summary holds everything the unused-class and duplicate-class reports need
+from one stylesheet, so it can be cached on disk and reused without
+re-reading or re-parsing the file, and it is small and picklable so worker
+processes can return it cheaply.
+"""
+
+import hashlib
+from collections import namedtuple
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+import css_parser
+import profiling
+from parallel import parallel_map
+from parse_cache import ParseCache, content_digest
+
+# Data structures
+ClassDefinition = namedtuple('ClassDefinition', ['file_path', 'line_number', 'column_number', 'content', 'content_hash', 'selector', 'context'])
+StylesheetSummary = namedtuple('StylesheetSummary', ['file_path', 'digest', 'size', 'classes', 'definitions', 'rule_definitions'])
+
+PREVIEW_LENGTH = 200
+
+
+def preview(rule_content: str) -> str:
+    """Return the report preview of a rule's declaration block."""
+    stripped = rule_content.strip()
+    return stripped[:PREVIEW_LENGTH] + ('...' if len(stripped) > PREVIEW_LENGTH else '')
+
+
+def _class_definitions(sheet: css_parser.Stylesheet, relative_path: str) -> Tuple[set, list, list]:
+    """Return (classes, first definitions, rule definitions) as [(class_name, ClassDefinition)] lists."""
+    data = sheet.data
+
+    # definitions holds each class once per file, at its first defining rule;
+    # rule_definitions holds every rule referencing it
+    found_classes = set()
+    definitions = []
+    rule_definitions = []
+
+    lines = css_parser.LineIndex(data)
+
+    for rule in sheet.rules:
+        if not rule.classes:
+            continue
+
+        rule_content = css_parser.decode(css_parser.block_content(data, rule))
+        content = preview(rule_content)
+        content_hash = hashlib.md5(rule_content.encode()).hexdigest()
+
+        # A class repeated within one selector is still one definition
+        seen = set()
+        for token in rule.classes:
+            if token.name in seen:
+                continue
+            seen.add(token.name)
+            line_number, column_number = lines.position(token.offset)
+            class_def = ClassDefinition(
+                file_path=relative_path,
+                line_number=line_number,
+                column_number=column_number,
+                content=content,
+                content_hash=content_hash,
+                selector=rule.selector,
+                context=rule.context
+            )
+            rule_definitions.append((token.name, class_def))
+            if token.name not in found_classes:
+                found_classes.add(token.name)
+                definitions.append((token.name, class_def))
+
+    return found_classes, definitions, rule_definitions
+
+
+def summarize_stylesheet(file_path: Union[str, Path], base_path: Union[str, Path],
+                         data: Optional[bytes] = None,
+                         time_budget: Optional[float] = None) -> StylesheetSummary:
+    """Parse a stylesheet and reduce it to the classes and definitions it contains."""
+    file_path = Path(file_path)
+    relative_path = str(file_path.relative_to(base_path))
+    if data is None:
+        with profiling.phase('read', file=relative_path):
+            with open(file_path, 'rb') as f:
+                data = f.read()
+    with profiling.phase('tokenize', file=relative_path):
+        sheet = css_parser.parse_css(data, file_path, time_budget)
+    with profiling.phase('extract', file=relative_path):
+        found_classes, definitions, rule_definitions = _class_definitions(sheet, relative_path)
+
+    return StylesheetSummary(
+        file_path=relative_path,
+        digest=content_digest(data),
+        size=len(data),
+        classes=frozenset(found_classes),
+        definitions=tuple(definitions),
+        rule_definitions=tuple(rule_definitions)
+    )
+
+
+def _summarize_task(task: Tuple[str, str, Optional[float]]) -> Tuple[Optional[StylesheetSummary], Optional[str]]:
+    """Summarize one stylesheet in a worker process, returning (summary, error)."""
+    file_path, base_path, time_budget = task
+    try:
+        return summarize_stylesheet(file_path, base_path, time_budget=time_budget), None
+    except Exception as e:
+        return None, f"Error processing {file_path}: {e}"
+
+
+def summarize_stylesheets(files: Iterable[Path], base_path: Union[str, Path],
+                          cache: Optional[ParseCache] = None,
+                          jobs: Optional[int] = None,
+                          time_budget: Optional[float] = css_parser.DEFAULT_TIME_BUDGET) -> List[StylesheetSummary]:
+    """Summarize stylesheets in input order, parsing cache misses across worker processes."""
+    files = list(files)
+    summaries = {}
+    if cache:
+        for file_path in files:
+            summary = cache.get(file_path)
+            if summary is not None:
+                summaries[file_path] = summary
+
+    # Workers return compact picklable summaries; merging follows input order
+    misses = [file_path for file_path in files if file_path not in summaries]
+    tasks = [(str(file_path), str(base_path), time_budget) for file_path in misses]
+    for file_path, (summary, error) in zip(misses, parallel_map(_summarize_task, tasks, jobs)):
+        if error:
+            print(error)
+            continue
+        summaries[file_path] = summary
+        if cache:
+            cache.put(file_path, summary, summary.digest)
+
+    return [summaries[file_path] for file_path in files if file_path in summaries]
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The css-hygiene tools are flat scripts that import each other by module name
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
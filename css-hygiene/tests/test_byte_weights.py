@@ -0,0 +1,30 @@
+from byte_weights import ByteWeightAnalyzer
+from session import AnalysisSession
+
+
+def analyze(tmp_path):
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'a.css').write_text('.used { color: red }\n.stale { color: blue }\n.gone { color: green }\n')
+    (tmp_path / 'src' / 'App.jsx').write_text('<div className="used" />\n')
+    (tmp_path / 'dist' / 'assets').mkdir(parents=True)
+    (tmp_path / 'dist' / 'assets' / 'index-1a2b.css').write_text('.used{color:red}.stale{color:#00f}')
+    (tmp_path / 'dist' / 'main.purged.min.css').write_text('.used{color:red}.gone{color:green}')
+    analyzer = ByteWeightAnalyzer(AnalysisSession(tmp_path, use_cache=False, jobs=1))
+    analyzer.analyze()
+    return analyzer, {weight.class_name: weight for weight in analyzer.weights}
+
+
+def test_only_the_bundle_assets_count_as_shipped(tmp_path):
+    analyzer, weights = analyze(tmp_path)
+    assert [path.name for path in analyzer.dist_files] == ['index-1a2b.css']
+    assert analyzer.dist_total == len('.used{color:red}.stale{color:#00f}')
+    assert weights['stale'].dist_bytes == len('.stale{color:#00f}')
+
+
+def test_unshipped_classes_report_source_bytes_separately(tmp_path):
+    _, weights = analyze(tmp_path)
+    gone = weights['gone']
+    assert gone.status == 'unused'
+    assert (gone.dist_bytes, gone.gzip_bytes) == (0, 0)
+    assert gone.source_bytes == len('.gone { color: green }')
+    assert gone.source_gzip_bytes > 0
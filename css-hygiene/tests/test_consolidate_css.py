@@ -0,0 +1,92 @@
+import pytest
+
+from consolidate_css import CSSConsolidator, exclusive_contexts, property_family, specificity
+from session import AnalysisSession
+
+
+def make_tree(tmp_path, a_css, b_css, jsx='<div className="card compact" />'):
+    (tmp_path / 'src' / 'styles').mkdir(parents=True)
+    (tmp_path / 'src' / 'styles' / 'a.css').write_text(a_css)
+    (tmp_path / 'src' / 'styles' / 'b.css').write_text(b_css)
+    (tmp_path / 'src' / 'main.jsx').write_text(
+        "import './styles/a.css'\nimport './styles/b.css'\n\n"
+        f"export default function App() {{ return {jsx} }}\n")
+    return tmp_path
+
+
+def consolidate(base_path, dry_run=False):
+    consolidator = CSSConsolidator(AnalysisSession(base_path, use_cache=False, jobs=1), dry_run=dry_run)
+    consolidator.analyze()
+    consolidator.apply()
+    return consolidator
+
+
+@pytest.mark.parametrize('selector, expected', [
+    ('.card', (0, 1, 0)),
+    ('div.card > p', (0, 1, 2)),
+    ('#main .card:hover', (1, 2, 0)),
+    ('a[href^="#x"]::before', (0, 1, 2)),
+    ('.card:not(.compact, #x)', (1, 1, 0)),
+    ('.card:where(#x .y)', (0, 1, 0)),
+    ('li:nth-child(2n + 1)', (0, 1, 1)),
+    ('*', (0, 0, 0)),
+])
+def test_specificity(selector, expected):
+    assert specificity(selector) == expected
+
+
+def test_property_family():
+    assert property_family('margin-top') == property_family('margin') == 'margin'
+    assert property_family('-webkit-box-shadow') == 'box'
+    assert property_family('line-height') == 'font'
+
+
+def test_exclusive_contexts():
+    assert exclusive_contexts(('@media print',), ('@media screen and (min-width: 1px)',))
+    assert not exclusive_contexts(('@media print',), ())
+    assert not exclusive_contexts(('@media print',), ('@media (max-width: 1px)',))
+    assert not exclusive_contexts(('@media print, screen',), ('@media screen',))
+
+
+def test_rule_overridden_by_another_class_of_the_same_element_moves_before_it(tmp_path):
+    # <div className="card compact"> gets 4px; importing the shared sheet after b.css would make it 0
+    base_path = make_tree(tmp_path, '.card { padding: 0 }\n',
+                          '.card { padding: 0 }\n.compact { padding: 4px }\n')
+    consolidator = consolidate(base_path)
+    assert [group.status for group in consolidator.groups] == ['hoisted']
+    assert consolidator.placement == 'before'
+    main = (base_path / 'src' / 'main.jsx').read_text()
+    assert main.index('shared/consolidated.css') < main.index('a.css')
+
+
+def test_rule_overridden_on_both_sides_stays(tmp_path):
+    base_path = make_tree(tmp_path, '.wide { padding: 8px }\n.card { padding: 0 }\n',
+                          '.card { padding: 0 }\n.compact { padding: 4px }\n')
+    consolidator = consolidate(base_path)
+    (group,) = consolidator.groups
+    assert group.status == 'skipped'
+    assert 'would change the cascade' in group.reason
+    assert consolidator.changes == {}
+
+
+def test_rule_with_higher_specificity_override_is_hoisted(tmp_path):
+    base_path = make_tree(tmp_path, '.card { padding: 0 }\n',
+                          '.card { padding: 0 }\n.list .compact { padding: 4px }\n')
+    consolidator = consolidate(base_path)
+    assert [group.status for group in consolidator.groups] == ['hoisted']
+    assert (base_path / 'src' / 'styles' / 'b.css').read_text() == '.list .compact { padding: 4px }\n'
+    assert '.card { padding: 0 }' in (base_path / 'src' / 'styles' / 'shared' / 'consolidated.css').read_text()
+
+
+def test_rules_setting_other_properties_do_not_block(tmp_path):
+    base_path = make_tree(tmp_path, '.card { padding: 0 }\n',
+                          '.card { padding: 0 }\n.compact { color: red }\n')
+    assert [group.status for group in consolidate(base_path, dry_run=True).groups] == ['hoisted']
+
+
+def test_growth_is_reported_as_growth(tmp_path):
+    base_path = make_tree(tmp_path, '.c{x:y}\n', '.c{x:y}\n')
+    consolidator = consolidate(base_path, dry_run=True)
+    assert consolidator.new_bundle_size > consolidator.bundle_size
+    assert any(line.startswith('Bundle size change: ') and 'larger' in line
+               for line in consolidator.iter_report_lines())
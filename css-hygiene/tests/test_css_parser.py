@@ -0,0 +1,60 @@
+import pytest
+
+from css_parser import LineIndex, parse_css, stylesheet_classes
+
+
+def selectors(css):
+    return [rule.selector for rule in parse_css(css.encode()).rules]
+
+
+def test_rule_classes_and_offsets():
+    sheet = parse_css(b'.b, .c:hover > .d { color: red }')
+    (rule,) = sheet.rules
+    assert [token.name for token in rule.classes] == ['b', 'c', 'd']
+    assert [sheet.data[token.offset:token.offset + 2] for token in rule.classes] == [b'.b', b'.c', b'.d']
+    assert sheet.data[rule.block_start:rule.end] == b'{ color: red }'
+
+
+def test_nested_at_rule_context():
+    sheet = parse_css(b'@media (max-width: 1px) { @supports (display: grid) { .a { color: red } } }')
+    (rule,) = sheet.rules
+    assert rule.context == ('@media (max-width: 1px)', '@supports (display: grid)')
+    assert [(at_rule.name, at_rule.context) for at_rule in sheet.at_rules] == [
+        ('media', ()),
+        ('supports', ('@media (max-width: 1px)',)),
+    ]
+
+
+def test_keyframe_steps_have_no_classes():
+    sheet = parse_css(b'@keyframes spin { from { opacity: 0 } 50.5% { opacity: 1 } }')
+    assert all(not rule.classes for rule in sheet.rules)
+
+
+@pytest.mark.parametrize('css, expected', [
+    ('/* .comment { } */ .real { content: "}" }', ['.real']),
+    ('.a { background: url("a{b}.png") } .b { }', ['.a', '.b']),
+    ('.a{}.b{}@media print{.c{}}', ['.a', '.b', '.c']),
+])
+def test_comments_strings_and_minified_input(css, expected):
+    assert selectors(css) == expected
+
+
+@pytest.mark.parametrize('css, expected', [
+    ('[data-x=".nope"] .yes {}', ['yes']),
+    ('.a\\:b {}', ['a\\:b']),
+    ('.-neg {}', ['-neg']),
+    ('.a .b:not(.c) {}', ['a', 'b', 'c']),
+])
+def test_class_tokens(css, expected):
+    (rule,) = parse_css(css.encode()).rules
+    assert [token.name for token in rule.classes] == expected
+
+
+def test_stylesheet_classes():
+    assert stylesheet_classes(parse_css(b'.a .b:not(.c) {} .a {}')) == {'a', 'b', 'c'}
+
+
+def test_line_index():
+    index = LineIndex(b'a\nbc\n\nd')
+    assert [index.line(offset) for offset in (0, 2, 6)] == [1, 2, 4]
+    assert index.position(3) == (2, 2)
@@ -0,0 +1,45 @@
+import subprocess
+
+import git_scope
+from session import AnalysisSession
+
+
+def git(base_path, *args):
+    subprocess.run(['git', '-C', str(base_path), '-c', 'user.name=t', '-c', 'user.email=t@t', *args],
+                   check=True, capture_output=True)
+
+
+def make_repo(tmp_path):
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'a.css').write_text('.card { color: red }\n.old { color: blue }\n')
+    (tmp_path / 'src' / 'App.jsx').write_text('<div className="card old" />\n')
+    git(tmp_path, 'init', '-q')
+    git(tmp_path, 'add', 'src')
+    git(tmp_path, 'commit', '-q', '-m', 'base')
+    (tmp_path / 'src' / 'App.jsx').write_text('<div className="card" />\n')
+    (tmp_path / 'src' / 'b.css').write_text('.card { margin: 0 }\n')
+    return tmp_path
+
+
+def test_changes_since_a_ref(tmp_path):
+    analyzer = git_scope.GitScopeAnalyzer(AnalysisSession(make_repo(tmp_path), use_cache=False, jobs=1), 'HEAD')
+    analyzer.analyze()
+    assert sorted((entry.class_name, entry.change) for entry in analyzer.changes) == [
+        ('card', 'new-duplicate'),
+        ('old', 'became-unused'),
+    ]
+
+
+def test_reports_share_one_analysis(tmp_path, monkeypatch):
+    base_path = make_repo(tmp_path)
+    session = AnalysisSession(base_path, use_cache=False, jobs=1)
+    calls = []
+    analyze = git_scope.GitScopeAnalyzer.analyze
+    monkeypatch.setattr(git_scope.GitScopeAnalyzer, 'analyze', lambda self: calls.append(self) or analyze(self))
+
+    unused = git_scope.run_since(session, 'HEAD', ('unused',), tmp_path / 'unused.txt', 'text')
+    duplicates = git_scope.run_since(session, 'HEAD', ('duplicates',), tmp_path / 'duplicates.txt', 'text')
+    assert len(calls) == 1
+    assert [entry.class_name for entry in unused.changes] == ['old']
+    assert [entry.class_name for entry in duplicates.changes] == ['card']
+    assert 'NO LONGER DUPLICATED' not in (tmp_path / 'unused.txt').read_text()
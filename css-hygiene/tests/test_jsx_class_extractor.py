@@ -0,0 +1,95 @@
+import pytest
+
+from jsx_class_extractor import extract_classes
+
+
+def names(source):
+    return [usage.class_name for usage in extract_classes(source)[0]]
+
+
+def fragments(source):
+    return [(fragment.prefix, fragment.suffix) for fragment in extract_classes(source)[1]]
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('<div className="view-toggle">', ['view-toggle']),
+    ('<div className="a b" id="x">', ['a', 'b']),
+    ("<p className='card'/>", ['card']),
+    ("const props = {className: 'card'}", ['card']),
+    ("<Icon iconClassName=\"icon-lg\" />", ['icon-lg']),
+])
+def test_attribute_values(source, expected):
+    assert names(source) == expected
+
+
+@pytest.mark.parametrize('source, expected', [
+    ("<p className={on ? 'on' : 'off'}>", ['on', 'off']),
+    ("<p className={a !== 'x' ? 'y' : 'z'}>", ['y', 'z']),
+    ("<p className={wave >= 'a' ? 'on' : 'off'}>", ['on', 'off']),
+    ("<p className={open && 'is-open'}>", ['is-open']),
+])
+def test_ternaries_and_conditionals(source, expected):
+    assert names(source) == expected
+
+
+@pytest.mark.parametrize('source', [
+    "if (wave === 'Immediate') {}",
+    "const x = details['study-design']",
+    "<p hidden={wave == 'late'}>",
+    "<p hidden={'late' != wave}>",
+])
+def test_comparisons_and_subscripts_are_ignored(source):
+    assert names(source) == []
+
+
+def test_template_literal_chunks_and_branches():
+    source = "<a className={`toc-link ${active ? 'active' : ''}`}>"
+    assert names(source) == ['toc-link', 'active']
+    assert fragments(source) == []
+
+
+def test_template_glue_is_dynamic():
+    assert names("<p className={`chip chip--${kind}`}>") == ['chip']
+    assert fragments("<p className={`chip chip--${kind}`}>") == [('chip--', '')]
+    assert fragments("<p className={`${size}-btn`}>") == [('', '-btn')]
+    # Glued on both sides: neither end is a usable fragment
+    assert fragments("<p className={`a-${x}-mid-${y}`}>") == [('a-', '')]
+
+
+def test_concatenation():
+    assert names('<p className={"btn-" + kind}>') == []
+    assert fragments('<p className={"btn-" + kind}>') == [('btn-', '')]
+    assert names('<p className={"p " + (on ? "q" : "")}>') == ['p', 'q']
+
+
+def test_concatenation_with_spaced_branches_keeps_the_left_class():
+    source = '<p className={"p" + (on ? " q" : "")}>'
+    assert names(source) == ['p', 'q']
+    assert fragments(source) == []
+
+
+def test_concatenation_with_glued_branches_stays_dynamic():
+    source = '<p className={"btn-" + (big ? "lg" : "sm")}>'
+    assert fragments(source) == [('btn-', '')]
+
+
+@pytest.mark.parametrize('source, expected', [
+    ("d3.select(el).attr('class', 'bar ' + kind)", ['bar']),
+    ("g.attr(\"class\", d => d.on ? 'dot on' : 'dot')", ['dot', 'on', 'dot']),
+    ("node.classed('active', on)", ['active']),
+    ("node.classed('is-a is-b', true)", ['is-a', 'is-b']),
+    ("el.classList.toggle('open', x)", ['open']),
+    ("el.classList.replace('old', 'new')", ['old', 'new']),
+])
+def test_d3_and_class_list_calls(source, expected):
+    assert names(source) == expected
+
+
+def test_selector_strings():
+    assert names("svg.selectAll('.bar-label, .axis .tick')") == ['bar-label', 'axis', 'tick']
+    assert names("document.querySelector('#main > .panel')") == ['panel']
+
+
+def test_line_numbers():
+    usages = extract_classes('<div>\n  <p className="a">\n  <p className="b">\n</div>')[0]
+    assert [(usage.class_name, usage.line_number) for usage in usages] == [('a', 2), ('b', 3)]
@@ -0,0 +1,30 @@
+from near_duplicates import CanonicalRule, canonical_declarations, find_clusters
+
+
+def rule(selector, declarations, line_number=1, context=()):
+    return CanonicalRule('a.css', line_number, selector, context, canonical_declarations(declarations))
+
+
+def test_canonical_declarations():
+    assert canonical_declarations('COLOR: #FFF; margin: 0px ; color: #abc /* x */') == ('color:#aabbcc', 'margin:0')
+
+
+def test_identical_rules_cluster():
+    (cluster,) = find_clusters([rule('.a', 'color: red; margin: 0'), rule('.b', 'margin:0;color:red', 2)])
+    assert [r.selector for r in cluster.rules] == ['.a', '.b']
+    assert cluster.min_similarity == 1.0
+
+
+def test_different_contexts_do_not_cluster():
+    rules = [rule('.a', 'color: red; margin: 0'), rule('.b', 'color: red; margin: 0', 2, ('@media print',))]
+    assert find_clusters(rules) == []
+
+
+def test_vendor_prefixed_pseudo_selectors_are_not_clustered():
+    rules = [
+        rule('.a::-webkit-scrollbar', 'width: 4px; background: none'),
+        rule('.a::-moz-selection', 'width: 4px; background: none', 2),
+        rule('.a:-ms-input-placeholder', 'width: 4px; background: none', 3),
+        rule('.b', 'width: 4px; background: none', 4),
+    ]
+    assert find_clusters(rules) == []
@@ -0,0 +1,16 @@
+from byte_weights import find_bundle_files
+from purge_css import CSSPurger, entry_output_name
+from session import AnalysisSession
+
+
+def test_entry_output_name():
+    assert entry_output_name('src/main.jsx') == 'main.purged.min.css'
+    assert entry_output_name('src/scrolly/main.jsx') == 'scrolly-main.purged.min.css'
+
+
+def test_output_is_not_part_of_the_measured_bundle(tmp_path):
+    purger = CSSPurger(AnalysisSession(tmp_path, use_cache=False, jobs=1))
+    assert purger.output_file == tmp_path / 'dist' / 'purged' / 'main.purged.min.css'
+    purger.output_file.parent.mkdir(parents=True)
+    purger.output_file.write_text('.a{}')
+    assert find_bundle_files(tmp_path / 'dist') == []
@@ -0,0 +1,92 @@
+import pytest
+
+from css_parser import parse_css
+from remove_unused_css import apply_edits, remove_unused_classes, removal_edits
+
+
+def remove(css, unused):
+    data = css.encode()
+    edits, removed = removal_edits(parse_css(data), set(unused))
+    return apply_edits(data, edits).decode(), removed
+
+
+@pytest.mark.parametrize('css, expected', [
+    ('.used, .unused { color: red }', '.used { color: red }'),
+    ('.unused, .used { color: red }', '.used { color: red }'),
+    ('.a, .unused .b, .c { color: red }', '.a, .c { color: red }'),
+    ('.a,\n.unused,\n.c { color: red }', '.a, .c { color: red }'),
+])
+def test_selector_lists_are_trimmed(css, expected):
+    assert remove(css, {'unused'}) == (expected, 1)
+
+
+def test_rule_is_dropped_when_every_selector_is_unused():
+    assert remove('.unused, .other { color: red }\n.keep {}', {'unused', 'other'}) == ('.keep {}', 2)
+
+
+def test_emptied_media_block_is_dropped():
+    css = '@media (max-width: 1px) {\n  .unused { color: red }\n}\n.keep {}'
+    assert remove(css, {'unused'}) == ('.keep {}', 1)
+
+
+def test_emptied_nested_media_and_supports_blocks_are_dropped():
+    css = '@media print {\n  @supports (display: grid) {\n    .unused { color: red }\n  }\n}\n.keep {}'
+    assert remove(css, {'unused'}) == ('.keep {}', 1)
+
+
+def test_media_block_with_remaining_rules_is_kept():
+    css = '@media print {\n  .unused { color: red }\n  .keep { color: blue }\n}'
+    assert remove(css, {'unused'}) == ('@media print {\n  .keep { color: blue }\n}', 1)
+
+
+def test_negated_class_is_not_a_definition():
+    css = '.keep:not(.unused) { color: red }'
+    assert remove(css, {'unused'}) == (css, 0)
+
+
+def test_minified_input():
+    css = '.a{color:red}.unused{color:blue}.b,.unused:hover{x:y}@media print{.unused{x:y}}'
+    assert remove(css, {'unused'}) == ('.a{color:red}.b{x:y}', 3)
+
+
+@pytest.mark.parametrize('css', [
+    '[data-x=".unused"] { color: red }',
+    "a[href='.unused'] { color: red }",
+    '.keep::after { content: ".unused" }',
+    '/* .unused { } */ .keep { }',
+    '.keep { background: url("x.unused{}.png") }',
+])
+def test_attribute_values_strings_and_comments_are_untouched(css):
+    assert remove(css, {'unused'}) == (css, 0)
+
+
+def test_keyframe_selectors_are_untouched():
+    css = '@keyframes unused { from { opacity: 0 } to { opacity: 1 } }'
+    assert remove(css, {'unused', 'from', 'to'}) == (css, 0)
+
+
+def test_dry_run_leaves_the_file_alone(tmp_path):
+    css_file = tmp_path / 'a.css'
+    css_file.write_text('.keep {}\n.unused { color: red }\n')
+    result = remove_unused_classes(css_file, {'unused'}, dry_run=True, label='a.css')
+    assert css_file.read_text() == '.keep {}\n.unused { color: red }\n'
+    assert result.removed == 1
+    assert '-.unused { color: red }' in result.diff
+    assert result.original_size - result.new_size == len('.unused { color: red }\n')
+
+
+def test_write_replaces_the_file(tmp_path):
+    css_file = tmp_path / 'a.css'
+    css_file.write_text('.keep {}\n.unused { color: red }\n')
+    result = remove_unused_classes(css_file, {'unused'})
+    assert css_file.read_text() == '.keep {}\n'
+    assert result.removed == 1
+    assert [path.name for path in tmp_path.iterdir()] == ['a.css']
+
+
+def test_nothing_to_remove_does_not_rewrite(tmp_path):
+    css_file = tmp_path / 'a.css'
+    css_file.write_text('.keep {}\n')
+    before = css_file.stat().st_mtime_ns
+    assert remove_unused_classes(css_file, {'unused'}).removed == 0
+    assert css_file.stat().st_mtime_ns == before
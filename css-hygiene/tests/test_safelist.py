@@ -0,0 +1,73 @@
+from collections import namedtuple
+
+import pytest
+
+from safelist import Safelist, SafelistPattern, inferred_patterns, load_safelist_file
+
+Fragment = namedtuple('Fragment', ['prefix', 'suffix', 'line_number'])
+
+
+def safelist(*entries):
+    return Safelist(SafelistPattern(kind, pattern, 'test') for kind, pattern in entries)
+
+
+@pytest.mark.parametrize('entries, name', [
+    ([('glob', 'chart-tooltip')], 'chart-tooltip'),
+    ([('glob', 'chart-*')], 'chart-axis'),
+    ([('glob', '*-btn')], 'large-btn'),
+    ([('glob', 'wave-?')], 'wave-a'),
+    ([('prefix', 'checkbox-label--')], 'checkbox-label--3'),
+    ([('suffix', '-btn')], 'small-btn'),
+    ([('regex', '^wave-(a|b)$')], 'wave-b'),
+    ([('regex', '(?i)^BTN-')], 'btn-primary'),
+    ([('regex', 'tip')], 'chart-tooltip'),
+])
+def test_match(entries, name):
+    assert safelist(*entries).match(name) == f"{entries[0][1]!r} (test)"
+
+
+@pytest.mark.parametrize('entries, name', [
+    ([('glob', 'chart-tooltip')], 'chart-tooltip-x'),
+    ([('glob', 'chart-*')], 'bar-chart'),
+    ([('glob', 'wave-?')], 'wave-ab'),
+    ([('regex', '^wave-(a|b)$')], 'wave-c'),
+    ([('suffix', '-btn')], 'btn-large'),
+])
+def test_no_match(entries, name):
+    assert safelist(*entries).match(name) is None
+
+
+def test_globs_and_regexes_combined():
+    patterns = safelist(('glob', 'a?c'), ('regex', '^x+$'), ('glob', '[ab]z'))
+    assert patterns.filter(['abc', 'xxx', 'bz', 'cz']) == {
+        'abc': "'a?c' (test)",
+        'xxx': "'^x+$' (test)",
+        'bz': "'[ab]z' (test)",
+    }
+
+
+@pytest.mark.parametrize('pattern', ['(unclosed', '(?P<name>a)', r'(a)\1'])
+def test_invalid_regex_is_skipped(pattern, capsys):
+    patterns = safelist(('regex', pattern), ('glob', 'keep'))
+    assert len(patterns) == 1
+    assert patterns.match('keep') is not None
+    assert 'ignoring invalid safelist regex' in capsys.readouterr().out
+
+
+def test_load_safelist_file(tmp_path):
+    file_path = tmp_path / 'safelist.txt'
+    file_path.write_text('# comment\n\n.chart-tooltip\n  wave-*  \n/^x$/\n')
+    assert load_safelist_file(file_path) == [
+        SafelistPattern('glob', 'chart-tooltip', 'safelist.txt:3'),
+        SafelistPattern('glob', 'wave-*', 'safelist.txt:4'),
+        SafelistPattern('regex', '^x$', 'safelist.txt:5'),
+    ]
+    assert load_safelist_file(tmp_path / 'missing.txt') == []
+
+
+def test_inferred_patterns():
+    dynamic = {'src/App.jsx': [Fragment('checkbox-label--', '', 12), Fragment('', '-btn', 30)]}
+    assert inferred_patterns(dynamic) == [
+        SafelistPattern('prefix', 'checkbox-label--', 'src/App.jsx:12'),
+        SafelistPattern('suffix', '-btn', 'src/App.jsx:30'),
+    ]
@@ -0,0 +1,55 @@
+from session import AnalysisSession
+from watch import ClassIndex
+
+
+def make_tree(tmp_path):
+    (tmp_path / 'src' / 'styles').mkdir(parents=True)
+    (tmp_path / 'css-hygiene').mkdir()
+    (tmp_path / 'src' / 'styles' / 'a.css').write_text('.used { color: red }\n.spare { color: blue }\n')
+    (tmp_path / 'src' / 'App.jsx').write_text('<div className="used" />\n')
+    return tmp_path
+
+
+def make_index(base_path):
+    session = AnalysisSession(base_path, use_cache=False, jobs=1)
+    index = ClassIndex(session, lambda: sorted((base_path / 'src' / 'styles').rglob('*.css')))
+    index.build()
+    return index
+
+
+def test_safelist_edits_refresh_the_unused_list(tmp_path):
+    base_path = make_tree(tmp_path)
+    index = make_index(base_path)
+    assert index.safelist_path in set(index.watched_files())
+    assert index.unused_in('src/styles/a.css') == ['spare']
+
+    index.safelist_path.write_text('spare\n')
+    assert index.update(index.safelist_path) == ['  now used: .spare']
+    assert index.unused_in('src/styles/a.css') == []
+
+
+def test_source_edits_flip_classes(tmp_path):
+    base_path = make_tree(tmp_path)
+    index = make_index(base_path)
+    app = base_path / 'src' / 'App.jsx'
+
+    app.write_text('<div className="used spare" />\n')
+    assert index.update(app) == ['  now used: .spare']
+    app.unlink()
+    assert index.update(app) == [
+        '  now UNUSED: .spare (defined in src/styles/a.css)',
+        '  now UNUSED: .used (defined in src/styles/a.css)',
+    ]
+
+
+def test_only_the_analyzer_stylesheets_are_watched(tmp_path):
+    base_path = make_tree(tmp_path)
+    (base_path / 'src' / 'vendor.css').write_text('.vendor { color: red }\n')
+    index = make_index(base_path)
+    watched = {index.relative_path(path) for path in index.watched_files()}
+    assert 'src/vendor.css' not in watched
+    assert {'src/styles/a.css', 'src/App.jsx', 'css-hygiene/safelist.txt'} <= watched
+
+    stylesheet = base_path / 'src' / 'styles' / 'a.css'
+    stylesheet.write_text('.used { color: red }\n')
+    assert index.update(stylesheet) == ['  removed: .spare', '  unused (0): none']
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Class Reference Scanner
+
+Checks whether each defined CSS class is mentioned anywhere in the application
+sources, not only in the className/classList sinks that jsx_class_extractor.py
+understands: string constants in src/constants.js, hooks such as
+useChartDownload.js and the HTML entry pages are covered too. One matcher is
+built from the full set of defined class names and every JS/JSX/HTML file is
+scanned once, so the cost grows with the size of the tree rather than with
+classes x files.
+
+Features:
+- Multi-pattern matching in a single pass per file: names made of identifier
+  characters are matched by one tokenizing regex and a set lookup, any other
+  names (escaped characters such as `md:flex`) by an Aho-Corasick automaton
+- Identifier boundaries: `chart` does not match inside `chartData` or
+  `chart-title`
+- Usage sites (file, line, column) of every class
+- Classes never mentioned anywhere, and classes mentioned only outside the
+  class sinks (possible misses of the sink-based unused report)
+- Files are scanned in parallel worker processes (--jobs N)
+"""
+
+import argparse
+import re
+from bisect import bisect_right
+from collections import defaultdict, deque, namedtuple
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from parallel import parallel_map
+from session import AnalysisSession, default_base_path
+
+# Data structures
+UsageSite = namedtuple('UsageSite', ['class_name', 'file_path', 'line_number', 'column_number'])
+
+SCAN_EXTENSIONS = ('.js', '.jsx', '.html')
+
+# Class names are matched only as whole runs of these characters
+WORD_PATTERN = re.compile(r'[\w-]+')
+
+# Number of usage sites listed per class in the text report
+MAX_SITES = 5
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton reporting every occurrence of a set of patterns."""
+
+    __slots__ = ('patterns', 'goto', 'fail', 'output')
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = sorted(set(patterns))
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[Tuple[int, ...]] = [()]
+
+        # Trie of the patterns
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = self.goto[state][char] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                state = next_state
+            self.output[state] += (index,)
+
+        # Failure links, breadth first; outputs inherit those of their failure state
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] += self.output[self.fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield (start offset, pattern) for every occurrence in text."""
+        goto, fail, output, patterns = self.goto, self.fail, self.output, self.patterns
+        state = 0
+        for offset, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                pattern = patterns[index]
+                yield offset - len(pattern) + 1, pattern
+
+
+class ClassMatcher:
+    """Finds defined class names in source text, respecting identifier boundaries."""
+
+    def __init__(self, names: Iterable[str]):
+        names = set(names)
+        self.words = frozenset(name for name in names if WORD_PATTERN.fullmatch(name))
+        others = names - self.words
+        self.automaton = AhoCorasick(others) if others else None
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield (offset, class name) of every whole-name occurrence, in text order."""
+        words = self.words
+        matches = [(match.start(), match.group()) for match in WORD_PATTERN.finditer(text)
+                   if match.group() in words]
+        if self.automaton:
+            for start, name in self.automaton.iter_matches(text):
+                end = start + len(name)
+                if (start == 0 or not WORD_PATTERN.match(text, start - 1, start)) and \
+                        (end == len(text) or not WORD_PATTERN.match(text, end, end + 1)):
+                    matches.append((start, name))
+            matches.sort()
+        return iter(matches)
+
+
+def scan_file(file_path: Path, relative_path: str, matcher: ClassMatcher) -> List[UsageSite]:
+    """Return the usage sites of every defined class in one file."""
+    text = file_path.read_bytes().decode('utf-8', errors='replace')
+    line_starts = [0]
+    line_starts.extend(match.end() for match in re.finditer('\n', text))
+    sites = []
+    for offset, name in matcher.iter_matches(text):
+        line = bisect_right(line_starts, offset)
+        sites.append(UsageSite(name, relative_path, line, offset - line_starts[line - 1] + 1))
+    return sites
+
+
+# Matchers built by a worker process, keyed by the task's matcher key
+_worker_matchers: Dict[str, ClassMatcher] = {}
+
+
+def _scan_task(task: Tuple[List[str], str, str, frozenset]) -> Tuple[List[UsageSite], List[str]]:
+    """Scan a batch of files in a worker process, returning (sites, errors)."""
+    file_paths, base_path, key, names = task
+    matcher = _worker_matchers.get(key)
+    if matcher is None:
+        _worker_matchers.clear()
+        matcher = _worker_matchers[key] = ClassMatcher(names)
+    sites, errors = [], []
+    for file_path in file_paths:
+        path = Path(file_path)
+        try:
+            sites.extend(scan_file(path, str(path.relative_to(base_path)), matcher))
+        except Exception as e:
+            errors.append(f"Error scanning {file_path}: {e}")
+    return sites, errors
+
+
+def find_scan_files(base_path: Path) -> List[Path]:
+    """JS/JSX/HTML files under src/, plus the HTML pages at the repository root"""
+    src_path = Path(base_path) / 'src'
+    files = []
+    if src_path.exists():
+        files.extend(
+            path for path in src_path.rglob('*')
+            if path.suffix in SCAN_EXTENSIONS and 'node_modules' not in path.parts
+        )
+    files.extend(Path(base_path).glob('*.html'))
+    return sorted(files)
+
+
+def find_css_files(base_path: Path) -> List[Path]:
+    """Find all stylesheets under src/"""
+    src_path = Path(base_path) / 'src'
+    if not src_path.exists():
+        return []
+    return sorted(path for path in src_path.rglob('*.css') if 'node_modules' not in path.parts)
+
+
+def scan_references(base_path: Path, names: Iterable[str], jobs: Optional[int] = None) -> Tuple[List[Path], List[UsageSite]]:
+    """Scan the tree once for all names; return (files scanned, usage sites)."""
+    base_path = Path(base_path)
+    names = frozenset(names)
+    files = find_scan_files(base_path)
+
+    # Files go out in batches so the name set is pickled once per batch, not per file
+    batch_size = max(1, -(-len(files) // 64))
+    key = f"{len(names)}:{hash(names)}"
+    tasks = [([str(path) for path in files[i:i + batch_size]], str(base_path), key, names)
+             for i in range(0, len(files), batch_size)]
+    sites = []
+    for batch_sites, errors in parallel_map(_scan_task, tasks, jobs):
+        for error in errors:
+            print(error)
+        sites.extend(batch_sites)
+    return files, sites
+
+
+class ReferenceAnalyzer:
+    def __init__(self, session: AnalysisSession):
+        self.session = session
+        self.base_path = session.base_path
+        self.css_files: List[Path] = []
+        self.scanned_files: List[Path] = []
+        self.definitions: Dict[str, List[str]] = {}  # class -> defining stylesheets
+        self.sites: Dict[str, List[UsageSite]] = {}
+        self.used_classes = set()
+
+    def analyze(self) -> None:
+        """Scan every JS/JSX/HTML file once for all defined class names."""
+        print("🔤 Scanning sources for defined class names...")
+        self.css_files = find_css_files(self.base_path)
+        definitions = defaultdict(list)
+        for summary in self.session.summarize(self.css_files):
+            for class_name in sorted(summary.classes):
+                definitions[class_name].append(summary.file_path)
+        self.definitions = dict(sorted(definitions.items()))
+
+        self.scanned_files, sites = scan_references(self.base_path, self.definitions, self.session.jobs)
+        by_class = defaultdict(list)
+        for site in sites:
+            by_class[site.class_name].append(site)
+        self.sites = dict(by_class)
+        self.used_classes = self.session.used_classes()
+        print(f"   {len(self.definitions)} classes, {len(self.scanned_files)} files, "
+              f"{len(sites)} references")
+
+    def unreferenced(self) -> List[str]:
+        """Classes whose name appears in no scanned file."""
+        return [name for name in self.definitions if name not in self.sites]
+
+    def outside_sinks(self) -> List[str]:
+        """Classes mentioned in the sources but not found in any class sink."""
+        return [name for name in self.definitions if name in self.sites and name not in self.used_classes]
+
+    def iter_report_lines(self) -> Iterator[str]:
+        """Yield the lines of the class reference report one at a time."""
+        unreferenced = self.unreferenced()
+        outside_sinks = self.outside_sinks()
+        yield from [
+            "=" * 80,
+            "CSS CLASS REFERENCES REPORT",
+            "=" * 80,
+            "",
+            f"Analysis completed on: {self.base_path}",
+            f"Stylesheets: {len(self.css_files)}",
+            f"Files scanned (JS/JSX/HTML): {len(self.scanned_files)}",
+            f"Defined classes: {len(self.definitions)}",
+            f"Classes mentioned somewhere: {len(self.sites)}",
+            f"Classes mentioned nowhere: {len(unreferenced)}",
+            f"Mentioned only outside class sinks: {len(outside_sinks)}",
+            "",
+            "A mention is any whole-name occurrence, including string constants,",
+            "comments and identifiers, so these lists are conservative.",
+            "",
+            f"CLASSES MENTIONED NOWHERE ({len(unreferenced)}):",
+            "-" * 80,
+        ]
+        for name in unreferenced:
+            yield f".{name}  ({', '.join(self.definitions[name])})"
+        yield from [
+            "",
+            f"MENTIONED ONLY OUTSIDE CLASS SINKS ({len(outside_sinks)}):",
+            "-" * 80,
+        ]
+        for name in outside_sinks:
+            yield f".{name}"
+            yield from self._site_lines(name)
+        yield from ["", "ALL REFERENCED CLASSES:", "-" * 80]
+        for name in self.definitions:
+            if name in self.sites:
+                yield f".{name}: {len(self.sites[name])} references"
+                yield from self._site_lines(name)
+
+    def _site_lines(self, name: str) -> Iterator[str]:
+        sites = self.sites[name]
+        for site in sites[:MAX_SITES]:
+            yield f"    {site.file_path}:{site.line_number}:{site.column_number}"
+        if len(sites) > MAX_SITES:
+            yield f"    +{len(sites) - MAX_SITES} more"
+
+    def generate_report(self) -> str:
+        """Generate the class reference report."""
+        return '\n'.join(self.iter_report_lines())
+
+    def report_summary(self) -> dict:
+        """Summary statistics for the structured report formats."""
+        return {
+            'report': 'css-class-references',
+            'stylesheets': len(self.css_files),
+            'files_scanned': len(self.scanned_files),
+            'defined_classes': len(self.definitions),
+            'referenced_classes': len(self.sites),
+            'unreferenced_classes': len(self.unreferenced()),
+            'outside_sinks': len(self.outside_sinks()),
+        }
+
+    def iter_report_records(self) -> Iterator[dict]:
+        """Yield one record per defined class with its usage sites."""
+        for name, files in self.definitions.items():
+            sites = self.sites.get(name, [])
+            yield {
+                'type': 'class',
+                'class': name,
+                'defined_in': files,
+                'in_class_sinks': name in self.used_classes,
+                'references': [site._asdict() for site in sites],
+            }
+
+
+def main():
+    from report_writer import FORMATS, output_path_for, write_report
+
+    parser = argparse.ArgumentParser(description="Find where every defined CSS class is mentioned in the sources.")
+    parser.add_argument('--base-path', default=None,
+                        help="Repository to analyze (default: the repository containing css-hygiene/)")
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help="Worker processes for scanning (default: all cores)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignore and do not update .css-hygiene-cache/")
+    parser.add_argument('--format', choices=FORMATS, default='text',
+                        help="Report format (default: text)")
+    parser.add_argument('--output', '-o', default=None,
+                        help="Report path (default: css-hygiene/css-class-references-report.<ext>)")
+    args = parser.parse_args()
+
+    session = AnalysisSession(args.base_path or default_base_path(), use_cache=not args.no_cache, jobs=args.jobs)
+    analyzer = ReferenceAnalyzer(session)
+    analyzer.analyze()
+    default_output = session.base_path / 'css-hygiene' / 'css-class-references-report.txt'
+    output_file = Path(args.output) if args.output else output_path_for(default_output, args.format)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    write_report(analyzer, output_file, args.format)
+    print(f"📄 Report saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Watch Mode
+
+Keeps the class index of the whole tree in memory and re-reports unused and
+duplicate classes for the files touched by each save. The index is built once
+on an analysis session (using the parse cache), then the watcher polls the
+analyzer's stylesheets, the JSX/JS sources and css-hygiene/safelist.txt and
+only re-reads the files that changed.
+
+Polling uses plain os.stat so it works everywhere without extra dependencies;
+a poll of this repository's ~140 files takes about a millisecond.
+"""
+
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from jsx_class_extractor import find_source_files
+from safelist import default_safelist_path
+from session import AnalysisSession
+from stylesheet_summary import StylesheetSummary
+
+DEFAULT_INTERVAL = 0.25
+
+
+class ClassIndex:
+    def __init__(self, session: AnalysisSession, find_css_files: Callable[[], List[Path]]):
+        self.session = session
+        self.base_path = session.base_path
+        self.find_css_files = find_css_files  # the analyzer's stylesheet set
+        self.safelist_path = default_safelist_path(self.base_path)
+        self.summaries: Dict[str, StylesheetSummary] = {}  # relative path -> summary
+        self.definitions = defaultdict(list)  # class -> [ClassDefinition]
+
+    def watched_files(self) -> Iterator[Path]:
+        """Yield the analyzer's stylesheets, every JS/JSX source file and the safelist."""
+        yield from self.find_css_files()
+        yield from find_source_files(self.base_path)
+        yield self.safelist_path
+
+    def build(self) -> None:
+        """Build the full index once."""
+        for summary in self.session.summarize(self.find_css_files()):
+            self._add_stylesheet(summary)
+        self.session.used_classes()
+        self.session.safelist()
+
+    def relative_path(self, path: Path) -> str:
+        """Path of a watched file relative to the analyzed repository."""
+        return str(path.relative_to(self.base_path))
+
+    def _add_stylesheet(self, summary: StylesheetSummary) -> None:
+        self.summaries[summary.file_path] = summary
+        for class_name, class_def in summary.definitions:
+            self.definitions[class_name].append(class_def)
+
+    def _remove_stylesheet(self, rel_path: str) -> Optional[StylesheetSummary]:
+        summary = self.summaries.pop(rel_path, None)
+        if summary:
+            for class_name, _ in summary.definitions:
+                remaining = [d for d in self.definitions[class_name] if d.file_path != rel_path]
+                if remaining:
+                    self.definitions[class_name] = remaining
+                else:
+                    del self.definitions[class_name]
+        return summary
+
+    def is_used(self, class_name: str) -> bool:
+        """True if any source file currently uses the class, or the safelist keeps it."""
+        return class_name in self.session.used_classes() or self.session.safelist().match(class_name) is not None
+
+    def unused_in(self, rel_path: str) -> List[str]:
+        """Unused classes defined by one stylesheet."""
+        summary = self.summaries.get(rel_path)
+        if not summary:
+            return []
+        return sorted(c for c in summary.classes if not self.is_used(c))
+
+    def duplicates_of(self, class_names: Set[str]) -> List[Tuple[str, int, bool]]:
+        """(class, occurrences, identical) for each of class_names defined in several files."""
+        duplicates = []
+        for class_name in sorted(class_names):
+            definitions = self.definitions.get(class_name, [])
+            if len(definitions) > 1:
+                identical = len({d.content_hash for d in definitions}) == 1
+                duplicates.append((class_name, len(definitions), identical))
+        return duplicates
+
+    def _update_stylesheet(self, path: Path, rel_path: str) -> List[str]:
+        """Re-read one stylesheet and report its classes, unused classes and duplicates."""
+        lines = []
+        old = self._remove_stylesheet(rel_path)
+        old_classes = set(old.classes) if old else set()
+        new_classes = set()
+        self.session.forget_stylesheet(path)
+        if path.exists():
+            summaries = self.session.summarize([path])
+            if not summaries:
+                return ["  error: the stylesheet could not be parsed"]
+            self._add_stylesheet(summaries[0])
+            new_classes = set(summaries[0].classes)
+
+        added, removed = new_classes - old_classes, old_classes - new_classes
+        if added:
+            lines.append(f"  defined: {', '.join('.' + c for c in sorted(added))}")
+        if removed:
+            lines.append(f"  removed: {', '.join('.' + c for c in sorted(removed))}")
+        unused = self.unused_in(rel_path)
+        lines.append(f"  unused ({len(unused)}): {', '.join('.' + c for c in unused) or 'none'}")
+        for class_name, count, identical in self.duplicates_of(new_classes | removed):
+            status = 'IDENTICAL' if identical else 'DIFFERENT'
+            lines.append(f"  duplicate: .{class_name} ({count} definitions, {status})")
+        return lines
+
+    def _update_usage(self, path: Path) -> List[str]:
+        """Re-read a source file or the safelist and report classes that became used or unused."""
+        lines = []
+        # Compared over all definitions: a changed dynamic prefix or safelist entry can flip many classes at once
+        unused_before = {c for c in self.definitions if not self.is_used(c)}
+        if path == self.safelist_path:
+            self.session.reload_safelist()
+        else:
+            self.session.rescan_source(path)
+        unused_after = {c for c in self.definitions if not self.is_used(c)}
+        newly_used = unused_before - unused_after
+        newly_unused = unused_after - unused_before
+        if newly_used:
+            lines.append(f"  now used: {', '.join('.' + c for c in sorted(newly_used))}")
+        for class_name in sorted(newly_unused):
+            files = sorted({d.file_path for d in self.definitions[class_name]})
+            lines.append(f"  now UNUSED: .{class_name} (defined in {', '.join(files)})")
+        if not lines:
+            lines.append("  no change to used/unused classes")
+        return lines
+
+    def update(self, path: Path) -> List[str]:
+        """Re-index one changed (or deleted) file and return report lines for it."""
+        if path.suffix == '.css':
+            return self._update_stylesheet(path, self.relative_path(path))
+        return self._update_usage(path)
+
+    def summary_line(self) -> str:
+        """One-line totals for the whole index."""
+        defined = set(self.definitions)
+        unused = sum(1 for c in defined if not self.is_used(c))
+        duplicates = sum(1 for defs in self.definitions.values() if len(defs) > 1)
+        return (f"{len(self.summaries)} stylesheets, {len(defined)} classes, "
+                f"{unused} unused, {duplicates} duplicated")
+
+
+def _snapshot(index: ClassIndex) -> Dict[Path, Tuple[int, int]]:
+    """Map every watched file to its (mtime_ns, size)."""
+    snapshot = {}
+    for path in index.watched_files():
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def run_watch(session: AnalysisSession, find_css_files: Callable[[], List[Path]],
+              interval: float = DEFAULT_INTERVAL) -> None:
+    """Build the index once, then re-report on every change until interrupted."""
+    index = ClassIndex(session, find_css_files)
+    start = time.perf_counter()
+    index.build()
+    print(f"👀 Watching {index.base_path / 'src'} ({index.summary_line()}, "
+          f"indexed in {(time.perf_counter() - start) * 1000:.0f} ms). Ctrl+C to stop.")
+
+    snapshot = _snapshot(index)
+    try:
+        while True:
+            time.sleep(interval)
+            current = _snapshot(index)
+            changed = sorted(
+                path for path in current.keys() | snapshot.keys()
+                if current.get(path) != snapshot.get(path)
+            )
+            snapshot = current
+            if not changed:
+                continue
+
+            for path in changed:
+                start = time.perf_counter()
+                lines = index.update(path)
+                elapsed = (time.perf_counter() - start) * 1000
+                state = 'changed' if path in current else 'deleted'
+                print(f"\n[{time.strftime('%H:%M:%S')}] {index.relative_path(path)} {state} ({elapsed:.1f} ms)")
+                for line in lines:
+                    print(line)
+            print(f"  totals: {index.summary_line()}")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")